@@ -1,14 +1,19 @@
 import os
 import re
 import json
+import time
 import uuid
 import typing_extensions as typing # For TypedDict compatibility
 from pathlib import Path
-from thefuzz import process as fuzz_process
+from types import MappingProxyType
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 from jinja2 import Environment, FileSystemLoader
+from utils.pantry_matcher import PantryMatcher
+from utils.vector_index import VectorIndex, GeminiEncoder, CachedEncoder, QUERY_TASK
+from utils.resolution_cache import ResolutionCache, Resolution
+from utils.vocabulary import controlled_vocabularies
 
 # Load Environment
 load_dotenv()
@@ -122,10 +127,20 @@ def load_json(path):
     with open(path, 'r') as f:
         return json.load(f)
 
+def _load_synonyms() -> dict:
+    """Reads user-defined synonyms ({name: food_id}) persisted by add_synonym."""
+    if not os.path.exists(SYNONYMS_PATH):
+        return {}
+    try:
+        with open(SYNONYMS_PATH, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Warning: Error loading synonyms.json: {e}")
+        return {}
+
 def load_pantry_memory():
     """Loads pantry data and user-defined synonyms into memory."""
-    global pantry_map
-    pantry_map = {}
+    pantry = {}
     
     # 1. Load Main Pantry (Seed Data)
     try:
@@ -135,22 +150,141 @@ def load_pantry_memory():
             n = item.get('food_name', item.get('name', '')).lower()
             i = item.get('food_id', item.get('id', ''))
             if n and i:
-                pantry_map[n] = i
+                pantry[n] = i
     except Exception as e:
         print(f"Warning: Error loading pantry.json: {e}")
 
     # 2. Load User Synonyms (Overrides)
-    if os.path.exists(SYNONYMS_PATH):
-        try:
-            with open(SYNONYMS_PATH, 'r') as f:
-                syns = json.load(f)
-                for name, fid in syns.items():
-                    pantry_map[name.lower()] = fid
-        except Exception as e:
-            print(f"Warning: Error loading synonyms.json: {e}")
+    for name, fid in _load_synonyms().items():
+        pantry[name.lower()] = fid
+
+    _swap_pantry_snapshot(PantrySnapshot(pantry))
+
+
+class PantrySnapshot:
+    """
+    Immutable pantry state shared by every lookup in this worker.
+
+    Holds the name → food_id map, the PantryMatcher compiled from it, the slim
+    context it was built from (re-used verbatim as LLM prompt context), the
+    ingredient aliases fed to the matcher's blocking index ({food_id: (alias, ...)},
+    kept out of the slim context so prompts don't grow) and the DB pantry
+    version it reflects (None when not built from the DB).
+
+    Snapshots are never mutated: a change builds a new one and
+    _swap_pantry_snapshot() replaces the module reference in one assignment,
+    so concurrent readers always see either the old or the new map in full.
+    """
+    __slots__ = ('version', 'pantry', 'matcher', 'slim_context', 'aliases')
+
+    def __init__(self, pantry: dict, slim_context=(), version: int | None = None, aliases: dict | None = None):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'pantry', MappingProxyType(dict(pantry)))
+        object.__setattr__(self, 'aliases', MappingProxyType({k: tuple(v) for k, v in (aliases or {}).items()}))
+        object.__setattr__(self, 'matcher', PantryMatcher(self.pantry, aliases=self.aliases))
+        object.__setattr__(self, 'slim_context', tuple(slim_context))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PantrySnapshot is immutable")
+
+    def with_synonym(self, name: str, food_id: str) -> "PantrySnapshot":
+        """Copy of this snapshot with one extra name → food_id mapping."""
+        pantry = dict(self.pantry)
+        pantry[name.lower()] = food_id
+        return PantrySnapshot(pantry, self.slim_context, self.version, self.aliases)
 
 # Initialize empty - will be populated by app via set_pantry_memory(db_context)
-pantry_map = {}
+_pantry_snapshot = PantrySnapshot({})
+
+# Read-only view of the current snapshot's map, kept for legacy readers.
+# Always read through current_pantry_snapshot() in new code: this name is
+# rebound on every swap, so `from ai_engine import pantry_map` goes stale.
+pantry_map = _pantry_snapshot.pantry
+
+def current_pantry_snapshot() -> PantrySnapshot:
+    """The snapshot currently used for matching (never None, may be empty)."""
+    return _pantry_snapshot
+
+# What name resolution reads its snapshot through. pantry_service installs
+# get_pantry_snapshot (the version-checked one) on import; without it
+# (scripts, tests) lookups use the current snapshot as is.
+_snapshot_provider = current_pantry_snapshot
+
+def set_snapshot_provider(provider):
+    """Replaces the callable get_pantry_id / get_pantry_ids read their PantrySnapshot through."""
+    global _snapshot_provider
+    _snapshot_provider = provider
+
+# Memoized get_pantry_id / get_pantry_ids results, kept in step with the
+# snapshot: every swap invalidates exactly the entries its diff can affect.
+_resolution_cache = ResolutionCache()
+
+# Past this many changed keys a swap just clears the resolution cache
+# (full reloads, first load) instead of diffing it entry by entry.
+RESOLUTION_DIFF_LIMIT = 500
+
+def _swap_pantry_snapshot(snapshot: PantrySnapshot):
+    global _pantry_snapshot, pantry_map
+    previous = _pantry_snapshot
+    _pantry_snapshot = snapshot
+    pantry_map = snapshot.pantry
+    _invalidate_resolutions(previous, snapshot)
+
+def _invalidate_resolutions(old: PantrySnapshot, new: PantrySnapshot):
+    """
+    Diffs two snapshots and drops the cached resolutions the change can affect:
+    keys removed or re-pointed (add_synonym, merges, deactivations, renames)
+    and keys added or whose aliases changed (new ingredients, reactivations).
+    """
+    removed = {k for k, fid in old.pantry.items() if new.pantry.get(k) != fid}
+    added = [k for k, fid in new.pantry.items() if old.pantry.get(k) != fid]
+    changed_aliases = {fid for fid in set(old.aliases) | set(new.aliases)
+                       if old.aliases.get(fid) != new.aliases.get(fid)}
+    if changed_aliases:
+        added.extend(k for k, fid in new.pantry.items() if fid in changed_aliases and k not in removed)
+    if not removed and not added:
+        return
+    if len(removed) + len(added) > RESOLUTION_DIFF_LIMIT:
+        _resolution_cache.clear()
+    else:
+        _resolution_cache.invalidate_pantry_change(removed, added, FUZZY_MATCH_THRESHOLD)
+
+def get_resolution_cache_stats() -> dict:
+    """Hit/miss counters of the name → food_id resolution cache (this worker)."""
+    return _resolution_cache.stats()
+
+# Semantic fallback: VectorIndex over Ingredient.embedding, loaded and
+# versioned by pantry_service like the pantry snapshot. The encoder turns
+# query strings into vectors in the same space (Gemini by default; swap in
+# utils.vector_index.HashingEncoder for offline use).
+#
+# Lookups run inside requests (/api/suggest-substitutes, get_pantry_id), so
+# the Gemini call is bounded: query vectors are cached per name, the request
+# times out after SEMANTIC_QUERY_TIMEOUT_MS, a failure pauses the fallback
+# for SEMANTIC_RETRY_SECONDS, and SEMANTIC_FALLBACK=0 turns it off.
+SEMANTIC_FALLBACK_ENABLED = os.getenv("SEMANTIC_FALLBACK", "1") != "0"
+SEMANTIC_QUERY_TIMEOUT_MS = int(os.getenv("SEMANTIC_QUERY_TIMEOUT_MS", "1500"))
+SEMANTIC_RETRY_SECONDS = 60.0
+
+_embedding_index = VectorIndex([], [], [])
+_query_encoder = CachedEncoder(GeminiEncoder(client, task_type=QUERY_TASK, timeout_ms=SEMANTIC_QUERY_TIMEOUT_MS))
+_encoder_retry_at = 0.0
+
+def current_embedding_index() -> VectorIndex:
+    return _embedding_index
+
+def set_embedding_index(index: VectorIndex):
+    global _embedding_index
+    _embedding_index = index
+    # Only semantic hits and misses can depend on the embeddings
+    _resolution_cache.invalidate_methods({'semantic', 'none'})
+    print(f"🧭 set_embedding_index: {len(index)} ingredient embeddings (version {index.version})")
+
+def set_query_encoder(encoder):
+    """Replaces the query encoder (any object with encode(list[str]) -> (n, dim) array)."""
+    global _query_encoder, _encoder_retry_at
+    _query_encoder = encoder
+    _encoder_retry_at = 0.0
 
 # DEPRECATED: We no longer load from JSON on import. Database source of truth only.
 # load_pantry_memory()
@@ -171,96 +305,9 @@ def load_controlled_vocabularies() -> dict:
     """
     Loads controlled vocabularies for metadata tagging from JSON files.
     Returns a unified dictionary containing lists for all metadata fields.
+    Served by the vocabulary registry: the files are only re-parsed when they change.
     """
-    base_constraints = Path(os.path.dirname(__file__)) / 'data' / 'constraints'
-    base_post = Path(os.path.dirname(__file__)) / 'data' / 'post_processing'
-    
-    vocab = {
-        "diets": [],
-        "cuisines": [],
-        "meal_types": [],
-        "cooking_methods": [],
-        "tastes": [],
-        "cleanup_factors": [],
-        "difficulty": [],
-        "time_intervals": []
-    }
-
-    try:
-        # 1. Diets
-        p = base_constraints / 'diets.json'
-        if p.exists():
-            data = json.loads(p.read_text(encoding='utf-8'))
-            vocab["diets"] = data.get('diets', data) if isinstance(data, dict) else data
-
-        # 2. Main Protein (Categories Only?)
-        # Need to check structure. Assuming flat list or dict with categories.
-        # User requested: "Extract just the category names or flattened examples"
-        p = base_constraints / 'main_protein.json'
-        if p.exists():
-            data = json.loads(p.read_text(encoding='utf-8'))
-            # If structure is {"protein_types": [{"category": "Beef", ...}]}
-            raw = data.get('protein_types', data) if isinstance(data, dict) else data
-            if isinstance(raw, list) and len(raw) > 0 and isinstance(raw[0], dict):
-                 vocab["protein_types"] = [item.get('category') for item in raw]
-            else:
-                 vocab["protein_types"] = raw
-
-        # 3. Meal Types (Flatten)
-        p = base_constraints / 'meal_types.json'
-        if p.exists():
-            data = json.loads(p.read_text(encoding='utf-8'))
-            # Assuming {"meal_types": ["Breakfast", ...]}
-            vocab["meal_types"] = data.get('meal_types', data) if isinstance(data, dict) else data
-
-        # 4. Difficulty
-        p = base_constraints / 'difficulty.json'
-        if p.exists():
-            data = json.loads(p.read_text(encoding='utf-8'))
-            vocab["difficulty"] = data.get('difficulty', data) if isinstance(data, dict) else data
-
-        # 5. Cuisines
-        p = base_post / 'cuisines.json'
-        if p.exists():
-            data = json.loads(p.read_text(encoding='utf-8'))
-            vocab["cuisines"] = data.get('cuisines', data) if isinstance(data, dict) else data
-
-        # 6. Cooking Methods
-        p = base_post / 'cooking_methods.json'
-        if p.exists():
-            data = json.loads(p.read_text(encoding='utf-8'))
-            # If list of objects, flatten to method names
-            raw = data.get('cooking_methods', data) if isinstance(data, dict) else data
-            if isinstance(raw, list) and len(raw) > 0 and isinstance(raw[0], dict):
-                vocab["cooking_methods"] = [m.get('method') for m in raw]
-            else:
-                 vocab["cooking_methods"] = raw
-
-        # 7. Taste
-        p = base_post / 'taste.json'
-        if p.exists():
-            data = json.loads(p.read_text(encoding='utf-8'))
-            vocab["tastes"] = data.get('tastes', data) if isinstance(data, dict) else data
-
-        # 8. Time Intervals
-        p = base_post / 'time_intervals.json'
-        if p.exists():
-            data = json.loads(p.read_text(encoding='utf-8'))
-            vocab["time_intervals"] = data.get('time_intervals', data) if isinstance(data, dict) else data
-
-        # 9. Cleanup Factors
-        p = base_post / 'cleanup_factors.json'
-        if p.exists():
-            data = json.loads(p.read_text(encoding='utf-8'))
-            # Assuming simple list or needing string conversion
-            raw = data.get('cleanup_factors', data) if isinstance(data, dict) else data
-            vocab["cleanup_factors"] = [str(x) for x in raw]
-
-        return vocab
-
-    except Exception as e:
-        print(f"⚠️ Warning: Error loading controlled vocabularies: {e}")
-        return vocab
+    return controlled_vocabularies()
 
 def generate_recipe_from_web_text(text: str, source_url: str = "User Input", slim_context: list[dict] = None) -> RecipeObj:
     """
@@ -273,7 +320,7 @@ def generate_recipe_from_web_text(text: str, source_url: str = "User Input", sli
         pantry_str = json.dumps(slim_context)
     else:
         # Fallback to name-only list from static map
-        pantry_str = json.dumps([{"n": k, "i": v} for k, v in pantry_map.items()])
+        pantry_str = json.dumps([{"n": k, "i": v} for k, v in _pantry_snapshot.pantry.items()])
     
     # Load Controlled Vocabularies
     vocab = load_controlled_vocabularies()
@@ -323,6 +370,12 @@ def generate_recipe_from_web_text(text: str, source_url: str = "User Input", sli
 # but "Salt" ≠ "Unsalted Butter" (45).
 FUZZY_MATCH_THRESHOLD = 85
 
+# Minimum cosine similarity (RETRIEVAL_QUERY name vs RETRIEVAL_DOCUMENT
+# ingredient text) for the embedding fallback to count as a match, used only
+# once fuzzy matching found nothing above FUZZY_MATCH_THRESHOLD. Re-tune with
+# scripts/tune_semantic_threshold.py after re-embedding the pantry.
+SEMANTIC_MATCH_THRESHOLD = 0.70
+
 # Cooking qualifiers to strip before fuzzy matching.
 # These appear as adjectives/suffixes and add noise that dilutes match scores.
 COOKING_QUALIFIERS = {
@@ -365,31 +418,52 @@ def normalize_ingredient_name(name: str) -> str:
     cleaned = [w for w in words if w not in COOKING_QUALIFIERS]
     return ' '.join(cleaned).strip() if cleaned else n
 
-def _fuzzy_match(query: str, pantry_keys: list[str]) -> str | None:
+def _fuzzy_match(query: str, snapshot: PantrySnapshot) -> Resolution | None:
     """
-    Run fuzzy matching against pantry_keys. Returns food_id or None.
+    Run fuzzy matching against the snapshot's precompiled matcher. Returns a Resolution or None.
     Uses WRatio first, then token_set_ratio as fallback.
     """
-    from thefuzz import fuzz as fuzz_scorer
-    
-    # Stage A: WRatio (good for similar-length strings)
-    result = fuzz_process.extractOne(query, pantry_keys)
+    result = snapshot.matcher.match(query, FUZZY_MATCH_THRESHOLD)
     if result:
-        matched_key, score = result
-        if score >= FUZZY_MATCH_THRESHOLD:
-            print(f"🔗 Fuzzy Match (WRatio): '{query}' → '{matched_key}' (score: {score})")
-            return pantry_map[matched_key]
-
-    # Stage B: token_set_ratio (handles subsets: "feta" inside "feta cheese")
-    result_tsr = fuzz_process.extractOne(query, pantry_keys, scorer=fuzz_scorer.token_set_ratio)
-    if result_tsr:
-        matched_key_tsr, score_tsr = result_tsr
-        if score_tsr >= FUZZY_MATCH_THRESHOLD:
-            print(f"🔗 Fuzzy Match (token_set): '{query}' → '{matched_key_tsr}' (score: {score_tsr})")
-            return pantry_map[matched_key_tsr]
-    
+        matched_key, score, label = result
+        print(f"🔗 Fuzzy Match ({label}): '{query}' → '{matched_key}' (score: {score})")
+        return Resolution(snapshot.pantry[matched_key], matched_key, 'fuzzy')
+
     return None
 
+def _semantic_search(queries: list[str], k: int) -> list[list[tuple[str, str, float]]]:
+    """
+    Embedding top-k per query as [(food_id, name, cosine), ...]. One encoder
+    call for the whole batch; empty results when there is no index or the
+    encoder fails (the fallback must never break matching).
+    """
+    global _encoder_retry_at
+    index = _embedding_index
+    if not queries or not len(index) or not SEMANTIC_FALLBACK_ENABLED or time.monotonic() < _encoder_retry_at:
+        return [[] for _ in queries]
+    try:
+        vectors = _query_encoder.encode(queries)
+    except Exception as e:
+        _encoder_retry_at = time.monotonic() + SEMANTIC_RETRY_SECONDS
+        print(f"⚠️  Semantic fallback unavailable for {SEMANTIC_RETRY_SECONDS:.0f}s: {e}")
+        return [[] for _ in queries]
+    return [
+        [(index.food_ids[row], index.names[row], sim) for row, sim in hits]
+        for hits in index.search(vectors, k)
+    ]
+
+def _semantic_match_many(queries: list[str]) -> list[Resolution | None]:
+    """Best embedding match per query above SEMANTIC_MATCH_THRESHOLD (Resolution or None)."""
+    results = []
+    for query, hits in zip(queries, _semantic_search(queries, 1)):
+        if hits and hits[0][2] >= SEMANTIC_MATCH_THRESHOLD:
+            food_id, matched_name, sim = hits[0]
+            print(f"🧭 Semantic Match: '{query}' → '{matched_name}' (cosine: {sim:.2f})")
+            results.append(Resolution(food_id, None, 'semantic'))
+        else:
+            results.append(None)
+    return results
+
 def add_synonym(name: str, food_id: str):
     """
     Adds a manual synonym mapping (e.g. 'Soy Milk' -> '000123') and persists it.
@@ -410,9 +484,8 @@ def add_synonym(name: str, food_id: str):
     with open(SYNONYMS_PATH, 'w') as f:
         json.dump(syns, f, indent=2)
         
-    # Update memory immediately
-    if 'pantry_map' in globals():
-        pantry_map[name.lower()] = food_id
+    # Update memory immediately (other workers pick it up via the pantry version bump)
+    _swap_pantry_snapshot(_pantry_snapshot.with_synonym(name, food_id))
     print(f"✅ Added Synonym: '{name}' -> '{food_id}'")
     return True
 
@@ -421,6 +494,38 @@ def get_pantry_id(name: str):
     """
     Resolves an ingredient name to a pantry food_id.
     
+    Results (misses included) are memoized per lowercased name in
+    _resolution_cache; see _resolve_pantry_id for the matching strategy.
+    
+    Returns the food_id string or None if no confident match.
+    """
+    if not name:
+        return None
+    snapshot = _snapshot_provider()  # one consistent, version-checked snapshot for the whole lookup
+    if not snapshot.pantry:
+        print(f"⚠️  get_pantry_id called but pantry_map is EMPTY — cannot match '{name}'")
+        return None
+
+    key = name.strip().lower()
+    generation = _resolution_cache.generation
+    cached = _resolution_cache.get(key)
+    if cached is not None:
+        return cached.food_id
+
+    resolution = _resolve_pantry_id(name, snapshot)
+    _resolution_cache.put(key, resolution, _resolution_forms(name), generation)
+    return resolution.food_id
+
+def _resolution_forms(name: str) -> tuple[str, ...]:
+    """The name forms a lookup matches on (raw lowercased, normalized)."""
+    n_lower = name.strip().lower()
+    n_clean = normalize_ingredient_name(name)
+    return (n_lower, n_clean) if n_clean and n_clean != n_lower else (n_lower,)
+
+def _resolve_pantry_id(name: str, snapshot: PantrySnapshot) -> Resolution:
+    """
+    Uncached resolution of one name against a snapshot.
+    
     When the name contains cooking qualifiers (normalization changes it),
     the NORMALIZED version is tried first to prevent duplicate ingredients
     from poisoning exact matches. For clean names, raw exact match fires first.
@@ -434,45 +539,144 @@ def get_pantry_id(name: str):
       If name is already clean (normalized == raw):
         1. Exact match on raw name
         2. Fuzzy match on raw name
+      Finally, the embedding index (semantic fallback, normalized name).
     
-    Returns the food_id string or None if no confident match.
+    Returns a Resolution (food_id None if no confident match).
     """
-    if not name:
-        return None
-    if not pantry_map:
-        print(f"⚠️  get_pantry_id called but pantry_map is EMPTY — cannot match '{name}'")
-        return None
-
+    pantry = snapshot.pantry
     n_lower = name.strip().lower()
     n_clean = normalize_ingredient_name(name)
     was_normalized = n_clean and n_clean != n_lower
-    pantry_keys = list(pantry_map.keys())
 
     if was_normalized:
         # --- Normalized name takes priority (prevents duplicate matches) ---
         # 1. Exact match on normalized name
-        if n_clean in pantry_map:
+        if n_clean in pantry:
             print(f"🔗 Normalized Exact Match: '{name}' → '{n_clean}'")
-            return pantry_map[n_clean]
+            return Resolution(pantry[n_clean], n_clean, 'exact')
 
         # 2. Fuzzy match on normalized name
-        result_clean = _fuzzy_match(n_clean, pantry_keys)
+        result_clean = _fuzzy_match(n_clean, snapshot)
         if result_clean:
             print(f"    ↳ (after normalizing '{name}' → '{n_clean}')")
             return result_clean
 
     # 3. Exact match on raw name (first check for clean names, fallback for normalized)
-    if n_lower in pantry_map:
-        return pantry_map[n_lower]
+    if n_lower in pantry:
+        return Resolution(pantry[n_lower], n_lower, 'exact')
+
+    # 4. Fuzzy match on raw name
+    result = _fuzzy_match(n_lower, snapshot)
+    if result:
+        return result
 
-    # 4. Fuzzy match on raw name (final fallback)
-    result = _fuzzy_match(n_lower, pantry_keys)
+    # 5. Semantic fallback on embeddings
+    result = _semantic_match_many([n_clean or n_lower])[0]
     if result:
         return result
 
     # Nothing matched
     print(f"⚠️  No match for '{name}' (normalized: '{n_clean}') — threshold: {FUZZY_MATCH_THRESHOLD}")
-    return None
+    return Resolution(None, None, 'none')
+
+def get_pantry_ids(names: list[str]) -> dict[str, str | None]:
+    """
+    Batch version of get_pantry_id for a whole recipe's ingredient names.
+
+    Applies the same staged strategy per name, but every fuzzy stage runs as
+    a single vectorized pass over all names still unresolved at that stage:
+      1. Exact match on normalized name (names with qualifiers only)
+      2. Fuzzy match on normalized name — one batch
+      3. Exact match on raw name
+      4. Fuzzy match on raw name — one batch
+      5. Semantic fallback on embeddings — one encoder call
+
+    Names already in _resolution_cache skip the stages entirely.
+
+    Returns {name: food_id or None} for every distinct input name.
+    """
+    names = list(dict.fromkeys(n for n in names if n))
+    if not names:
+        return {}
+    snapshot = _snapshot_provider()  # one consistent, version-checked snapshot for the whole batch
+    if not snapshot.pantry:
+        print(f"⚠️  get_pantry_ids called but pantry_map is EMPTY — cannot match {len(names)} names")
+        return {n: None for n in names}
+
+    generation = _resolution_cache.generation
+    out: dict[str, str | None] = {}
+    pending = []
+    for name in names:
+        cached = _resolution_cache.get(name.strip().lower())
+        if cached is not None:
+            out[name] = cached.food_id
+        else:
+            pending.append(name)
+
+    for name, resolution in _resolve_pantry_ids(pending, snapshot).items():
+        _resolution_cache.put(name.strip().lower(), resolution, _resolution_forms(name), generation)
+        out[name] = resolution.food_id
+    return out
+
+def _resolve_pantry_ids(names: list[str], snapshot: PantrySnapshot) -> dict[str, Resolution]:
+    """Uncached, batched stages of get_pantry_ids → {name: Resolution}."""
+    resolved: dict[str, Resolution | None] = {n: None for n in names}
+    if not resolved:
+        return {}
+    pantry, matcher = snapshot.pantry, snapshot.matcher
+
+    forms = {}  # name → (n_lower, n_clean, was_normalized)
+    for name in resolved:
+        n_lower = name.strip().lower()
+        n_clean = normalize_ingredient_name(name)
+        forms[name] = (n_lower, n_clean, bool(n_clean and n_clean != n_lower))
+
+    # Stages 1 + 2: normalized name (exact, then one fuzzy batch)
+    fuzzy_clean = []
+    for name, (n_lower, n_clean, was_normalized) in forms.items():
+        if not was_normalized:
+            continue
+        if n_clean in pantry:
+            print(f"🔗 Normalized Exact Match: '{name}' → '{n_clean}'")
+            resolved[name] = Resolution(pantry[n_clean], n_clean, 'exact')
+        else:
+            fuzzy_clean.append(name)
+
+    for name, result in zip(fuzzy_clean, matcher.match_many([forms[n][1] for n in fuzzy_clean], FUZZY_MATCH_THRESHOLD)):
+        if result:
+            matched_key, score, label = result
+            print(f"🔗 Fuzzy Match ({label}): '{forms[name][1]}' → '{matched_key}' (score: {score})")
+            print(f"    ↳ (after normalizing '{name}' → '{forms[name][1]}')")
+            resolved[name] = Resolution(pantry[matched_key], matched_key, 'fuzzy')
+
+    # Stages 3 + 4: raw name (exact, then one fuzzy batch)
+    fuzzy_raw = []
+    for name, (n_lower, _, _) in forms.items():
+        if resolved[name]:
+            continue
+        if n_lower in pantry:
+            resolved[name] = Resolution(pantry[n_lower], n_lower, 'exact')
+        else:
+            fuzzy_raw.append(name)
+
+    unmatched = []
+    for name, result in zip(fuzzy_raw, matcher.match_many([forms[n][0] for n in fuzzy_raw], FUZZY_MATCH_THRESHOLD)):
+        if result:
+            matched_key, score, label = result
+            print(f"🔗 Fuzzy Match ({label}): '{forms[name][0]}' → '{matched_key}' (score: {score})")
+            resolved[name] = Resolution(pantry[matched_key], matched_key, 'fuzzy')
+        else:
+            unmatched.append(name)
+
+    # Stage 5: semantic fallback for whatever is left
+    for name, result in zip(unmatched, _semantic_match_many([forms[n][1] or forms[n][0] for n in unmatched])):
+        if result:
+            resolved[name] = result
+        else:
+            resolved[name] = Resolution(None, None, 'none')
+            print(f"⚠️  No match for '{name}' (normalized: '{forms[name][1]}') — threshold: {FUZZY_MATCH_THRESHOLD}")
+
+    return resolved
 
 def get_top_pantry_suggestions(name: str, top_n: int = 3) -> list[dict]:
     """
@@ -483,14 +687,12 @@ def get_top_pantry_suggestions(name: str, top_n: int = 3) -> list[dict]:
     
     Returns: [{"name": str, "food_id": str, "score": int}, ...]
     """
-    if not name or not pantry_map:
+    snapshot = _snapshot_provider()  # version-checked, like get_pantry_id
+    if not name or not snapshot.pantry:
         return []
     
-    from thefuzz import fuzz as fuzz_scorer
-    
     n_lower = name.strip().lower()
     n_clean = normalize_ingredient_name(name)
-    pantry_keys = list(pantry_map.keys())
     
     # Collect candidates from both raw and normalized names, both scorers
     candidates = {}  # key → best_score
@@ -499,42 +701,58 @@ def get_top_pantry_suggestions(name: str, top_n: int = 3) -> list[dict]:
     if n_clean and n_clean != n_lower:
         queries.append(n_clean)
     
-    for query in queries:
-        # WRatio matches
-        results_wr = fuzz_process.extract(query, pantry_keys, limit=top_n * 2)
-        for matched_key, score in results_wr:
-            if matched_key not in candidates or score > candidates[matched_key]:
-                candidates[matched_key] = score
-        
-        # token_set_ratio matches
-        results_tsr = fuzz_process.extract(query, pantry_keys, scorer=fuzz_scorer.token_set_ratio, limit=top_n * 2)
-        for matched_key, score in results_tsr:
+    # One cdist pass per scorer covers every (query, scorer) combination
+    for results in snapshot.matcher.top(queries, limit=top_n * 2):
+        for matched_key, score in results:
             if matched_key not in candidates or score > candidates[matched_key]:
                 candidates[matched_key] = score
     
     # Sort by score descending, take top N
     sorted_candidates = sorted(candidates.items(), key=lambda x: x[1], reverse=True)[:top_n]
-    
-    return [
-        {"name": key, "food_id": pantry_map[key], "score": score}
+    suggestions = [
+        {"name": key, "food_id": snapshot.pantry[key], "score": score}
         for key, score in sorted_candidates
     ]
+    
+    confident = [s for s in suggestions if s["score"] >= FUZZY_MATCH_THRESHOLD]
+    if len(confident) < top_n:
+        seen = {s["food_id"] for s in confident}
+        semantic = []
+        for food_id, matched_name, sim in _semantic_search([n_clean or n_lower], top_n)[0]:
+            if food_id not in seen:
+                seen.add(food_id)
+                semantic.append({"name": matched_name.lower(), "food_id": food_id, "score": int(round(sim * 100))})
+        weak = [s for s in suggestions if s["score"] < FUZZY_MATCH_THRESHOLD and s["food_id"] not in seen]
+        suggestions = (confident + semantic + weak)[:top_n]
+    
+    return suggestions
 
-def set_pantry_memory(slim_context):
+def set_pantry_memory(slim_context, version: int | None = None, aliases: dict | None = None):
     """
-    Populates pantry_map from DB ingredients via slim_context.
+    Builds a new PantrySnapshot from DB ingredients via slim_context and
+    swaps it in atomically. Readers holding the previous snapshot keep a
+    consistent (old) view until they finish.
     
-    CLEARS the map first to prevent accumulation across calls.
+    No-op when slim_context is the current snapshot's own context (e.g. it
+    came from pantry_service.get_slim_pantry_context()), so generation
+    routes don't rebuild an unchanged pantry.
     
     Two-pass strategy:
       Pass 1: Add all staple pantry items (is_staple=True).
       Pass 2: Add non-staple items ONLY if their normalized form
               doesn't collide with an existing map entry.
-    
-    IMP- food_ids are ALWAYS rejected (auto-created duplicates).
+    Then user synonyms (synonyms.json) are layered on top of the given
+    context: a synonym wins over a DB name with the same key.
+
+    IMP- food_ids are accepted: pantry_service only passes active
+    ingredients, so an active IMP- id is a valid target.
+    aliases ({food_id: [alias, ...]}) only widen fuzzy-match candidate
+    shortlisting; they don't become pantry keys.
     """
-    pantry_map.clear()  # Prevent accumulation across calls
-    
+    if slim_context is _pantry_snapshot.slim_context:
+        return
+
+    pantry = {}
     added_staple = 0
     added_standard = 0
     skipped = 0
@@ -550,7 +768,7 @@ def set_pantry_memory(slim_context):
         # it's considered valid for injection.
         
         if name and pantry_id and is_staple:
-            pantry_map[name.lower()] = pantry_id
+            pantry[name.lower()] = pantry_id
             added_staple += 1
     
     # Pass 2: Non-staple items — add only if not a decorated duplicate
@@ -568,20 +786,29 @@ def set_pantry_memory(slim_context):
         n_clean = normalize_ingredient_name(name)
         
         # Skip if raw name already in map (staple takes precedence)
-        if n_lower in pantry_map:
+        if n_lower in pantry:
             skipped += 1
             continue
         # Skip if normalized form already in map (it's a decorated duplicate)
-        if n_clean != n_lower and n_clean in pantry_map:
+        if n_clean != n_lower and n_clean in pantry:
             skipped += 1
             continue
         
         # Clean standard item — add it (e.g. "olive", "avocado")
-        pantry_map[n_lower] = pantry_id
+        pantry[n_lower] = pantry_id
         added_standard += 1
     
+    # User synonyms override (persisted by add_synonym)
+    synonyms = _load_synonyms()
+    for syn_name, fid in synonyms.items():
+        pantry[syn_name.lower()] = fid
+
+    # Compiles the matcher once for this snapshot, then publishes it
+    _swap_pantry_snapshot(PantrySnapshot(pantry, slim_context, version, aliases))
+
     total = added_staple + added_standard
-    print(f"📦 set_pantry_memory: {total} items ({added_staple} staples + {added_standard} standard active), skipped {skipped} duplicates/imports")
+    print(f"📦 set_pantry_memory: {total} items ({added_staple} staples + {added_standard} standard active), "
+          f"{len(synonyms)} synonyms, skipped {skipped} duplicates/imports (version {version})")
 
 # --- Core Generation Function ---
 def generate_recipe_ai(
@@ -708,7 +935,7 @@ def generate_recipe_from_video(video_path: str, caption: str, slim_context: list
         set_pantry_memory(slim_context)
         pantry_str = json.dumps(slim_context)
     else:
-        pantry_str = json.dumps([{"n": k, "i": v} for k, v in pantry_map.items()])
+        pantry_str = json.dumps([{"n": k, "i": v} for k, v in _pantry_snapshot.pantry.items()])
 
     print(f"🎬 Uploading video to Gemini: {video_path}")
     file_ref = client.files.upload(file=video_path)
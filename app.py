@@ -8,20 +8,35 @@ print(f"--- CONFIG DEBUG: STORAGE_BACKEND={os.getenv('STORAGE_BACKEND')} ---")
 print(f"--- CONFIG DEBUG: DB_BACKEND={os.getenv('DB_BACKEND', 'local')} ---")
 
 import uuid
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort, session, g
 from slugify import slugify
 from flask_migrate import Migrate
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 import markdown
 from database.db_connector import configure_database
-from database.models import db, Ingredient, Recipe, Instruction, RecipeIngredient, RecipeMealType, RecipeDiet, User, Resource, resource_relations, Chef, UserRecipeInteraction, RecipeEvaluation, RecipeCollection, CollectionItem, UserQueue, UserLink, SocialMediaPost, TikTokSource, ConceptVisual, VisualStyleGuide
+from database.models import db, Ingredient, Recipe, Instruction, RecipeIngredient, RecipeMealType, RecipeDiet, RecipeProtein, RecipeGraphPosition, RecipeSignature, RecipeLshBand, User, Resource, resource_relations, Chef, UserRecipeInteraction, RecipeEvaluation, RecipeCollection, CollectionItem, UserQueue, UserLink, SocialMediaPost, TikTokSource, ConceptVisual, VisualStyleGuide
 from utils.decorators import admin_required
 from sqlalchemy import or_, func
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.orm.attributes import flag_modified
-from services.pantry_service import get_slim_pantry_context
+from services.pantry_service import get_slim_pantry_context, get_pantry_snapshot, bump_pantry_version
 from ai_engine import generate_recipe_ai, get_pantry_id, get_top_pantry_suggestions, chefs_data, generate_recipe_from_web_text, analyze_ingredient_ai, extract_nutrients_from_text, load_controlled_vocabularies
 from services.recipe_service import process_recipe_workflow, STATUS_SUCCESS, STATUS_MISSING
+from services.recipe_filters import NUTRITION_RANGE_FILTERS, parse_nutrition_ranges, apply_nutrition_ranges
+from services.keyset_pagination import SortKey, keyset_page
+from services.search_service import search_ingredients, search_recipes, recipe_search_clause
+from services.feed_sampler import FEED_BATCH, next_feed_batch, bump_feed_version
+from services.recipe_cards import card_select, cards_from_rows, load_cards
+from services.recipe_view import load_recipe_view, substitute_alternatives
+from services.recipe_json_cache import recipe_json_response  # also registers the revision listeners
+from services.collection_service import published_collections, queue_collection_refresh  # also registers the stats listeners
+import utils.vocabulary as vocabulary
+from services.graph_cache import graph_response, bump_graph_version
+from services.similarity_index import SIMILAR_LIMIT, similar_recipes  # also registers the signature listeners
+from services.galaxy_layout import VIEWPORT_LIMIT, cluster_graph, parse_bbox, recipe_positions, viewport_graph  # also registers the layout listeners
+from services.cache_version_service import RECIPE_GRAPH_SCOPE, INGREDIENT_GRAPH_SCOPE
+import services.nutrition_propagation  # noqa: F401 — registers the commit-time nutrition propagation listeners
+from services.recipe_protein_service import protein_options  # also registers the recipe_protein tag listeners
 from services.photographer_service import generate_visual_prompt, generate_actual_image, generate_visual_prompt_from_image, load_photographer_config, generate_image_variation, process_external_image
 from services.vertex_image_service import VertexImageGenerator
 from services.web_scraper_service import WebScraper
@@ -141,11 +156,7 @@ migrate = Migrate(app, db)
 def get_protein_category(protein_name):
     """Finds the Tier 1 category for a given protein name."""
     if not protein_name: return None
-    from ai_engine import protein_data
-    for category in protein_data:
-        if protein_name in category['examples']:
-            return category['category']
-    return "Other"
+    return vocabulary.protein_category_map().get(protein_name, "Other")
 @app.context_processor
 def utility_processor():
     def update_query_params(**kwargs):
@@ -156,40 +167,31 @@ def utility_processor():
     
     return dict(update_query_params=update_query_params)
 
+def _recipe_image_base() -> str:
+    """Public URL prefix of the recipes image folder for the active storage backend (once per request)."""
+    if 'recipe_image_base' not in g:
+        if isinstance(storage_provider, GoogleCloudStorageProvider):
+            # GCS Public URL Convention: https://storage.googleapis.com/<bucket>/<blob_path>
+            # The app saves/moves items to "recipes" folder.
+            g.recipe_image_base = f"https://storage.googleapis.com/{storage_provider.bucket_name}/recipes/"
+        else:
+            # Local Flask Static
+            g.recipe_image_base = url_for('static', filename='recipes/')
+    return g.recipe_image_base
+
 @app.template_global()
 def get_recipe_image_url(recipe):
-    """Generates the correct URL for a recipe image based on storage backend."""
+    """Generates the correct URL for a recipe (or recipe card) image based on storage backend."""
     if not recipe or not recipe.image_filename:
         return None
-    
-    # If using GCS, return the public URL directly
-    # We construct it manually or use storage_provider if it had a get_url method
-    # But for now, we know the pattern or can assume public access for simplicity
-    # The storage provider saves as "recipes/<filename>" or just "<filename>" in recipes folder?
-    # Let's check storage provider usage.
-    
-    # Access global storage_provider
-    is_gcs = isinstance(storage_provider, GoogleCloudStorageProvider)
-    
-    if is_gcs:
-        # GCS Public URL Convention: https://storage.googleapis.com/<bucket>/<blob_path>
-        # The app saves/moves items to "recipes" folder.
-        return f"https://storage.googleapis.com/{storage_provider.bucket_name}/recipes/{recipe.image_filename}"
-    else:
-        # Local Flask Static
-        return url_for('static', filename='recipes/' + recipe.image_filename)
+    return _recipe_image_base() + recipe.image_filename
 
 @app.template_global()
 def get_image_url(filename):
     """Translates a raw filename to its full public URL based on the active storage backend."""
     if not filename:
         return ""
-    
-    is_gcs = isinstance(storage_provider, GoogleCloudStorageProvider)
-    if is_gcs:
-        return f"https://storage.googleapis.com/{storage_provider.bucket_name}/recipes/{filename}"
-    else:
-        return url_for('static', filename='recipes/' + filename)
+    return _recipe_image_base() + filename
 
 db.init_app(app)
 
@@ -315,38 +317,11 @@ def toggle_favorite_recipe(recipe_id):
 @app.route('/api/feed/recipes', methods=['GET'])
 def get_feed_recipes():
     """Returns a list of random recipes for the feed (Tinder-style)."""
-    limit = 10
-    
-    if current_user.is_authenticated:
-        # Priority 1: Exclude recipes user has interacted with (new ones only)
-        subq_all = db.select(UserRecipeInteraction.recipe_id).where(UserRecipeInteraction.user_id == current_user.id)
-        stmt = (
-            db.select(Recipe)
-            .where(Recipe.status == 'approved')  # Public guard
-            .where(Recipe.id.not_in(subq_all))
-            .order_by(func.random())
-            .limit(limit)
-        )
-        recipes = db.session.execute(stmt).scalars().all()
-        
-        # Priority 2: If we've seen everything, shuffle through the "no" stack
-        if not recipes:
-            subq_pass = db.select(UserRecipeInteraction.recipe_id).where(
-                UserRecipeInteraction.user_id == current_user.id,
-                UserRecipeInteraction.status == 'pass'
-            )
-            stmt = (
-                db.select(Recipe)
-                .where(Recipe.status == 'approved')
-                .where(Recipe.id.in_(subq_pass))
-                .order_by(func.random())
-                .limit(limit)
-            )
-            recipes = db.session.execute(stmt).scalars().all()
-    else:
-        # Anonymous: Random selection of approved only
-        stmt = db.select(Recipe).where(Recipe.status == 'approved').order_by(func.random()).limit(limit)
-        recipes = db.session.execute(stmt).scalars().all()
+    limit = FEED_BATCH
+
+    # Per-visitor shuffled deck (seed + cursor) kept in the session; see services.feed_sampler
+    user_id = current_user.id if current_user.is_authenticated else None
+    recipes, session['feed_deck'] = next_feed_batch(session.get('feed_deck'), user_id, limit)
     
     data = []
     for r in recipes:
@@ -921,7 +896,7 @@ def new_recipe():
 @app.route('/')
 def discover():
     # Load Recent Recipes (approved only)
-    recent_recipes = db.session.execute(db.select(Recipe).where(Recipe.status == 'approved').order_by(Recipe.id.desc()).limit(8)).scalars().all()
+    recent_recipes = load_cards(card_select().where(Recipe.status == 'approved').order_by(Recipe.id.desc()).limit(8))
     
     resources = load_resources()
     active_template = session.get('active_card_template', 'original')
@@ -972,12 +947,8 @@ def resource_detail(slug):
 import json
 
 def load_json_option(filename, key):
-    data_dir = os.path.join(app.root_path, 'data')
-    try:
-        with open(os.path.join(data_dir, filename), 'r') as f:
-            return json.load(f).get(key, [])
-    except:
-        return []
+    # Parsed once per file change by the vocabulary registry (shared list: don't mutate)
+    return vocabulary.registry.option(filename, key)
 
 @app.route('/admin/chefs')
 @login_required
@@ -1039,164 +1010,205 @@ def save_chefs_json():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-@app.route('/recipes')
-def recipes_list():
-    # 1. Load Filter Data Options
+def _recipe_library_filters(args) -> dict:
+    """Filter options for the recipe library plus the user's selection from `args`."""
     # Use global load_json_option helper
-
     cuisine_options = load_json_option('post_processing/cuisines.json', 'cuisines')
     diet_options = load_json_option('constraints/diets.json', 'diets')
     difficulty_options = load_json_option('constraints/difficulty.json', 'difficulty')
     
-    # Protein Types (List of Dicts -> List of Strings)
-    pt_data = load_json_option('constraints/main_protein.json', 'protein_types')
-    protein_options = []
-    for p in pt_data:
-        if 'examples' in p:
-            protein_options.extend(p['examples'])
-    protein_options = sorted(list(set(protein_options)))
-    
     # Meal Types (Dict of Lists -> Flattened List)
-    mt_data = load_json_option('constraints/meal_types.json', 'meal_classification')
-    meal_type_options = []
-    if isinstance(mt_data, dict):
-        for category_list in mt_data.values():
-            if isinstance(category_list, list):
-                meal_type_options.extend(category_list)
-    meal_type_options = sorted(list(set(meal_type_options)))
-
-    # 2. Handle Query Params (multi-select)
+    meal_type_options = vocabulary.meal_type_options()
+
+    # Handle Query Params (multi-select)
     # Default to ALL options if not specified (First load behavior)
-    selected_cuisines = request.args.getlist('cuisine')
-    if not selected_cuisines and 'cuisine' not in request.args:
+    selected_cuisines = args.getlist('cuisine')
+    if not selected_cuisines and 'cuisine' not in args:
         selected_cuisines = cuisine_options
         
-    selected_diets = request.args.getlist('diet')
-    if not selected_diets and 'diet' not in request.args:
+    selected_diets = args.getlist('diet')
+    if not selected_diets and 'diet' not in args:
         selected_diets = diet_options
 
-    selected_meal_types = request.args.getlist('meal_type')
-    if not selected_meal_types and 'meal_type' not in request.args:
+    selected_meal_types = args.getlist('meal_type')
+    if not selected_meal_types and 'meal_type' not in args:
         selected_meal_types = meal_type_options
-    
-    selected_difficulties = request.args.getlist('difficulty')
-    selected_proteins = request.args.getlist('protein_type')
 
-    # 3. Handle View Mode & Base Query
-    view_mode = request.args.get('view', 'discover')
-    
-    # Session Persistence for View Style
-    if 'style' in request.args:
-        from flask import session
-        session['view_style'] = request.args.get('style')
-        
-    # Get current style from session or default to grid
-    from flask import session
-    view_style = session.get('view_style', 'grid')
+    return {
+        'cuisine_options': cuisine_options,
+        'diet_options': diet_options,
+        'difficulty_options': difficulty_options,
+        # main_protein.json examples, the values recipe_protein is tagged with
+        'protein_options': list(protein_options()),
+        'meal_type_options': meal_type_options,
+        'selected_cuisines': selected_cuisines,
+        'selected_diets': selected_diets,
+        'selected_meal_types': selected_meal_types,
+        'selected_difficulties': args.getlist('difficulty'),
+        'selected_proteins': args.getlist('protein_type'),
+        'nutrition_ranges': parse_nutrition_ranges(args),
+    }
+
 
+def _recipe_library_query(view_mode: str, filters: dict):
+    """
+    (view_mode, stmt, sort keys) for one library view. The sort keys drive
+    both the ORDER BY and the keyset cursor; each ends in a unique column.
+    """
     if view_mode == 'saved' and current_user.is_authenticated:
         # Base query for Saved Recipes
         stmt = (
-            db.select(Recipe, UserRecipeInteraction)
+            card_select(UserRecipeInteraction.is_super_like, UserRecipeInteraction.is_made)
             .join(UserRecipeInteraction)
             .where(
                 UserRecipeInteraction.user_id == current_user.id,
                 UserRecipeInteraction.status == 'favorite',
                 Recipe.status == 'approved'
             )
-            .order_by(
-                UserRecipeInteraction.is_super_like.desc(),
-                UserRecipeInteraction.timestamp.desc()
-            )
         )
+        keys = [
+            SortKey(UserRecipeInteraction.is_super_like, descending=True, kind='bool'),
+            SortKey(UserRecipeInteraction.timestamp, descending=True, kind='datetime'),
+            SortKey(Recipe.id, descending=True),
+        ]
     elif view_mode == 'made' and current_user.is_authenticated:
         # Base query for Made recipes
         stmt = (
-            db.select(Recipe, UserRecipeInteraction)
+            card_select(UserRecipeInteraction.is_super_like, UserRecipeInteraction.is_made)
             .join(UserRecipeInteraction)
             .where(
                 UserRecipeInteraction.user_id == current_user.id,
                 UserRecipeInteraction.is_made == True,
                 Recipe.status == 'approved'
             )
-            .order_by(UserRecipeInteraction.timestamp.desc())
         )
+        keys = [
+            SortKey(UserRecipeInteraction.timestamp, descending=True, kind='datetime'),
+            SortKey(Recipe.id, descending=True),
+        ]
     elif view_mode == 'next' and current_user.is_authenticated:
         # Base query for Queue
-        from database.models import UserQueue
         stmt = (
-            db.select(Recipe, UserQueue)
+            card_select(UserQueue.position)
             .join(UserQueue)
             .where(
                 UserQueue.user_id == current_user.id,
                 Recipe.status == 'approved'
             )
-            .order_by(UserQueue.position.asc())
         )
+        keys = [SortKey(UserQueue.position), SortKey(UserQueue.id)]
     else:
         # Default Discover query
         view_mode = 'discover'
-        stmt = db.select(Recipe).where(Recipe.status == 'approved').order_by(Recipe.id.desc())
+        stmt = card_select().where(Recipe.status == 'approved')
+        keys = [SortKey(Recipe.id, descending=True)]
 
-    # 4. Apply Filters — only when the user has chosen a STRICT SUBSET of the available options.
+    # Apply Filters — only when the user has chosen a STRICT SUBSET of the available options.
     # The default "select all" state should not restrict results at all.
     # Using .any() with a full option list would exclude recipes that have NO tags,
     # which is incorrect for newly added recipes that lack meal_types or diets.
-    if selected_cuisines and len(selected_cuisines) < len(cuisine_options):
+    selected_cuisines = filters['selected_cuisines']
+    selected_diets = filters['selected_diets']
+    selected_meal_types = filters['selected_meal_types']
+    if selected_cuisines and len(selected_cuisines) < len(filters['cuisine_options']):
         stmt = stmt.where(Recipe.cuisine.in_(selected_cuisines))
 
-    if selected_diets and len(selected_diets) < len(diet_options):
+    if selected_diets and len(selected_diets) < len(filters['diet_options']):
         stmt = stmt.where(Recipe.diets.any(RecipeDiet.diet.in_(selected_diets)))
 
-    if selected_difficulties:
-        stmt = stmt.where(Recipe.difficulty.in_(selected_difficulties))
+    if filters['selected_difficulties']:
+        stmt = stmt.where(Recipe.difficulty.in_(filters['selected_difficulties']))
 
-    if selected_proteins:
-        clauses = []
-        for p in selected_proteins:
-            clauses.append(Recipe.ingredients.any(
-                RecipeIngredient.ingredient.has(Ingredient.name.ilike(f'%{p}%'))
-            ))
-        if clauses:
-             stmt = stmt.where(or_(*clauses))
-
-    if selected_meal_types and len(selected_meal_types) < len(meal_type_options):
+    if filters['selected_proteins']:
+        # Precomputed tags (services.recipe_protein_service) — one indexed IN-join
+        stmt = stmt.where(Recipe.id.in_(
+            db.select(RecipeProtein.recipe_id).where(RecipeProtein.protein.in_(filters['selected_proteins']))
+        ))
+
+    if selected_meal_types and len(selected_meal_types) < len(filters['meal_type_options']):
         stmt = stmt.where(Recipe.meal_types.any(RecipeMealType.meal_type.in_(selected_meal_types)))
 
-    # Fetch results
-    results = db.session.execute(stmt).all()
+    # Per-serving nutrition ranges (indexed columns, filtered in SQL)
+    stmt = apply_nutrition_ranges(stmt, filters['nutrition_ranges'])
+    return view_mode, stmt, keys
+
+
+def _library_recipes(view_mode: str, rows) -> list:
+    """Recipe cards of one page, with the view's interaction / queue columns filled in."""
+    if view_mode in ('saved', 'made'):
+        return cards_from_rows(rows, extras=('is_super_liked', 'is_made'))
+    if view_mode == 'next':
+        return cards_from_rows(rows, extras=('queue_position',))
+    return cards_from_rows(rows)
+
+
+@app.route('/recipes')
+def recipes_list():
+    # 1. Load Filter Data Options and the selection
+    filters = _recipe_library_filters(request.args)
+
+    # 2. Handle View Mode
+    view_mode = request.args.get('view', 'discover')
     
-    recipes = []
-    if view_mode in ['saved', 'made', 'next']:
-        for item in results:
-            r = item[0]
-            # Attach interaction data to recipe object for template
-            if view_mode in ('saved', 'made'):
-                interaction = item[1]
-                r.is_super_liked = getattr(interaction, 'is_super_like', False)
-                r.interaction = interaction
-            elif view_mode == 'next':
-                queue_item = item[1]
-                r.queue_position = queue_item.position
-            recipes.append(r)
-    else:
-        recipes = [item[0] for item in results]
+    # Session Persistence for View Style
+    if 'style' in request.args:
+        session['view_style'] = request.args.get('style')
+        
+    # Get current style from session or default to grid
+    view_style = session.get('view_style', 'grid')
+
+    # 3. First page only — the rest streams in through /api/recipes/page
+    view_mode, stmt, keys = _recipe_library_query(view_mode, filters)
+    rows, next_cursor = keyset_page(stmt, keys)
+    recipes = _library_recipes(view_mode, rows)
 
     return render_template('recipes_list.html', 
                          recipes=recipes,
+                         next_cursor=next_cursor,
                          current_view=view_mode,
                          view_style=view_style,
-                         cuisine_options=sorted(cuisine_options),
-                         diet_options=sorted(diet_options),
-                         difficulty_options=difficulty_options,
-                         protein_options=sorted(protein_options),
-                         meal_type_options=meal_type_options,
+                         cuisine_options=sorted(filters['cuisine_options']),
+                         diet_options=sorted(filters['diet_options']),
+                         difficulty_options=filters['difficulty_options'],
+                         protein_options=sorted(filters['protein_options']),
+                         meal_type_options=filters['meal_type_options'],
                          # Selected State
-                         selected_cuisines=selected_cuisines,
-                         selected_diets=selected_diets,
-                         selected_meal_types=selected_meal_types,
-                         selected_difficulties=selected_difficulties,
-                         selected_proteins=selected_proteins)
+                         selected_cuisines=filters['selected_cuisines'],
+                         selected_diets=filters['selected_diets'],
+                         selected_meal_types=filters['selected_meal_types'],
+                         selected_difficulties=filters['selected_difficulties'],
+                         selected_proteins=filters['selected_proteins'],
+                         nutrition_filters=NUTRITION_RANGE_FILTERS,
+                         nutrition_ranges=filters['nutrition_ranges'])
+
+
+@app.route('/api/recipes/page')
+def recipes_page_api():
+    """
+    Next page of a /recipes view for "load more" / infinite scroll. Takes the
+    same query params as /recipes plus `cursor`; returns the rendered items
+    for the active layout and the cursor of the page after it (null at the end).
+    """
+    filters = _recipe_library_filters(request.args)
+    view_mode, stmt, keys = _recipe_library_query(request.args.get('view', 'discover'), filters)
+    try:
+        rows, next_cursor = keyset_page(stmt, keys, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    recipes = _library_recipes(view_mode, rows)
+    view_style = session.get('view_style', 'grid')
+    return jsonify({
+        'success': True,
+        'count': len(recipes),
+        'next_cursor': next_cursor,
+        'html': {
+            'standard': render_template('components/recipe_library_page.html', recipes=recipes,
+                                        layout='table' if view_style == 'table' else 'grid'),
+            'immersive': render_template('components/recipe_library_page.html', recipes=recipes,
+                                         layout='immersive') if view_mode == 'discover' else '',
+        },
+    })
 
 @app.route('/admin/recipes-management')
 @login_required
@@ -1216,6 +1228,7 @@ def admin_recipes_management():
     selected_proteins = request.args.getlist('protein')
     selected_difficulties = request.args.getlist('difficulty')
     selected_statuses = request.args.getlist('status')
+    nutrition_ranges = parse_nutrition_ranges(request.args)
 
     # Load Vocabs for filters
     vocab = load_controlled_vocabularies()
@@ -1235,12 +1248,7 @@ def admin_recipes_management():
     )
 
     if search_term:
-        stmt = stmt.where(
-            or_(
-                func.lower(Recipe.title).contains(search_term),
-                func.lower(Recipe.cuisine).contains(search_term)
-            )
-        )
+        stmt = stmt.where(recipe_search_clause(search_term))
 
     # Apply Filters
     if selected_cuisines:
@@ -1255,6 +1263,7 @@ def admin_recipes_management():
         stmt = stmt.where(Recipe.diets.any(RecipeDiet.diet.in_(selected_diets)))
     if selected_meal_types:
         stmt = stmt.where(Recipe.meal_types.any(RecipeMealType.meal_type.in_(selected_meal_types)))
+    stmt = apply_nutrition_ranges(stmt, nutrition_ranges)
 
     # Apply sorting
     valid_cols = {
@@ -1272,7 +1281,11 @@ def admin_recipes_management():
         'total_calories': Recipe.total_calories,
         'total_protein': Recipe.total_protein,
         'total_fat': Recipe.total_fat,
-        'total_carbs': Recipe.total_carbs
+        'total_carbs': Recipe.total_carbs,
+        'calories_per_serving': Recipe.calories_per_serving,
+        'protein_per_serving': Recipe.protein_per_serving,
+        'fat_per_serving': Recipe.fat_per_serving,
+        'carbs_per_serving': Recipe.carbs_per_serving
     }
     sort_attr = valid_cols.get(sort_col, Recipe.id)
     stmt = stmt.order_by(sort_attr.asc() if sort_dir == 'asc' else sort_attr.desc())
@@ -1299,6 +1312,8 @@ def admin_recipes_management():
         selected_proteins=selected_proteins,
         selected_difficulties=selected_difficulties,
         selected_statuses=selected_statuses,
+        nutrition_filters=NUTRITION_RANGE_FILTERS,
+        nutrition_ranges=nutrition_ranges,
         urlencode=lambda args: urlencode(args, doseq=True)
     )
 
@@ -1453,13 +1468,8 @@ def search_ingredients_api():
         if not query or len(query) < 2:
             return jsonify({'success': True, 'results': []})
             
-        # Search for name matches (ILIKE)
-        results = db.session.execute(
-            db.select(Ingredient)
-            .where(Ingredient.name.ilike(f"%{query}%"))
-            .order_by(Ingredient.name)
-            .limit(10)
-        ).scalars().all()
+        # Ranked name / alias matches (search_service)
+        results = search_ingredients(query, limit=10)
         
         # Serialize results
         items = []
@@ -1531,11 +1541,8 @@ def suggest_substitutes_api():
         if not name:
             return jsonify({'success': True, 'suggestions': []})
         
-        # Ensure pantry_map includes DB items (not just pantry.json)
-        from ai_engine import set_pantry_memory
-        slim_context = get_slim_pantry_context()
-        set_pantry_memory(slim_context)
-        
+        # Ensure the pantry snapshot is current (no DB work unless the pantry version moved)
+        get_pantry_snapshot()
         
         # Get fuzzy suggestions (extra to account for filtered imports)
         suggestions = get_top_pantry_suggestions(name, top_n=6)
@@ -1858,6 +1865,9 @@ def add_synonym_api():
             
         from ai_engine import add_synonym
         add_synonym(name, food_id)
+        # Let other workers know their pantry snapshot is stale
+        bump_pantry_version()
+        db.session.commit()
         
         return jsonify({'success': True})
     except Exception as e:
@@ -1961,6 +1971,8 @@ def update_ingredient_data_api():
         ingredient.sub_category = data.get('sub_category')
         ingredient.default_unit = data.get('unit')
         ingredient.average_g_per_unit = data.get('average_g_per_unit')
+        if 'density_g_per_ml' in data:
+            ingredient.density_g_per_ml = data.get('density_g_per_ml')
         
         ingredient.calories_per_100g = data.get('calories_per_100g')
         ingredient.kj_per_100g = data.get('kj_per_100g', 0)
@@ -2008,52 +2020,36 @@ def explore_galaxy():
     from services.concept_visual_service import get_concept_images_dict
     return render_template('explore_galaxy.html', concept_visuals=get_concept_images_dict())
 
-@app.route('/api/graph/galaxy', methods=['GET'])
-def get_global_galaxy_graph():
-    """Returns nodes and links for ALL approved recipes linked to their cuisines & proteins."""
-    recipes = db.session.execute(
-        db.select(Recipe).where(Recipe.status == 'approved')
-    ).scalars().all()
-    
-    nodes_dict = {}
-    links = []
-    
-    for r in recipes:
-        # Add the recipe node itself
-        rec_id = f"recipe_{r.id}"
-        nodes_dict[rec_id] = {
-            'id': rec_id,
-            'name': r.title,
-            'group': 'recipe',
-            'image': get_recipe_image_url(r) if r.image_filename else None,
-            'url': url_for('recipe_detail', recipe_id=r.id)
-        }
-        
-        # Determine attributes
-        c_attr = r.cuisine
-        p_attr = r.protein_type
-        
-        # Link to Cuisine
-        if c_attr:
-            c_id = f"attr_cuisine_{c_attr}"
-            if c_id not in nodes_dict:
-                nodes_dict[c_id] = {
-                    'id': c_id, 'name': c_attr, 'group': 'cuisine',
-                    'image': get_node_image('cuisine', c_attr)
-                }
-            links.append({'source': rec_id, 'target': c_id, 'weight': 1.0})
-            
-        # Link to Protein
-        if p_attr:
-            p_id = f"attr_protein_{p_attr}"
-            if p_id not in nodes_dict:
-                nodes_dict[p_id] = {
-                    'id': p_id, 'name': p_attr, 'group': 'protein',
-                    'image': get_node_image('protein', p_attr)
-                }
-            links.append({'source': rec_id, 'target': p_id, 'weight': 1.0})
+@app.route('/api/graph/galaxy/clusters', methods=['GET'])
+def get_galaxy_clusters():
+    """Zoom level 0 of the recipe galaxy: cuisine / protein clusters at their precomputed positions."""
+    return graph_response(RECIPE_GRAPH_SCOPE, lambda: cluster_graph(get_node_image), variant='clusters')
 
-    return jsonify({'nodes': list(nodes_dict.values()), 'links': links})
+@app.route('/api/graph/galaxy/viewport', methods=['GET'])
+def get_galaxy_viewport():
+    """Recipe nodes inside the visible bounding box (?bbox=x0,y0,x1,y1), for the zoomed-in levels."""
+    try:
+        bbox = parse_bbox(request.args.get('bbox'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = min(max(request.args.get('limit', VIEWPORT_LIMIT, type=int), 1), VIEWPORT_LIMIT)
+    return jsonify(viewport_graph(bbox, get_recipe_image_url,
+                                  lambda recipe_id: url_for('recipe_detail', recipe_id=recipe_id), limit))
+
+@app.route('/api/graph/galaxy/search', methods=['GET'])
+def search_galaxy_recipes():
+    """Approved recipes matching ?q=, with their galaxy positions, so the explorer can fly to them."""
+    q = request.args.get('q', '').strip()
+    if len(q) < 2:
+        return jsonify({'results': []})
+    recipes = search_recipes(q, limit=10, approved_only=True)
+    positions = recipe_positions([r.id for r in recipes])
+    return jsonify({'results': [
+        {'id': f"recipe_{r.id}", 'name': r.title,
+         'image': get_recipe_image_url(r) if r.image_filename else None,
+         'x': positions[r.id][0], 'y': positions[r.id][1]}
+        for r in recipes if r.id in positions
+    ]})
 
 @app.route('/explore/ingredient-galaxy')
 def explore_ingredient_galaxy():
@@ -2064,9 +2060,14 @@ def explore_ingredient_galaxy():
 @app.route('/api/graph/ingredient-galaxy', methods=['GET'])
 def get_global_ingredient_galaxy_graph():
     """Returns nodes and links for ingredients linked to main and sub categories."""
+    # Serialized once per catalog version; see services.graph_cache
+    return graph_response(INGREDIENT_GRAPH_SCOPE, _build_ingredient_galaxy_graph)
+
+def _build_ingredient_galaxy_graph() -> dict:
     ingredients = db.session.execute(
-        db.select(Ingredient).where(Ingredient.status != 'inactive')
-    ).scalars().all()
+        db.select(Ingredient.id, Ingredient.name, Ingredient.image_url, Ingredient.main_category, Ingredient.sub_category)
+        .where(Ingredient.status != 'inactive')
+    ).all()
     
     nodes_dict = {}
     links = []
@@ -2102,7 +2103,7 @@ def get_global_ingredient_galaxy_graph():
         else:
             links.append({'source': ing_id, 'target': m_id, 'weight': 1.0})
 
-    return jsonify({'nodes': list(nodes_dict.values()), 'links': links})
+    return {'nodes': list(nodes_dict.values()), 'links': links}
 
 @app.route('/api/graph/orbital/<int:recipe_id>', methods=['GET'])
 def get_orbital_graph(recipe_id):
@@ -2140,118 +2141,153 @@ def get_orbital_graph(recipe_id):
         })
         links.append({'source': f"attr_protein_{p_attr}", 'target': f"recipe_{target.id}", 'weight': 5.0}) 
 
-    # 3. Discover Siblings (Moons)
-    if c_attr or p_attr:
-        conditions = []
-        if c_attr: conditions.append(Recipe.cuisine == c_attr)
-        if p_attr: conditions.append(Recipe.protein_type == p_attr)
-        
-        query = db.select(Recipe).where(
-            Recipe.id != target.id,
-            Recipe.status == 'approved',
-            or_(*conditions)
-        ).limit(10)
-        
-        siblings = db.session.execute(query).scalars().all()
-        
-        for sib in siblings:
-            nodes.append({
-                'id': f"recipe_{sib.id}",
-                'name': sib.title,
-                'group': 'sibling',
-                'image': get_recipe_image_url(sib) if sib.image_filename else None,
-                'url': url_for('recipe_detail', recipe_id=sib.id)
-            })
-            
-            matches_c = (sib.cuisine == c_attr) and c_attr
-            matches_p = (sib.protein_type == p_attr) and p_attr
-            
-            if matches_c and matches_p:
-                links.append({'source': f"recipe_{sib.id}", 'target': f"attr_cuisine_{c_attr}", 'weight': 2.0})
-                links.append({'source': f"recipe_{sib.id}", 'target': f"attr_protein_{p_attr}", 'weight': 2.0})
-            else:
-                if matches_c:
-                    links.append({'source': f"recipe_{sib.id}", 'target': f"attr_cuisine_{c_attr}", 'weight': 1.0})
-                if matches_p:
-                    links.append({'source': f"recipe_{sib.id}", 'target': f"attr_protein_{p_attr}", 'weight': 1.0})
+    # 3. Discover Siblings (Moons): the most similar recipes by ingredient overlap
+    similar = similar_recipes(target.id)
+    similarity = {s.recipe_id: s.similarity for s in similar}
+    siblings = db.session.execute(
+        db.select(Recipe.id, Recipe.title, Recipe.cuisine, Recipe.protein_type, Recipe.image_filename)
+        .where(Recipe.id.in_(list(similarity)))
+    ).all()
+    siblings.sort(key=lambda sib: -similarity[sib.id])
+
+    for sib in siblings:
+        nodes.append({
+            'id': f"recipe_{sib.id}",
+            'name': sib.title,
+            'group': 'sibling',
+            'image': get_recipe_image_url(sib) if sib.image_filename else None,
+            'url': url_for('recipe_detail', recipe_id=sib.id),
+            'similarity': round(similarity[sib.id], 3)
+        })
+        
+        matches_c = (sib.cuisine == c_attr) and c_attr
+        matches_p = (sib.protein_type == p_attr) and p_attr
+        
+        if matches_c and matches_p:
+            links.append({'source': f"recipe_{sib.id}", 'target': f"attr_cuisine_{c_attr}", 'weight': 2.0})
+            links.append({'source': f"recipe_{sib.id}", 'target': f"attr_protein_{p_attr}", 'weight': 2.0})
+        elif matches_c or matches_p:
+            if matches_c:
+                links.append({'source': f"recipe_{sib.id}", 'target': f"attr_cuisine_{c_attr}", 'weight': 1.0})
+            if matches_p:
+                links.append({'source': f"recipe_{sib.id}", 'target': f"attr_protein_{p_attr}", 'weight': 1.0})
+        else:
+            # Shares ingredients only: orbit the recipe itself
+            links.append({'source': f"recipe_{sib.id}", 'target': f"recipe_{target.id}", 'weight': 1.0})
 
     return jsonify({'nodes': nodes, 'links': links})
 
+@app.route('/api/recipe/<int:recipe_id>/similar', methods=['GET'])
+def get_similar_recipes(recipe_id):
+    """"More like this": approved recipes sharing the most ingredients (plus cuisine / protein)."""
+    if not db.session.get(Recipe, recipe_id):
+        return jsonify({'error': 'Recipe not found'}), 404
+    limit = min(max(request.args.get('limit', SIMILAR_LIMIT, type=int), 1), 50)
+    similar = similar_recipes(recipe_id, limit)
+    similarity = {s.recipe_id: s.similarity for s in similar}
+    cards = load_cards(card_select().where(Recipe.id.in_(list(similarity))))
+    cards.sort(key=lambda card: -similarity[card.id])
+    return jsonify({'recipes': [{
+        'id': card.id,
+        'title': card.title,
+        'cuisine': card.cuisine,
+        'protein_type': card.protein_type,
+        'image_url': get_recipe_image_url(card),
+        'url': url_for('recipe_detail', recipe_id=card.id),
+        'similarity': round(similarity[card.id], 3),
+    } for card in cards]})
+
+def _recipe_admin_payload(recipe_id):
+    """Editor JSON for /api/recipe/<id> (cached per recipe revision)."""
+    recipe = db.session.execute(
+        db.select(Recipe).where(Recipe.id == recipe_id).options(
+            selectinload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient),
+            selectinload(Recipe.instructions),
+            selectinload(Recipe.diets),
+            selectinload(Recipe.meal_types),
+        )
+    ).scalar_one_or_none()
+    if not recipe:
+        return None
+
+    # Construct JSON
+    data = {
+        'id': recipe.id,
+        'title': recipe.title,
+        'cuisine': recipe.cuisine,
+        'diets': recipe.diets_list,
+        'difficulty': recipe.difficulty,
+        'protein_type': recipe.protein_type,
+        'meal_types': recipe.meal_types_list,
+        'chef_id': recipe.chef_id or 'gourmet',
+        'taste_level': recipe.taste_level,
+        'prep_time_mins': recipe.prep_time_mins,
+        'cleanup_factor': recipe.cleanup_factor,
+        'image_filename': recipe.image_filename,
+        'nutrition': {
+            'calories': recipe.total_calories,
+            'protein': recipe.total_protein,
+            'carbs': recipe.total_carbs,
+            'fat': recipe.total_fat,
+            'sugar': recipe.total_sugar,
+            'fiber': recipe.total_fiber
+        },
+        'ingredients': [],
+        'instructions': []
+    }
+
+    # Serialize Ingredients
+    for ri in recipe.ingredients:
+        data['ingredients'].append({
+            'id': ri.id,
+            'name': ri.ingredient.name,
+            'prep_style': ri.prep_style,
+            'amount': ri.amount,
+            'unit': ri.unit,
+            'gram_weight': ri.gram_weight,
+            'component': ri.component,
+            'food_id': ri.ingredient.food_id,
+            'category': ri.ingredient.main_category
+        })
+
+    # Serialize Instructions
+    sorted_instructions = sorted(recipe.instructions, key=lambda x: x.step_number)
+    for step in sorted_instructions:
+        data['instructions'].append({
+            'step': step.step_number,
+            'phase': step.phase,
+            'text': step.text,
+            'component': step.component
+        })
+
+    return {'success': True, 'recipe': data}
+
 @app.route('/api/recipe/<int:recipe_id>', methods=['GET'])
 @login_required
 def get_recipe_json(recipe_id):
     if not current_user.is_admin:
         return jsonify({'success': False, 'error': 'Unauthorized'}), 403
-    
-    recipe = db.session.get(Recipe, recipe_id)
-    if not recipe:
-        return jsonify({'success': False, 'error': 'Recipe not found'}), 404
-        
+
     try:
-        # Construct JSON
-        data = {
-            'id': recipe.id,
-            'title': recipe.title,
-            'cuisine': recipe.cuisine,
-            'diets': recipe.diets_list,
-            'difficulty': recipe.difficulty,
-            'protein_type': recipe.protein_type,
-            'meal_types': recipe.meal_types_list,
-            'chef_id': recipe.chef_id or 'gourmet',
-            'taste_level': recipe.taste_level,
-            'prep_time_mins': recipe.prep_time_mins,
-            'cleanup_factor': recipe.cleanup_factor,
-            'image_filename': recipe.image_filename,
-            'nutrition': {
-                'calories': recipe.total_calories,
-                'protein': recipe.total_protein,
-                'carbs': recipe.total_carbs,
-                'fat': recipe.total_fat,
-                'sugar': recipe.total_sugar,
-                'fiber': recipe.total_fiber
-            },
-            'ingredients': [],
-            'instructions': []
-        }
-        
-        # Serialize Ingredients
-        for ri in recipe.ingredients:
-            data['ingredients'].append({
-                'id': ri.id,
-                'name': ri.ingredient.name,
-                'prep_style': ri.prep_style,
-                'amount': ri.amount,
-                'unit': ri.unit,
-                'gram_weight': ri.gram_weight,
-                'component': ri.component,
-                'food_id': ri.ingredient.food_id,
-                'category': ri.ingredient.main_category
-            })
-            
-        # Serialize Instructions
-        sorted_instructions = sorted(recipe.instructions, key=lambda x: x.step_number)
-        for step in sorted_instructions:
-            data['instructions'].append({
-                'step': step.step_number,
-                'phase': step.phase,
-                'text': step.text,
-                'component': step.component
-            })
-            
-        return jsonify({'success': True, 'recipe': data})
-        
+        response = recipe_json_response(recipe_id, 'admin', _recipe_admin_payload)
     except Exception as e:
         print(f"Error serializing recipe {recipe_id}: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/sub-recipe/<int:recipe_id>', methods=['GET'])
-def get_sub_recipe(recipe_id):
-    """Public read-only endpoint for the sub-recipe modal viewer.
-    Returns only approved recipes (or any recipe whose id is referenced as
-    a sub_recipe_id — admin may link draft sub-recipes intentionally)."""
-    recipe = db.session.get(Recipe, recipe_id)
+    if response is None:
+        return jsonify({'success': False, 'error': 'Recipe not found'}), 404
+    return response
+
+def _sub_recipe_payload(recipe_id):
+    """Read-only JSON for the sub-recipe modal (cached per recipe revision)."""
+    recipe = db.session.execute(
+        db.select(Recipe).where(Recipe.id == recipe_id).options(
+            selectinload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient),
+            selectinload(Recipe.instructions),
+        )
+    ).scalar_one_or_none()
     if not recipe:
-        return jsonify({'success': False, 'error': 'Sub-recipe not found'}), 404
+        return None
 
     # Build image URL helper (reuse existing context function)
     image_url = get_recipe_image_url(recipe) if recipe.image_filename else None
@@ -2283,7 +2319,7 @@ def get_sub_recipe(recipe_id):
             'text': step.text,
         })
 
-    return jsonify({
+    return {
         'success': True,
         'recipe': {
             'id': recipe.id,
@@ -2295,7 +2331,17 @@ def get_sub_recipe(recipe_id):
             'ingredients_by_component': components,
             'steps_by_component': steps_by_comp,
         }
-    })
+    }
+
+@app.route('/api/sub-recipe/<int:recipe_id>', methods=['GET'])
+def get_sub_recipe(recipe_id):
+    """Public read-only endpoint for the sub-recipe modal viewer.
+    Returns only approved recipes (or any recipe whose id is referenced as
+    a sub_recipe_id — admin may link draft sub-recipes intentionally)."""
+    response = recipe_json_response(recipe_id, 'sub_recipe', _sub_recipe_payload)
+    if response is None:
+        return jsonify({'success': False, 'error': 'Sub-recipe not found'}), 404
+    return response
 
 @app.route('/api/search-recipes', methods=['GET'])
 @login_required
@@ -2306,12 +2352,7 @@ def search_recipes_api():
     q = request.args.get('q', '').strip()
     if len(q) < 2:
         return jsonify({'results': []})
-    results = db.session.execute(
-        db.select(Recipe.id, Recipe.title, Recipe.cuisine, Recipe.status)
-        .where(Recipe.title.ilike(f'%{q}%'))
-        .order_by(Recipe.title.asc())
-        .limit(10)
-    ).all()
+    results = search_recipes(q, limit=10)
     return jsonify({
         'results': [
             {'id': r.id, 'title': r.title, 'cuisine': r.cuisine or '', 'status': r.status}
@@ -2329,13 +2370,7 @@ def search_ingredients_admin_api():
     q = request.args.get('q', '').strip()
     if len(q) < 2:
         return jsonify({'results': []})
-    results = db.session.execute(
-        db.select(Ingredient)
-        .where(Ingredient.name.ilike(f'%{q}%'))
-        .where(Ingredient.status != 'inactive')
-        .order_by(Ingredient.name.asc())
-        .limit(10)
-    ).scalars().all()
+    results = search_ingredients(q, limit=10, exclude_inactive=True)
     return jsonify({
         'results': [
             {
@@ -2442,6 +2477,32 @@ def merge_ingredients_api():
         print(f"Merge API Error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+
+@app.route('/api/merge-ingredients/batch', methods=['POST'])
+@login_required
+@admin_required
+def merge_ingredients_batch_api():
+    """Applies a list of {source_id (loser), target_id (winner)} merges in one transaction."""
+    from services.ingredient_service import merge_ingredients_batch
+    try:
+        data = request.get_json()
+        pairs = data.get('pairs') or []
+
+        if not pairs or any(not p.get('source_id') or not p.get('target_id') for p in pairs):
+            return jsonify({'success': False, 'error': 'Each pair needs Source and Target IDs'}), 400
+
+        result = merge_ingredients_batch([(int(p['target_id']), int(p['source_id'])) for p in pairs])
+
+        if result['success']:
+            return jsonify({'success': True, 'message': result['message'], 'merged': result['merged']})
+        else:
+            return jsonify({'success': False, 'error': result['message']}), 400
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Batch Merge API Error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 def find_best_ingredient_match(name):
     """
     Tries to find the best existing ingredient for a given name.
@@ -2712,97 +2773,11 @@ def generate():
 
 @app.route('/recipe/<int:recipe_id>')
 def recipe_detail(recipe_id):
-    recipe = db.session.get(Recipe, recipe_id)
-    if not recipe:
+    view = load_recipe_view(recipe_id)
+    if not view:
         flash("Recipe not found.", "error")
         return redirect(url_for('discover'))
-    
-    # Group instructions by phase for display
-    instructions = Instruction.query.filter_by(recipe_id=recipe_id).order_by(Instruction.component, Instruction.phase, Instruction.step_number).all()
-    
-    steps_by_phase = {
-        'Prep': [i for i in instructions if i.phase == 'Prep'],
-        'Cook': [i for i in instructions if i.phase == 'Cook'],
-        'Serve': [i for i in instructions if i.phase == 'Serve']
-    }
-    
-    # NEW: Group instructions by component for multi-component display
-    from itertools import groupby
-    steps_by_component = []
-    for component_name, steps in groupby(instructions, key=lambda x: x.component):
-        steps_by_component.append((component_name, list(steps)))
-    
-    # Group ingredients by component
-    ingredients_by_component = {}
-    for recipe_ing in recipe.ingredients:
-        comp = recipe_ing.component
-        if comp not in ingredients_by_component:
-            ingredients_by_component[comp] = []
-        ingredients_by_component[comp].append(recipe_ing)
-    
-    # DEFENSIVE: Reconcile mismatched component names
-    # If ingredient components don't match instruction components,
-    # ingredients become invisible in the template. Fix by redistributing.
-    instruction_comp_names = {name for name, _ in steps_by_component}
-    ingredient_comp_names = set(ingredients_by_component.keys())
-    orphaned_comps = ingredient_comp_names - instruction_comp_names
-    
-    if orphaned_comps:
-        print(f"⚠️  Component name mismatch for recipe {recipe_id}:")
-        print(f"   Instruction components: {instruction_comp_names}")
-        print(f"   Ingredient components:  {ingredient_comp_names}")
-        print(f"   Orphaned:               {orphaned_comps}")
-        
-        # Collect all orphaned ingredients
-        orphaned_ingredients = []
-        for comp in orphaned_comps:
-            orphaned_ingredients.extend(ingredients_by_component.pop(comp))
-        
-        if len(steps_by_component) == 1:
-            comp_names = [name for name, _ in steps_by_component]
-            ingredients_by_component[comp_names[0]] = orphaned_ingredients
-        elif len(steps_by_component) > 1:
-            comp_names = [name for name, _ in steps_by_component]
-            per_comp = max(1, len(orphaned_ingredients) // len(comp_names))
-            for idx, comp_name in enumerate(comp_names):
-                start = idx * per_comp
-                end = start + per_comp if idx < len(comp_names) - 1 else len(orphaned_ingredients)
-                ingredients_by_component[comp_name] = orphaned_ingredients[start:end]
-        else:
-            # Some matched, some didn't — attach orphans to "Other Ingredients"
-            ingredients_by_component["Other Ingredients"] = orphaned_ingredients
-            # Also add a pseudo-component for display if not already in steps
-            if not any(name == "Other Ingredients" for name, _ in steps_by_component):
-                steps_by_component.append(("Other Ingredients", []))
-    # NEW: Chronological Sequence (Parallel Dashboard)
-    has_chronological_data = False
-    chrono_steps = []
-    component_meta = {}
-    
-    if len(instructions) > 0:
-        has_chronological_data = all(i.global_order_index is not None for i in instructions)
-        if has_chronological_data:
-            chrono_steps = sorted(instructions, key=lambda x: x.global_order_index)
-            
-            # Phase 1: Backend metadata for sandbox Views
-            unique_components = []
-            for step in chrono_steps:
-                if step.component not in unique_components:
-                    unique_components.append(step.component)
-                    
-            themes = [
-                {'color': 'bg-blue-50 text-blue-800', 'border': 'border-blue-200', 'indent': 'ml-0 md:ml-0'},
-                {'color': 'bg-rose-50 text-rose-800', 'border': 'border-rose-200', 'indent': 'ml-4 md:ml-12'},
-                {'color': 'bg-emerald-50 text-emerald-800', 'border': 'border-emerald-200', 'indent': 'ml-8 md:ml-24'},
-                {'color': 'bg-amber-50 text-amber-800', 'border': 'border-amber-200', 'indent': 'ml-12 md:ml-36'},
-                {'color': 'bg-purple-50 text-purple-800', 'border': 'border-purple-200', 'indent': 'ml-16 md:ml-48'},
-            ]
-            
-            for index, comp in enumerate(unique_components):
-                if index < len(themes):
-                    component_meta[comp] = themes[index]
-                else:
-                    component_meta[comp] = themes[-1]
+    recipe = view.recipe
 
     # ------------------------------------------------------------------ #
     # SMART SUBSTITUTION ENGINE                                            #
@@ -2812,22 +2787,13 @@ def recipe_detail(recipe_id):
     # ------------------------------------------------------------------ #
     substitutes: dict[int, dict] = {}  # keyed by RecipeIngredient.id
 
+    alternatives = substitute_alternatives([ri.ingredient for ri in recipe.ingredients])
     for ri in recipe.ingredients:
         ing = ri.ingredient
         if not ing or not ing.sub_category:
             continue
 
-        alts = db.session.execute(
-            db.select(Ingredient)
-            .where(
-                Ingredient.sub_category == ing.sub_category,
-                Ingredient.id != ing.id,
-                Ingredient.status == 'active',
-            )
-            .order_by(Ingredient.is_staple.desc(), Ingredient.name.asc())
-            .limit(3)
-        ).scalars().all()
-
+        alts = alternatives.get(ing.id)
         if not alts:
             continue
 
@@ -2870,12 +2836,12 @@ def recipe_detail(recipe_id):
 
     return render_template('recipe.html',
                             recipe=recipe,
-                            steps_by_phase=steps_by_phase,
-                            ingredients_by_component=ingredients_by_component,
-                            steps_by_component=steps_by_component,
-                            has_chronological_data=has_chronological_data,
-                            chrono_steps=chrono_steps,
-                            component_meta=component_meta,
+                            steps_by_phase=view.steps_by_phase,
+                            ingredients_by_component=view.ingredients_by_component,
+                            steps_by_component=view.steps_by_component,
+                            has_chronological_data=view.has_chronological_data,
+                            chrono_steps=view.chrono_steps,
+                            component_meta=view.component_meta,
                             substitutes=substitutes,
                             user_interaction=user_interaction,
                             linked_ingredient=linked_ingredient)
@@ -2900,17 +2866,15 @@ def swap_recipe_image(recipe_id):
 @app.route('/recipe/<int:recipe_id>/kitchen')
 def recipe_kitchen_mode(recipe_id):
     """A highly isolated, 1-screen landscape view for cooking on tablets."""
-    query = db.select(Recipe).where(Recipe.id == recipe_id).options(
-        joinedload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient),
-        joinedload(Recipe.instructions)
-    )
-    recipe = db.session.execute(query).unique().scalar_one_or_none()
+    view = load_recipe_view(recipe_id)
 
-    if not recipe:
+    if not view:
         flash("Recipe not found.", "error")
         return redirect(url_for('index'))
 
-    return render_template('kitchen_mode.html', recipe=recipe)
+    # Chronological order when every step has one, component order otherwise
+    return render_template('kitchen_mode.html', recipe=view.recipe,
+                           steps=view.chrono_steps or view.steps)
 
 @app.route('/api/recipe/<int:recipe_id>/generate-components', methods=['POST'])
 @login_required
@@ -3352,11 +3316,21 @@ def delete_bulk_recipes():
         db.session.execute(sql_delete(RecipeEvaluation).where(RecipeEvaluation.recipe_id.in_(recipe_ids)))
         db.session.execute(sql_delete(RecipeMealType).where(RecipeMealType.recipe_id.in_(recipe_ids)))
         db.session.execute(sql_delete(RecipeDiet).where(RecipeDiet.recipe_id.in_(recipe_ids)))
+        queue_collection_refresh(db.session.execute(
+            db.select(CollectionItem.collection_id).where(CollectionItem.recipe_id.in_(recipe_ids))
+        ).scalars().all())
         db.session.execute(sql_delete(CollectionItem).where(CollectionItem.recipe_id.in_(recipe_ids)))
+        db.session.execute(sql_delete(RecipeProtein).where(RecipeProtein.recipe_id.in_(recipe_ids)))
+        db.session.execute(sql_delete(RecipeGraphPosition).where(RecipeGraphPosition.recipe_id.in_(recipe_ids)))
+        db.session.execute(sql_delete(RecipeLshBand).where(RecipeLshBand.recipe_id.in_(recipe_ids)))
+        db.session.execute(sql_delete(RecipeSignature).where(RecipeSignature.recipe_id.in_(recipe_ids)))
 
         # Delete parent recipes last
         result = db.session.execute(sql_delete(Recipe).where(Recipe.id.in_(recipe_ids)))
         deleted_count = result.rowcount
+        # Bulk deletes skip the ORM flush listeners
+        bump_graph_version(RECIPE_GRAPH_SCOPE)
+        bump_feed_version()
         db.session.commit()
 
         print(f"[Bulk Delete] Deleted {deleted_count} recipes: {recipe_ids}")
@@ -3396,41 +3370,20 @@ def cms_upload_image():
 
 @app.route('/collections')
 def collections_index():
-    """Public index of all published collections, with their approved recipes pre-loaded."""
-    raw = (
-        db.session.execute(
-            db.select(RecipeCollection)
-            .where(RecipeCollection.is_published.is_(True))
-            .order_by(RecipeCollection.created_at.desc())
-        )
-        .scalars()
-        .all()
-    )
-    # Build (collection, [recipe, ...]) pairs — filter approved at route level
-    rows = [
-        (col, [item.recipe for item in col.items if item.recipe.status == 'approved'])
-        for col in raw
-    ]
+    """Public index of all published collections, with their approved recipe cards (one query)."""
+    rows = published_collections()
     return render_template('collections_index.html', rows=rows)
 
 
 @app.route('/collections/<slug>')
 def collection_detail(slug: str):
     """Public detail page for a single published collection."""
-    collection = db.session.execute(
-        db.select(RecipeCollection).where(RecipeCollection.slug == slug)
-    ).scalar_one_or_none()
-
-    if not collection or not collection.is_published:
+    # Published collections and approved recipes only (one query)
+    rows = published_collections(RecipeCollection.slug == slug)
+    if not rows:
         abort(404)
 
-    # Filter only approved recipes at the route level (belt-and-suspenders)
-    recipes = [
-        item.recipe
-        for item in collection.items
-        if item.recipe.status == 'approved'
-    ]
-
+    collection, recipes = rows[0]
     return render_template('collection_detail.html', collection=collection, recipes=recipes)
 
 
@@ -3641,13 +3594,13 @@ def get_mirror_recipes(partner_id):
     ).scalar_subquery()
 
     # Intersection: recipes favorited by both
-    shared_recipes = db.session.execute(
-        db.select(Recipe).where(
+    shared_recipes = load_cards(
+        card_select().where(
             Recipe.id.in_(my_favs),
             Recipe.id.in_(partner_favs),
             Recipe.status == 'approved'
         )
-    ).scalars().all()
+    )
 
     partner_user = db.session.get(User, partner_id)
     partner_name = partner_user.email.split('@')[0] if partner_user else 'Partner'
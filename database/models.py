@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Boolean, Text, Float, ForeignKey, DateTime, JSON, Index, UniqueConstraint
+from sqlalchemy import String, Integer, BigInteger, Boolean, Text, Float, ForeignKey, DateTime, JSON, LargeBinary, Index, UniqueConstraint, func
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 import datetime
@@ -146,6 +146,7 @@ class Ingredient(db.Model):
     # Physics (Smart Units)
     default_unit: Mapped[str] = mapped_column(String, default='g')
     average_g_per_unit: Mapped[float] = mapped_column(Float, nullable=True) # The weight of 1 unit in grams.
+    density_g_per_ml: Mapped[Optional[float]] = mapped_column(Float, nullable=True) # Volume units (cup, tbsp, ml); water (1.0) if unset
 
     # Intelligence
     aliases: Mapped[str] = mapped_column(Text, default='[]') # JSON list of synonyms
@@ -221,6 +222,31 @@ class IngredientEvaluation(db.Model):
     ingredient: Mapped["Ingredient"] = relationship(back_populates="evaluation")
 
 
+class IngredientMergeSuggestion(db.Model):
+    """Likely duplicate pair (loser → winner) for the admin merge tool.
+
+    Maintained incrementally by services/merge_suggestions.py instead of
+    being recomputed on every request.
+    """
+    __tablename__ = 'ingredient_merge_suggestion'
+    __table_args__ = (UniqueConstraint('winner_id', 'loser_id', name='uq_merge_suggestion_pair'),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    winner_id: Mapped[int] = mapped_column(ForeignKey("ingredient.id", ondelete="CASCADE"), index=True, nullable=False)
+    loser_id: Mapped[int] = mapped_column(ForeignKey("ingredient.id", ondelete="CASCADE"), index=True, nullable=False)
+    score: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    reason: Mapped[str] = mapped_column(String(100), nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=datetime.datetime.utcnow)
+
+
+class IngredientMergeQueue(db.Model):
+    """Ingredients added/renamed/reactivated since merge suggestions were last refreshed."""
+    __tablename__ = 'ingredient_merge_queue'
+
+    ingredient_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    queued_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=datetime.datetime.utcnow)
+
+
 
 class Chef(db.Model):
     __tablename__ = 'chef'
@@ -255,6 +281,67 @@ class RecipeDiet(db.Model):
     recipe_id: Mapped[int] = mapped_column(ForeignKey("recipe.id"), primary_key=True)
     diet: Mapped[str] = mapped_column(String, primary_key=True)
 
+
+class RecipeProtein(db.Model):
+    """Derived link between Recipe and the main_protein.json protein examples.
+
+    Maintained by services.recipe_protein_service whenever a recipe's
+    ingredients change, so the library's protein filter is an indexed
+    IN-join instead of an ILIKE scan over the ingredient names.
+    """
+    __tablename__ = 'recipe_protein'
+    recipe_id: Mapped[int] = mapped_column(ForeignKey("recipe.id"), primary_key=True)
+    protein: Mapped[str] = mapped_column(String, primary_key=True, index=True)
+
+
+class GraphAnchor(db.Model):
+    """Galaxy layout position of a cuisine / protein cluster.
+
+    Laid out by services.galaxy_layout (networkx spring layout of the
+    cuisine-protein co-occurrence graph); recipes are placed around them.
+    """
+    __tablename__ = 'graph_anchor'
+    kind: Mapped[str] = mapped_column(String(20), primary_key=True)  # 'cuisine' | 'protein'
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    x: Mapped[float] = mapped_column(Float, nullable=False)
+    y: Mapped[float] = mapped_column(Float, nullable=False)
+
+
+class RecipeGraphPosition(db.Model):
+    """Precomputed galaxy position of an approved recipe.
+
+    `slot` is the recipe's index on its cluster's sunflower spiral (low slots
+    sit at the cluster centre). Maintained by services.galaxy_layout; the
+    (x, y) index serves the viewport bounding-box queries.
+    """
+    __tablename__ = 'recipe_graph_position'
+    __table_args__ = (
+        Index('ix_recipe_graph_position_xy', 'x', 'y'),
+    )
+    recipe_id: Mapped[int] = mapped_column(ForeignKey("recipe.id"), primary_key=True)
+    x: Mapped[float] = mapped_column(Float, nullable=False)
+    y: Mapped[float] = mapped_column(Float, nullable=False)
+    slot: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class RecipeSignature(db.Model):
+    """MinHash signature of a recipe's ingredient ids + cuisine / protein.
+
+    Maintained by services.similarity_index; `signature` holds NUM_PERM
+    little-endian uint32 values.
+    """
+    __tablename__ = 'recipe_signature'
+    recipe_id: Mapped[int] = mapped_column(ForeignKey("recipe.id"), primary_key=True)
+    signature: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
+class RecipeLshBand(db.Model):
+    """LSH band bucket of a recipe's signature; recipes sharing a (band, bucket) are similarity candidates."""
+    __tablename__ = 'recipe_lsh_band'
+    band: Mapped[int] = mapped_column(Integer, primary_key=True)
+    bucket: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    recipe_id: Mapped[int] = mapped_column(ForeignKey("recipe.id"), primary_key=True, index=True)
+
 class Recipe(db.Model):
     __tablename__ = 'recipe'
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -293,10 +380,23 @@ class Recipe(db.Model):
     total_sodium_mg: Mapped[float] = mapped_column(Float, nullable=True)
     total_calcium_mg: Mapped[float] = mapped_column(Float, nullable=True)
     total_potassium_mg: Mapped[float] = mapped_column(Float, nullable=True)
+
+    # Per-serving macros (total / base_servings), kept in sync with the totals
+    # so /recipes range filters run as indexed SQL predicates
+    calories_per_serving: Mapped[Optional[float]] = mapped_column(Float, nullable=True, index=True)
+    protein_per_serving: Mapped[Optional[float]] = mapped_column(Float, nullable=True, index=True)
+    carbs_per_serving: Mapped[Optional[float]] = mapped_column(Float, nullable=True, index=True)
+    fat_per_serving: Mapped[Optional[float]] = mapped_column(Float, nullable=True, index=True)
     
     # Nested mapping of component names to image URLs/filenames
     component_images: Mapped[dict] = mapped_column(JSON, default=dict, server_default='{}')
 
+    # Bumped on every write to the recipe or its child rows (services.recipe_json_cache)
+    revision: Mapped[int] = mapped_column(Integer, default=0, server_default='0', nullable=False)
+
+    # Display grouping of ingredient lines and steps, stored at write time (services.recipe_view)
+    component_layout: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+
     # AI-generated hook texts (e.g. native_social, cinematic_result)
     social_hooks: Mapped[dict] = mapped_column(JSON, default=dict, server_default='{}')
 
@@ -312,6 +412,10 @@ class Recipe(db.Model):
     chef: Mapped["Chef"] = relationship(back_populates="recipes")
     meal_types: Mapped[list["RecipeMealType"]] = relationship(cascade="all, delete-orphan")
     diets: Mapped[list["RecipeDiet"]] = relationship(cascade="all, delete-orphan")
+    proteins: Mapped[list["RecipeProtein"]] = relationship(cascade="all, delete-orphan")
+    graph_position: Mapped[Optional["RecipeGraphPosition"]] = relationship(uselist=False, cascade="all, delete-orphan")
+    signature: Mapped[Optional["RecipeSignature"]] = relationship(uselist=False, cascade="all, delete-orphan")
+    lsh_bands: Mapped[list["RecipeLshBand"]] = relationship(cascade="all, delete-orphan")
     evaluation: Mapped["RecipeEvaluation"] = relationship(back_populates="recipe", uselist=False, cascade="all, delete-orphan")
 
     @property
@@ -332,6 +436,13 @@ class Recipe(db.Model):
     queue_items: Mapped[list["UserQueue"]] = relationship(back_populates="recipe", cascade="all, delete-orphan")
     social_posts: Mapped[list["SocialMediaPost"]] = relationship(back_populates="recipe", cascade="all, delete-orphan")
 
+
+# Prefix autocomplete (services.search_service): range scans on the lowercased names
+Index('ix_ingredient_name_lower', func.lower(Ingredient.name).label('name_lower'),
+      postgresql_ops={'name_lower': 'text_pattern_ops'})
+Index('ix_recipe_title_lower', func.lower(Recipe.title).label('title_lower'),
+      postgresql_ops={'title_lower': 'text_pattern_ops'})
+
 class Instruction(db.Model):
     __tablename__ = 'instruction'
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -416,6 +527,11 @@ class RecipeCollection(db.Model):
     is_published: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=datetime.datetime.utcnow)
 
+    # Precomputed at commit by services.collection_service: approved recipes, and the
+    # image of the earliest-added approved recipe that has one
+    recipe_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0', nullable=False)
+    cover_image_filename: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
     items: Mapped[list["CollectionItem"]] = relationship(
         back_populates="collection",
         cascade="all, delete-orphan",
@@ -544,3 +660,19 @@ class TikTokSource(db.Model):
     status: Mapped[str] = mapped_column(String(50), default='SUGGESTED', server_default='SUGGESTED', nullable=False) # 'SUGGESTED', 'IGNORED', 'IMPORTED'
     raw_caption: Mapped[Optional[str]] = mapped_column(Text, nullable=True) # The raw scraped text
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=datetime.datetime.utcnow)
+
+# ---------------------------------------------------------------------------
+# Cache Versioning
+# ---------------------------------------------------------------------------
+
+class CacheVersion(db.Model):
+    """Monotonic version counter per cached data set (e.g. 'pantry').
+
+    Bumped in the same transaction as the write that invalidates the data,
+    so every worker can cheaply detect that its in-process copy is stale.
+    """
+    __tablename__ = 'cache_version'
+
+    scope: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=datetime.datetime.utcnow)
@@ -661,7 +661,6 @@ def _build_galaxy_data(recipe, session, storage_provider=None) -> dict:
     Mirrors the /api/graph/orbital/<recipe_id> endpoint logic.
     """
     from database.models import Recipe
-    from sqlalchemy import or_
 
     from services.storage_service import GoogleCloudStorageProvider
     is_gcs = isinstance(storage_provider, GoogleCloudStorageProvider)
@@ -690,36 +689,32 @@ def _build_galaxy_data(recipe, session, storage_provider=None) -> dict:
         nodes.append({"id": f"attr_protein_{p_attr}", "name": p_attr, "group": "protein"})
         links.append({"source": f"attr_protein_{p_attr}", "target": f"recipe_{recipe.id}", "weight": 5.0})
 
-    if c_attr or p_attr:
-        from database.models import db
-        conditions = []
-        if c_attr:
-            conditions.append(Recipe.cuisine == c_attr)
-        if p_attr:
-            conditions.append(Recipe.protein_type == p_attr)
-
-        siblings = db.session.execute(
-            db.select(Recipe).where(
-                Recipe.id != recipe.id,
-                Recipe.status == "approved",
-                or_(*conditions),
-            ).limit(10)
-        ).scalars().all()
-
-        for sib in siblings:
-            nodes.append({
-                "id": f"recipe_{sib.id}",
-                "name": sib.title,
-                "group": "sibling",
-                "image": _recipe_image(sib),
-            })
-            matches_c = (sib.cuisine == c_attr) and c_attr
-            matches_p = (sib.protein_type == p_attr) and p_attr
+    # Siblings: the most similar recipes by ingredient overlap
+    from database.models import db
+    from services.similarity_index import similar_recipes
+
+    similarity = {s.recipe_id: s.similarity for s in similar_recipes(recipe.id)}
+    siblings = db.session.execute(
+        db.select(Recipe).where(Recipe.id.in_(list(similarity)))
+    ).scalars().all()
+    siblings.sort(key=lambda sib: -similarity[sib.id])
+
+    for sib in siblings:
+        nodes.append({
+            "id": f"recipe_{sib.id}",
+            "name": sib.title,
+            "group": "sibling",
+            "image": _recipe_image(sib),
+        })
+        matches_c = (sib.cuisine == c_attr) and c_attr
+        matches_p = (sib.protein_type == p_attr) and p_attr
 
-            if matches_c:
-                links.append({"source": f"recipe_{sib.id}", "target": f"attr_cuisine_{c_attr}", "weight": 2.0})
-            if matches_p:
-                links.append({"source": f"recipe_{sib.id}", "target": f"attr_protein_{p_attr}", "weight": 2.0})
+        if matches_c:
+            links.append({"source": f"recipe_{sib.id}", "target": f"attr_cuisine_{c_attr}", "weight": 2.0})
+        if matches_p:
+            links.append({"source": f"recipe_{sib.id}", "target": f"attr_protein_{p_attr}", "weight": 2.0})
+        if not (matches_c or matches_p):
+            links.append({"source": f"recipe_{sib.id}", "target": f"recipe_{recipe.id}", "weight": 1.0})
 
     return {"nodes": nodes, "links": links}
 
@@ -735,6 +730,70 @@ def is_valid_fragment(name: str) -> bool:
     return name in VALID_FRAGMENTS
 
 
+def _sandbox_recipe_payload(recipe_id: int) -> Optional[dict]:
+    """The recipe-derived, JSON-serializable part of every sandbox context (cached per recipe revision)."""
+    from sqlalchemy.orm import joinedload, selectinload
+    from database.models import Recipe, RecipeIngredient, db
+
+    recipe = db.session.execute(
+        db.select(Recipe).where(Recipe.id == recipe_id).options(
+            joinedload(Recipe.chef),
+            selectinload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient),
+            selectinload(Recipe.instructions),
+            selectinload(Recipe.diets),
+            selectinload(Recipe.meal_types),
+        )
+    ).scalar_one_or_none()
+    if not recipe:
+        return None
+
+    return {
+        "base": {
+            "title": recipe.title,
+            "cuisine": recipe.cuisine,
+            "difficulty": recipe.difficulty,
+            "prep_time_mins": recipe.prep_time_mins,
+            "base_servings": recipe.base_servings or 4,
+            "diets": recipe.diets_list,
+            "meal_types": recipe.meal_types_list,
+            "chef_name": recipe.chef.name if recipe.chef else "The French Classic",
+        },
+        "image_filename": recipe.image_filename,
+        "protein_type": recipe.protein_type,
+        "social_hooks": recipe.social_hooks or {},
+        "ingredient_groups": _build_ingredient_groups(recipe),
+        "step_groups": _build_step_groups(recipe),
+        "nutrition": _build_nutrition_context(recipe),
+    }
+
+
+def recipe_meta_payload(recipe_id: int) -> Optional[dict]:
+    """Step fragments (one per component page) of a recipe, for the sandbox GUI (cached per recipe revision)."""
+    from sqlalchemy.orm import selectinload
+    from database.models import Recipe, db
+
+    recipe = db.session.execute(
+        db.select(Recipe).where(Recipe.id == recipe_id).options(selectinload(Recipe.instructions))
+    ).scalar_one_or_none()
+    if not recipe:
+        return None
+
+    step_groups = _build_step_groups(recipe)
+    dynamic_steps = []
+
+    for comp_idx, group in enumerate(step_groups, start=1):
+        pages = _paginate_steps_dynamically([group])
+        for p_idx, page_groups in enumerate(pages, start=1):
+            dynamic_steps.append({
+                "fragment_name": f"step{comp_idx}",
+                "page": p_idx,
+                "total_pages": len(pages),
+                "component_name": group["component"]
+            })
+
+    return {"steps": dynamic_steps}
+
+
 def build_sandbox_context(recipe_id: int, fragment_name: str, app, storage_provider, theme_name="modern", debug=False, scale=1.0, page=1):
     """
     Builds the Jinja context needed to render a specific fragment in the browser sandbox.
@@ -751,28 +810,24 @@ def build_sandbox_context(recipe_id: int, fragment_name: str, app, storage_provi
             return {"theme": theme, "debug": debug, "scale": scale}
 
     with app.app_context():
-        recipe = db.session.get(Recipe, recipe_id)
-        if not recipe:
+        from services.recipe_json_cache import cached_recipe_data
+
+        # Everything serializable comes from the per-revision cache; only chef / nutr / galaxy load the rows
+        data = cached_recipe_data(recipe_id, "sandbox", _sandbox_recipe_payload)
+        if not data:
             raise ValueError(f"Recipe {recipe_id} not found")
 
         from services.storage_service import GoogleCloudStorageProvider
         is_gcs = isinstance(storage_provider, GoogleCloudStorageProvider)
         image_url = None
-        if recipe.image_filename and is_gcs:
-            image_url = f"https://storage.googleapis.com/{storage_provider.bucket_name}/recipes/{recipe.image_filename}"
+        if data["image_filename"] and is_gcs:
+            image_url = f"https://storage.googleapis.com/{storage_provider.bucket_name}/recipes/{data['image_filename']}"
 
         theme = get_theme(theme_name)
 
         base_ctx = {
-            "title": recipe.title,
-            "cuisine": recipe.cuisine,
-            "difficulty": recipe.difficulty,
-            "prep_time_mins": recipe.prep_time_mins,
-            "base_servings": recipe.base_servings or 4,
+            **data["base"],
             "image_url": image_url,
-            "diets": recipe.diets_list,
-            "meal_types": recipe.meal_types_list,
-            "chef_name": recipe.chef.name if recipe.chef else "The French Classic",
             "theme": theme,
             "debug": debug,
             "scale": scale,
@@ -786,7 +841,7 @@ def build_sandbox_context(recipe_id: int, fragment_name: str, app, storage_provi
             import os
             import flask
             
-            chef_obj = recipe.chef
+            chef_obj = db.session.get(Recipe, recipe_id).chef
             
             # Verify the image actually exists on disk so we gracefully fallback
             if chef_obj and chef_obj.image_filename:
@@ -812,19 +867,20 @@ def build_sandbox_context(recipe_id: int, fragment_name: str, app, storage_provi
         if fragment_name == "comp":
             return {
                 **base_ctx,
-                "ingredient_groups": _build_ingredient_groups(recipe, storage_provider)
+                "ingredient_groups": data["ingredient_groups"]
             }
 
 
 
         if fragment_name == "nutrition":
-            return {**base_ctx, **_build_nutrition_context(recipe)}
+            return {**base_ctx, **data["nutrition"]}
 
         if fragment_name == "nutr":
+            recipe = db.session.get(Recipe, recipe_id)
             return {**base_ctx, "recipe": recipe, "wgt": recipe.total_weight_g or 1}
 
         if fragment_name == "shop":
-            ingredient_groups = _build_ingredient_groups(recipe, storage_provider)
+            ingredient_groups = data["ingredient_groups"]
             total_items = sum(len(g["entries"]) for g in ingredient_groups)
             return {
                 **base_ctx,
@@ -835,7 +891,7 @@ def build_sandbox_context(recipe_id: int, fragment_name: str, app, storage_provi
 
         if fragment_name.startswith("step") and fragment_name[4:].isdigit():
             comp_idx = int(fragment_name[4:]) - 1
-            step_groups = _build_step_groups(recipe)
+            step_groups = data["step_groups"]
             
             # Bound check
             if comp_idx < 0 or comp_idx >= len(step_groups):
@@ -861,19 +917,19 @@ def build_sandbox_context(recipe_id: int, fragment_name: str, app, storage_provi
             }
 
         if fragment_name == "galaxy":
-            graph_data = _build_galaxy_data(recipe, db.session, storage_provider)
+            graph_data = _build_galaxy_data(db.session.get(Recipe, recipe_id), db.session, storage_provider)
             return {**base_ctx, "graph_data": graph_data}
 
         if fragment_name == "coreid":
             return {
                 **base_ctx,
-                "recipe_id": recipe.id,
-                "protein_type": recipe.protein_type,
-                "image_filename": recipe.image_filename,
+                "recipe_id": recipe_id,
+                "protein_type": data["protein_type"],
+                "image_filename": data["image_filename"],
             }
 
         if fragment_name == "ing-grid":
-            ingredient_groups = _build_ingredient_groups(recipe, storage_provider)
+            ingredient_groups = data["ingredient_groups"]
             # Flatten all groups into a single list, images first for visual impact
             all_items = []
             for g in ingredient_groups:
@@ -888,7 +944,7 @@ def build_sandbox_context(recipe_id: int, fragment_name: str, app, storage_provi
             }
 
         if fragment_name in ["hook-social", "hook-cinematic"]:
-            hooks = recipe.social_hooks or {}
+            hooks = data["social_hooks"]
             hook_type = "social" if fragment_name == "hook-social" else "cinematic"
             return {
                 **base_ctx,
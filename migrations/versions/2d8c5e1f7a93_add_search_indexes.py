@@ -0,0 +1,89 @@
+"""Add full-text / trigram search indexes for ingredients and recipes
+
+Revision ID: 2d8c5e1f7a93
+Revises: 9a3f6b2c1e47
+Create Date: 2026-10-17 16:02:37.118420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d8c5e1f7a93'
+down_revision = '9a3f6b2c1e47'
+branch_labels = None
+depends_on = None
+
+# Postgres: expressions must match services/search_service.py
+PG_INDEXES = (
+    ('ix_ingredient_search_tsv', 'ingredient',
+     "gin (to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(aliases, '')))"),
+    ('ix_ingredient_name_trgm', 'ingredient', 'gin (name gin_trgm_ops)'),
+    ('ix_ingredient_aliases_trgm', 'ingredient', 'gin (aliases gin_trgm_ops)'),
+    ('ix_recipe_search_tsv', 'recipe',
+     "gin (to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(cuisine, '')))"),
+    ('ix_recipe_title_trgm', 'recipe', 'gin (title gin_trgm_ops)'),
+    ('ix_recipe_cuisine_trgm', 'recipe', 'gin (cuisine gin_trgm_ops)'),
+    # Prefix autocomplete: LIKE 'q%' on the lowercased name, whatever the collation
+    ('ix_ingredient_name_lower', 'ingredient', 'btree (lower(name) text_pattern_ops)'),
+    ('ix_recipe_title_lower', 'recipe', 'btree (lower(title) text_pattern_ops)'),
+)
+
+# SQLite: the same prefix indexes (range scans under the default BINARY collation)
+SQLITE_INDEXES = (
+    ('ix_ingredient_name_lower', 'ingredient', 'lower(name)'),
+    ('ix_recipe_title_lower', 'recipe', 'lower(title)'),
+)
+
+# SQLite: FTS5 external-content tables (name, source table, columns)
+SQLITE_FTS = (
+    ('ingredient_fts', 'ingredient', ('name', 'aliases')),
+    ('recipe_fts', 'recipe', ('title', 'cuisine')),
+)
+
+
+def _sqlite_fts_ddl(fts, source, columns):
+    cols = ', '.join(columns)
+    new = ', '.join(f'new.{c}' for c in columns)
+    old = ', '.join(f'old.{c}' for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{source}', content_rowid='id', prefix='1 2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+        for name, table, definition in PG_INDEXES:
+            op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING {definition}')
+    elif dialect == 'sqlite':
+        for name, table, expression in SQLITE_INDEXES:
+            op.create_index(name, table, [sa.text(expression)], unique=False)
+        for fts, source, columns in SQLITE_FTS:
+            for statement in _sqlite_fts_ddl(fts, source, columns):
+                op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for name, _, _ in PG_INDEXES:
+            op.execute(f'DROP INDEX IF EXISTS {name}')
+    elif dialect == 'sqlite':
+        for fts, _, _ in SQLITE_FTS:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {fts}')
+        for name, table, _ in SQLITE_INDEXES:
+            op.drop_index(name, table_name=table)
+
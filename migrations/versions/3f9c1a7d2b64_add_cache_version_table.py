@@ -0,0 +1,31 @@
+"""add_cache_version_table
+
+Revision ID: 3f9c1a7d2b64
+Revises: 698f1c8b3e3d
+Create Date: 2026-10-17 09:12:44.318202
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c1a7d2b64'
+down_revision = '698f1c8b3e3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_version = op.create_table('cache_version',
+    sa.Column('scope', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('scope')
+    )
+    # Seed the pantry counter so bumps are plain UPDATEs
+    op.bulk_insert(cache_version, [{'scope': 'pantry', 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('cache_version')
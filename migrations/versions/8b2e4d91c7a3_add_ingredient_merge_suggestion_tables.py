@@ -0,0 +1,51 @@
+"""add_ingredient_merge_suggestion_tables
+
+Revision ID: 8b2e4d91c7a3
+Revises: 3f9c1a7d2b64
+Create Date: 2026-10-17 11:03:27.540118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d91c7a3'
+down_revision = '3f9c1a7d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ingredient_merge_suggestion',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('winner_id', sa.Integer(), nullable=False),
+    sa.Column('loser_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('reason', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['loser_id'], ['ingredient.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['winner_id'], ['ingredient.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('winner_id', 'loser_id', name='uq_merge_suggestion_pair')
+    )
+    with op.batch_alter_table('ingredient_merge_suggestion', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ingredient_merge_suggestion_loser_id'), ['loser_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ingredient_merge_suggestion_score'), ['score'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ingredient_merge_suggestion_winner_id'), ['winner_id'], unique=False)
+
+    op.create_table('ingredient_merge_queue',
+    sa.Column('ingredient_id', sa.Integer(), nullable=False),
+    sa.Column('queued_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('ingredient_id')
+    )
+
+
+def downgrade():
+    op.drop_table('ingredient_merge_queue')
+    with op.batch_alter_table('ingredient_merge_suggestion', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ingredient_merge_suggestion_winner_id'))
+        batch_op.drop_index(batch_op.f('ix_ingredient_merge_suggestion_score'))
+        batch_op.drop_index(batch_op.f('ix_ingredient_merge_suggestion_loser_id'))
+
+    op.drop_table('ingredient_merge_suggestion')
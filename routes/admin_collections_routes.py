@@ -7,6 +7,7 @@ from flask import Blueprint, abort, jsonify, redirect, render_template, request,
 from flask_login import login_required
 from slugify import slugify
 from sqlalchemy import or_
+from sqlalchemy.orm import selectinload
 
 from database.models import CollectionItem, Recipe, RecipeCollection, db
 from utils.decorators import admin_required
@@ -22,7 +23,7 @@ collections_bp = Blueprint("collections", __name__, url_prefix="/admin/collectio
 @login_required
 @admin_required
 def collections_list() -> str:
-    """List all collections with quick-links to the builder."""
+    """List all collections with quick-links to the builder (item totals in one grouped count, no item loads)."""
     collections = (
         db.session.execute(
             db.select(RecipeCollection).order_by(RecipeCollection.created_at.desc())
@@ -30,7 +31,13 @@ def collections_list() -> str:
         .scalars()
         .all()
     )
-    return render_template("admin/collections_list.html", collections=collections)
+    # recipe_count only counts approved recipes; admins also need drafts / rejected items
+    item_counts = dict(
+        db.session.execute(
+            db.select(CollectionItem.collection_id, db.func.count()).group_by(CollectionItem.collection_id)
+        ).all()
+    )
+    return render_template("admin/collections_list.html", collections=collections, item_counts=item_counts)
 
 
 @collections_bp.route("/new", methods=["POST"])
@@ -65,7 +72,12 @@ def collections_create():
 @admin_required
 def collection_builder(collection_id: int) -> str:
     """Render the drag-and-drop collection builder UI."""
-    collection = db.session.get(RecipeCollection, collection_id)
+    # Items with their recipes up front (the template walks item.recipe for every row)
+    collection = db.session.execute(
+        db.select(RecipeCollection)
+        .where(RecipeCollection.id == collection_id)
+        .options(selectinload(RecipeCollection.items).joinedload(CollectionItem.recipe))
+    ).scalar_one_or_none()
     if not collection:
         abort(404)
     return render_template("admin/collection_builder.html", collection=collection)
@@ -128,7 +140,7 @@ def api_recipe_search():
                 "id": r.id,
                 "title": r.title,
                 "cuisine": r.cuisine or "",
-                "diet": r.diet or "",
+                "diet": ", ".join(r.diets_list),
                 "image_filename": r.image_filename,
             }
             for r in recipes
@@ -166,7 +178,7 @@ def api_collection_add(collection_id: int, recipe_id: int):
                 "id": recipe.id,
                 "title": recipe.title,
                 "cuisine": recipe.cuisine or "",
-                "diet": recipe.diet or "",
+                "diet": ", ".join(recipe.diets_list),
                 "image_filename": recipe.image_filename,
             },
         }
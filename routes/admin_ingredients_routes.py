@@ -5,6 +5,9 @@ from flask import Blueprint, abort, jsonify, render_template, request
 from flask_login import login_required
 
 from database.models import Ingredient, IngredientEvaluation, RecipeIngredient, db
+from services.merge_suggestions import (
+    get_suggested_merges, update_merge_suggestions, merge_suggestions_built, pending_merge_changes,
+)
 from services.storage_service import get_storage_provider
 from services.vertex_image_service import VertexImageGenerator
 from utils.decorators import admin_required
@@ -440,18 +443,42 @@ def evaluate_ingredient(ing_id: int):
 @login_required
 @admin_required
 def get_merge_suggestions():
-    """Returns AI-generated suggestions for ingredient merging."""
-    from services.merge_suggestions import get_suggested_merges
+    """Returns AI-generated suggestions for ingredient merging (re-scored on commit once built)."""
     try:
         limit = int(request.args.get('limit', 20))
         suggestions = get_suggested_merges(limit=limit)
         return jsonify({
             "success": True,
-            "suggestions": suggestions
+            "suggestions": suggestions,
+            "built": merge_suggestions_built(),
+            "pending": pending_merge_changes()
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@ingredients_bp.route("/api/merge-suggestions/refresh", methods=["POST"])
+@login_required
+@admin_required
+def refresh_merge_suggestions():
+    """Builds the merge suggestions (first run, or ?full=1) or re-scores the ingredients changed since."""
+    try:
+        processed = update_merge_suggestions(full=request.args.get('full') == '1')
+        return jsonify({"success": True, "processed": processed})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@ingredients_bp.route("/api/resolution-cache", methods=["GET"])
+@login_required
+@admin_required
+def get_resolution_cache_stats():
+    """Hit/miss counters of this worker's ingredient name → food_id resolution cache."""
+    from ai_engine import get_resolution_cache_stats as cache_stats
+    return jsonify({
+        "success": True,
+        "stats": cache_stats()
+    })
+
 @ingredients_bp.route("/api/unscored_ids", methods=["GET"])
 @login_required
 @admin_required
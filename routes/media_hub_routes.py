@@ -21,6 +21,7 @@ from flask_login import login_required
 from utils.decorators import admin_required
 from database.models import db, Recipe, Ingredient, SocialMediaPost
 from sqlalchemy.orm import joinedload
+from services.search_service import search_recipes
 
 logger = logging.getLogger(__name__)
 
@@ -585,14 +586,8 @@ def sandbox_search_recipes():
         if recipe:
             results.append({"id": recipe.id, "title": recipe.title, "cuisine": recipe.cuisine or ""})
 
-    # Then search by title (case-insensitive LIKE)
-    title_matches = (
-        Recipe.query
-        .filter(Recipe.title.ilike(f"%{query}%"))
-        .order_by(Recipe.id.desc())
-        .limit(10)
-        .all()
-    )
+    # Then ranked title / cuisine matches
+    title_matches = search_recipes(query, limit=10)
     seen_ids = {r["id"] for r in results}
     for r in title_matches:
         if r.id not in seen_ids:
@@ -606,30 +601,16 @@ def sandbox_search_recipes():
 @login_required
 @admin_required
 def get_recipe_meta():
-    from database.models import Recipe
-    from media_hub.snapshotter import _build_step_groups, _paginate_steps_dynamically
+    from media_hub.snapshotter import recipe_meta_payload
+    from services.recipe_json_cache import recipe_json_response
     
     recipe_id = request.args.get("id", type=int)
     if not recipe_id:
         return jsonify({"error": "No recipe ID"}), 400
-    recipe = db.session.get(Recipe, recipe_id)
-    if not recipe:
+    response = recipe_json_response(recipe_id, "media_meta", recipe_meta_payload)
+    if response is None:
         return jsonify({"error": "Not found"}), 404
-        
-    step_groups = _build_step_groups(recipe)
-    dynamic_steps = []
-    
-    for comp_idx, group in enumerate(step_groups, start=1):
-        pages = _paginate_steps_dynamically([group])
-        for p_idx, page_groups in enumerate(pages, start=1):
-            dynamic_steps.append({
-                "fragment_name": f"step{comp_idx}",
-                "page": p_idx,
-                "total_pages": len(pages),
-                "component_name": group["component"]
-            })
-            
-    return jsonify({"steps": dynamic_steps})
+    return response
 
 @media_hub_bp.route("/sandbox", methods=["GET"])
 
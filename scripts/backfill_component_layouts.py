@@ -0,0 +1,42 @@
+import sys
+import os
+import time
+
+# Ensure the root of the project is in PYTHONPATH so we can import from `app` and `database`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import selectinload
+
+from app import app
+from database.models import db, Recipe
+from services.recipe_view import store_component_layout
+
+BATCH_SIZE = 500
+
+def backfill_component_layouts():
+    print("--- Starting Recipe Component Layout Backfill ---")
+
+    with app.app_context():
+        started = time.perf_counter()
+        recipe_ids = db.session.execute(db.select(Recipe.id).order_by(Recipe.id)).scalars().all()
+        try:
+            for start in range(0, len(recipe_ids), BATCH_SIZE):
+                recipes = db.session.execute(
+                    db.select(Recipe)
+                    .where(Recipe.id.in_(recipe_ids[start:start + BATCH_SIZE]))
+                    .options(selectinload(Recipe.instructions), selectinload(Recipe.ingredients))
+                ).scalars().all()
+                for recipe in recipes:
+                    store_component_layout(recipe)
+                db.session.commit()
+                print(f"  ✅ {min(start + BATCH_SIZE, len(recipe_ids))}/{len(recipe_ids)}")
+        except Exception as e:
+            print(f"  ❌ Error backfilling component layouts: {e}")
+            db.session.rollback()
+            return
+
+        elapsed = time.perf_counter() - started
+        print(f"--- Stored layouts for {len(recipe_ids)} recipes in {elapsed:.2f}s. ---")
+
+if __name__ == '__main__':
+    backfill_component_layouts()
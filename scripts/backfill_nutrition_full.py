@@ -9,6 +9,7 @@ from google import genai
 from google.genai import types
 from app import app
 from database.models import db, Ingredient
+from services.nutrition_propagation import deferred_nutrition_propagation
 
 _api_key = os.getenv("GOOGLE_API_KEY")
 gemini_client = genai.Client(api_key=_api_key) if _api_key else None
@@ -136,56 +137,58 @@ def main():
         total = len(targets)
         print(f"--- Starting Edamam Enterprise Hydration for {total} Pantry Items ---")
         
-        for idx, ing in enumerate(targets, 1):
-            if not ing.default_unit:
-                continue
+        # Recipe totals are propagated once, after the whole hydration run
+        with deferred_nutrition_propagation():
+            for idx, ing in enumerate(targets, 1):
+                if not ing.default_unit:
+                    continue
                 
-            print(f"[{idx}/{total}] GET {ing.default_unit} {ing.name}...")
+                print(f"[{idx}/{total}] GET {ing.default_unit} {ing.name}...")
             
-            try:
-                result = fetch_edamam_data(ing.name, ing.default_unit)
-                source_label = 'edamam_enterprise'
+                try:
+                    result = fetch_edamam_data(ing.name, ing.default_unit)
+                    source_label = 'edamam_enterprise'
                 
-                if not result:
-                    print(f"  🔍 Unmapped by Edamam. Triggering AI Fallback...")
-                    result = generate_nutrition_estimate(ing.name)
-                    source_label = 'ai_fallback'
+                    if not result:
+                        print(f"  🔍 Unmapped by Edamam. Triggering AI Fallback...")
+                        result = generate_nutrition_estimate(ing.name)
+                        source_label = 'ai_fallback'
                 
-                if result:
-                    ing.average_g_per_unit = float(result.get('weight', 1.0))
-                    ing.calories_per_100g = float(result.get('calories', 0))
-                    ing.protein_per_100g = float(result.get('protein', 0))
-                    ing.fat_per_100g = float(result.get('fat', 0))
-                    ing.fat_saturated_per_100g = float(result.get('fat_saturated', 0))
-                    ing.carbs_per_100g = float(result.get('carbs', 0))
-                    ing.sugar_per_100g = float(result.get('sugar', 0))
-                    ing.fiber_per_100g = float(result.get('fiber', 0))
-                    ing.sodium_mg_per_100g = float(result.get('sodium', 0))
-                    ing.cholesterol_mg_per_100g = float(result.get('cholesterol', 0))
-                    ing.calcium_mg_per_100g = float(result.get('calcium', 0))
-                    ing.potassium_mg_per_100g = float(result.get('potassium', 0))
-                    ing.data_source = source_label
+                    if result:
+                        ing.average_g_per_unit = float(result.get('weight', 1.0))
+                        ing.calories_per_100g = float(result.get('calories', 0))
+                        ing.protein_per_100g = float(result.get('protein', 0))
+                        ing.fat_per_100g = float(result.get('fat', 0))
+                        ing.fat_saturated_per_100g = float(result.get('fat_saturated', 0))
+                        ing.carbs_per_100g = float(result.get('carbs', 0))
+                        ing.sugar_per_100g = float(result.get('sugar', 0))
+                        ing.fiber_per_100g = float(result.get('fiber', 0))
+                        ing.sodium_mg_per_100g = float(result.get('sodium', 0))
+                        ing.cholesterol_mg_per_100g = float(result.get('cholesterol', 0))
+                        ing.calcium_mg_per_100g = float(result.get('calcium', 0))
+                        ing.potassium_mg_per_100g = float(result.get('potassium', 0))
+                        ing.data_source = source_label
                     
-                    db.session.add(ing)
-                    db.session.commit()
+                        db.session.add(ing)
+                        db.session.commit()
                     
-                    if source_label == 'ai_fallback':
-                        os.makedirs('logs', exist_ok=True)
-                        with open('logs/unmapped_ingredients.log', 'a') as log_f:
-                            log_f.write(f"[{datetime.now().isoformat()}] {ing.name} solved via AI Fallback.\n")
-                        print(f"  🟢 AI Saved! avg_g_per_unit={ing.average_g_per_unit:.2f} | {ing.calories_per_100g:.1f} kcal/100g")
+                        if source_label == 'ai_fallback':
+                            os.makedirs('logs', exist_ok=True)
+                            with open('logs/unmapped_ingredients.log', 'a') as log_f:
+                                log_f.write(f"[{datetime.now().isoformat()}] {ing.name} solved via AI Fallback.\n")
+                            print(f"  🟢 AI Saved! avg_g_per_unit={ing.average_g_per_unit:.2f} | {ing.calories_per_100g:.1f} kcal/100g")
+                        else:
+                            print(f"  ✓ API Saved! avg_g_per_unit={ing.average_g_per_unit:.2f} | {ing.calories_per_100g:.1f} kcal/100g")
                     else:
-                        print(f"  ✓ API Saved! avg_g_per_unit={ing.average_g_per_unit:.2f} | {ing.calories_per_100g:.1f} kcal/100g")
-                else:
-                    print(f"  ❌ Still unmapped after Fallback.")
-            except Exception as e:
-                if isinstance(e, SystemExit):
-                    sys.exit(1)
-                print(f"  ⚠️ Critical loop failure for item '{ing.name}': {e}")
-                db.session.rollback()
+                        print(f"  ❌ Still unmapped after Fallback.")
+                except Exception as e:
+                    if isinstance(e, SystemExit):
+                        sys.exit(1)
+                    print(f"  ⚠️ Critical loop failure for item '{ing.name}': {e}")
+                    db.session.rollback()
                 
-            # Enterprise Basic Speed: 1.5s Buffer (~40 calls/min) constraints requested by user
-            time.sleep(1.5)
+                # Enterprise Basic Speed: 1.5s Buffer (~40 calls/min) constraints requested by user
+                time.sleep(1.5)
             
         print("\nAll Done.")
 
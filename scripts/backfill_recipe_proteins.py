@@ -0,0 +1,35 @@
+import sys
+import os
+import time
+
+# Ensure the root of the project is in PYTHONPATH so we can import from `app` and `database`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from database.models import db, Recipe
+from services.recipe_protein_service import sync_recipe_proteins
+
+BATCH_SIZE = 500
+
+def backfill_recipe_proteins():
+    print("--- Starting Recipe Protein Tag Backfill ---")
+
+    with app.app_context():
+        started = time.perf_counter()
+        recipe_ids = db.session.execute(db.select(Recipe.id).order_by(Recipe.id)).scalars().all()
+        tagged = 0
+        try:
+            # Batched so the IN lists stay small; one transaction for the whole catalog
+            for start in range(0, len(recipe_ids), BATCH_SIZE):
+                tagged += sync_recipe_proteins(recipe_ids[start:start + BATCH_SIZE])
+            db.session.commit()
+        except Exception as e:
+            print(f"  ❌ Error backfilling protein tags: {e}")
+            db.session.rollback()
+            return
+
+        elapsed = time.perf_counter() - started
+        print(f"--- Tagged {len(recipe_ids)} recipes with {tagged} protein tags in {elapsed:.2f}s. ---")
+
+if __name__ == '__main__':
+    backfill_recipe_proteins()
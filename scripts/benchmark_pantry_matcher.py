@@ -0,0 +1,121 @@
+"""
+Accuracy/latency report: n-gram blocked PantryMatcher vs the exhaustive scan.
+
+Builds pantries of increasing size from data/constraints/pantry_seed.json
+(real names first, then synthetic "<qualifier> <name> <form>" variants, the
+same shape as the decorated names recipes produce), then runs noisy queries
+(typos, plurals, prep words, dropped words) through both matchers.
+
+Reported per pantry size:
+  agree    - share of queries where match() returns the same (key, scorer)
+  score    - share where match() returns the same score (differences in
+             "agree" but not here are ties broken towards another key)
+  top-5    - share whose top-5 suggestion scores are identical
+  lost     - queries the exhaustive scan matched but the blocked one didn't
+  p50/p95  - match() latency per query, in ms
+
+Usage:
+    python scripts/benchmark_pantry_matcher.py [--sizes 5000 20000 50000] [--queries 500]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Add root directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pantry_matcher import PantryMatcher
+
+SEED_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'constraints', 'pantry_seed.json')
+THRESHOLD = 85  # ai_engine.FUZZY_MATCH_THRESHOLD
+
+QUALIFIERS = ['organic', 'smoked', 'fresh', 'dried', 'frozen', 'canned', 'roasted', 'raw',
+              'low-fat', 'wild', 'baby', 'red', 'green', 'sweet', 'spicy', 'aged', 'toasted']
+FORMS = ['', 'powder', 'paste', 'flakes', 'puree', 'slices', 'cubes', 'juice', 'oil', 'extract',
+         'sauce', 'chips', 'fillet', 'mince', 'stock', 'syrup']
+PREP = ['chopped', 'diced', 'minced', 'finely sliced', 'to taste', 'large', 'grated', 'crumbled']
+
+
+def build_pantry(seed_names: list[str], size: int, rng: random.Random) -> dict[str, str]:
+    pantry = {}
+    for name in seed_names:
+        pantry.setdefault(name.lower(), f"{len(pantry):06d}")
+    while len(pantry) < size:
+        name = f"{rng.choice(QUALIFIERS)} {rng.choice(seed_names)} {rng.choice(FORMS)}".strip().lower()
+        pantry.setdefault(name, f"{len(pantry):06d}")
+    return pantry
+
+
+def noisy(name: str, rng: random.Random) -> str:
+    kind = rng.randrange(5)
+    if kind == 0 and len(name) > 4:
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1:]
+    if kind == 1 and len(name) > 4:
+        i = rng.randrange(1, len(name) - 2)
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if kind == 2:
+        return name + 's'
+    if kind == 3:
+        return f"{name}, {rng.choice(PREP)}"
+    words = name.split()
+    if len(words) > 1:
+        words.pop(rng.randrange(len(words)))
+    return ' '.join(words)
+
+
+def timed(fn, queries):
+    results, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(fn(q))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.array(latencies)
+
+
+def report(sizes: list[int], n_queries: int, seed: int):
+    with open(SEED_PATH, 'r', encoding='utf-8') as f:
+        seed_names = [item['food_name'] for item in json.load(f) if item.get('food_name')]
+
+    print(f"{'size':>7} | {'agree':>6} | {'score':>6} | {'top-5':>6} | {'lost':>4} | "
+          f"{'exhaustive p50/p95 ms':>22} | {'blocked p50/p95 ms':>19}")
+    print('-' * 89)
+    for size in sizes:
+        rng = random.Random(seed)
+        pantry = build_pantry(seed_names, size, rng)
+        keys = list(pantry.keys())
+        queries = [noisy(rng.choice(keys), rng) for _ in range(n_queries)]
+
+        exhaustive = PantryMatcher(pantry, blocking=False)
+        blocked = PantryMatcher(pantry, blocking=True)
+
+        ex_results, ex_ms = timed(lambda q: exhaustive.match(q, THRESHOLD), queries)
+        bl_results, bl_ms = timed(lambda q: blocked.match(q, THRESHOLD), queries)
+
+        agree = sum(a == b for a, b in zip(ex_results, bl_results))
+        same_score = sum((a and a[1]) == (b and b[1]) for a, b in zip(ex_results, bl_results))
+        lost = sum(a is not None and b is None for a, b in zip(ex_results, bl_results))
+        top_agree = sum(
+            [[s for _, s in r] for r in exhaustive.top([q], 5)] == [[s for _, s in r] for r in blocked.top([q], 5)]
+            for q in queries
+        )
+
+        print(f"{size:>7} | {agree / n_queries:>6.1%} | {same_score / n_queries:>6.1%} | "
+              f"{top_agree / n_queries:>6.1%} | {lost:>4} | "
+              f"{np.percentile(ex_ms, 50):>10.2f} / {np.percentile(ex_ms, 95):>9.2f} | "
+              f"{np.percentile(bl_ms, 50):>8.2f} / {np.percentile(bl_ms, 95):>8.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 20000, 50000])
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    report(args.sizes, args.queries, args.seed)
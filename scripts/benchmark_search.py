@@ -0,0 +1,97 @@
+"""
+Latency report for keystroke autocomplete through services.search_service.
+
+Builds a throwaway SQLite database (FTS5 backend) with N synthetic
+ingredients — pantry_seed.json names plus "<qualifier> <name> <form>"
+variants — then replays every keystroke prefix (2+ characters) of random
+pantry names through search_ingredients().
+
+Reported per size: p50/p95/max latency per keystroke in ms and the average
+number of results returned.
+
+Usage:
+    python scripts/benchmark_search.py [--sizes 10000 100000] [--names 100]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+from flask import Flask
+
+# Add root directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.models import db, Ingredient
+from services import search_service
+from services.search_service import search_ingredients
+
+SEED_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'constraints', 'pantry_seed.json')
+
+QUALIFIERS = ['organic', 'smoked', 'fresh', 'dried', 'frozen', 'canned', 'roasted', 'raw',
+              'low-fat', 'wild', 'baby', 'red', 'green', 'sweet', 'spicy', 'aged', 'toasted']
+FORMS = ['', 'powder', 'paste', 'flakes', 'puree', 'slices', 'cubes', 'juice', 'oil', 'extract',
+         'sauce', 'chips', 'fillet', 'mince', 'stock', 'syrup']
+
+
+def build_names(seed_names: list[str], size: int, rng: random.Random) -> list[str]:
+    names = dict.fromkeys(seed_names)
+    while len(names) < size:
+        names.setdefault(f"{rng.choice(QUALIFIERS)} {rng.choice(seed_names)} {rng.choice(FORMS)}".strip())
+    return list(names)[:size]
+
+
+def make_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+
+def report(sizes: list[int], n_names: int, seed: int):
+    with open(SEED_PATH, 'r', encoding='utf-8') as f:
+        seed_names = [item['food_name'] for item in json.load(f) if item.get('food_name')]
+
+    print(f"{'size':>7} | {'keystrokes':>10} | {'p50 ms':>7} | {'p95 ms':>7} | {'max ms':>7} | {'avg hits':>8}")
+    print('-' * 62)
+    for size in sizes:
+        rng = random.Random(seed)
+        names = build_names(seed_names, size, rng)
+        with tempfile.TemporaryDirectory() as tmp:
+            app = make_app(os.path.join(tmp, 'bench.db'))
+            with app.app_context():
+                db.create_all()
+                db.session.execute(db.insert(Ingredient), [
+                    {'food_id': f"{i:06d}", 'name': name, 'main_category': 'bench', 'aliases': '[]'}
+                    for i, name in enumerate(names)
+                ])
+                db.session.commit()
+                search_service._fts_ready.clear()
+
+                queries = [name[:n] for name in rng.sample(seed_names, n_names) for n in range(2, len(name) + 1)]
+                search_ingredients(queries[0])  # builds the FTS index
+                latencies, hits = [], []
+                for q in queries:
+                    start = time.perf_counter()
+                    hits.append(len(search_ingredients(q)))
+                    latencies.append((time.perf_counter() - start) * 1000)
+                latencies = np.array(latencies)
+                db.session.remove()
+                db.engine.dispose()
+
+        print(f"{size:>7} | {len(queries):>10} | {np.percentile(latencies, 50):>7.2f} | "
+              f"{np.percentile(latencies, 95):>7.2f} | {latencies.max():>7.2f} | {np.mean(hits):>8.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--names', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    report(args.sizes, args.names, args.seed)
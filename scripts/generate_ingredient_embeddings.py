@@ -3,6 +3,7 @@ import sys
 import time
 import logging
 from google import genai
+from google.genai import types
 
 # Add project root to path
 sys.path.append('.')
@@ -11,22 +12,28 @@ logging.getLogger("werkzeug").setLevel(logging.ERROR)
 
 from app import app
 from database.models import db, Ingredient
+from utils.vector_index import embedding_text, DOCUMENT_TASK
 
 from dotenv import load_dotenv
 load_dotenv()
 
-def generate_embeddings():
+def generate_embeddings(reembed_all: bool = False):
+    """
+    Embeds ingredients without an embedding (all of them with --all, e.g.
+    after the document task type changed) as RETRIEVAL_DOCUMENT, the side
+    ai_engine's RETRIEVAL_QUERY lookups are compared against.
+    """
     print("Initializing Google GenAI Client...")
     location = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
         
     client = genai.Client(vertexai=True, location=location)
     
     with app.app_context():
-        # Find ingredients without an embedding
-        ingredients = db.session.execute(
-            db.select(Ingredient)
-            .where(Ingredient.embedding == None)
-        ).scalars().all()
+        # Find ingredients without an embedding (or every ingredient with --all)
+        stmt = db.select(Ingredient)
+        if not reembed_all:
+            stmt = stmt.where(Ingredient.embedding == None)
+        ingredients = db.session.execute(stmt).scalars().all()
         
         total = len(ingredients)
         print(f"Found {total} ingredients needing mathematically generated embeddings.")
@@ -45,14 +52,13 @@ def generate_embeddings():
         for idx, ing in enumerate(ingredients, 1):
             # We want the embedding to represent the culinary identity of the item.
             # Combining Name, Category, and Sub-category gives the AI perfect context.
-            cat = ing.main_category or "food"
-            sub = ing.sub_category or "general"
-            text_to_embed = f"{ing.name}. Category: {cat}. Sub-category: {sub}."
+            text_to_embed = embedding_text(ing.name, ing.main_category, ing.sub_category)
             
             try:
                 result = client.models.embed_content(
                     model='text-embedding-004',
                     contents=text_to_embed,
+                    config=types.EmbedContentConfig(task_type=DOCUMENT_TASK),
                 )
                 
                 # The result contains a list of embeddings
@@ -84,4 +90,4 @@ def generate_embeddings():
         print(f"Total Errors : {error_count}")
 
 if __name__ == '__main__':
-    generate_embeddings()
+    generate_embeddings(reembed_all='--all' in sys.argv)
@@ -0,0 +1,41 @@
+"""
+Lays out the recipe galaxy from scratch (services/galaxy_layout.py).
+
+Required once after the migration that adds graph_anchor /
+recipe_graph_position: the explore page only draws a stored layout, and
+approvals are placed incrementally next to existing anchors. Run it again
+to re-balance the layout after large catalog changes.
+
+Usage:
+    python scripts/rebuild_galaxy_layout.py
+"""
+
+import sys
+import os
+import time
+
+# Ensure the root of the project is in PYTHONPATH so we can import from `app` and `database`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from database.models import db
+from services.galaxy_layout import rebuild_layout
+
+def rebuild_galaxy_layout():
+    print("--- Rebuilding Recipe Galaxy Layout ---")
+
+    with app.app_context():
+        started = time.perf_counter()
+        try:
+            placed = rebuild_layout()
+            db.session.commit()
+        except Exception as e:
+            print(f"  ❌ Error rebuilding the galaxy layout: {e}")
+            db.session.rollback()
+            return
+
+        elapsed = time.perf_counter() - started
+        print(f"--- Placed {placed} recipes in {elapsed:.2f}s. ---")
+
+if __name__ == '__main__':
+    rebuild_galaxy_layout()
@@ -0,0 +1,29 @@
+import sys
+import os
+import time
+
+# Ensure the root of the project is in PYTHONPATH so we can import from `app` and `database`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from database.models import db
+from services.merge_suggestions import update_merge_suggestions
+
+def rebuild_merge_suggestions(full: bool = False):
+    """Builds the merge suggestion table (first run or --full), else re-scores the queued ingredients."""
+    print("--- Updating Ingredient Merge Suggestions ---")
+
+    with app.app_context():
+        started = time.perf_counter()
+        try:
+            processed = update_merge_suggestions(full=full)
+        except Exception as e:
+            print(f"  ❌ Error updating merge suggestions: {e}")
+            db.session.rollback()
+            return
+
+        elapsed = time.perf_counter() - started
+        print(f"--- Done ({processed} processed) in {elapsed:.2f}s. ---")
+
+if __name__ == '__main__':
+    rebuild_merge_suggestions(full='--full' in sys.argv)
@@ -0,0 +1,85 @@
+"""
+Precision/recall report for ai_engine.SEMANTIC_MATCH_THRESHOLD.
+
+Labelled queries come from Ingredient.aliases: every merged-away name
+(see ingredient_service.merge_ingredients) should resolve to the ingredient
+it was merged into. Each alias is encoded the way ai_engine encodes lookups
+(RETRIEVAL_QUERY) and searched against the stored RETRIEVAL_DOCUMENT
+embeddings; aliases that are themselves pantry keys are skipped, since exact
+and fuzzy matching handle those before the fallback runs.
+
+Reported per threshold:
+  accepted  - share of queries whose best hit clears the threshold
+  precision - share of accepted hits that are the labelled ingredient
+  recall    - share of all queries resolved to the labelled ingredient
+
+Usage:
+    python scripts/tune_semantic_threshold.py [--thresholds 0.6 0.65 0.7 0.75 0.8] [--limit 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add root directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from database.models import db, Ingredient
+import ai_engine
+from services.cache_version_service import EMBEDDING_SCOPE, get_versions
+from services.pantry_service import _query_embedding_index, get_pantry_snapshot
+
+
+def labelled_aliases(limit: int) -> list[tuple[str, str]]:
+    rows = db.session.execute(
+        db.select(Ingredient.food_id, Ingredient.aliases).where(
+            Ingredient.status == 'active', Ingredient.aliases.is_not(None), Ingredient.aliases != '[]')
+    ).all()
+    pantry = ai_engine.current_pantry_snapshot().pantry
+    pairs = []
+    for food_id, raw in rows:
+        try:
+            names = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+        pairs.extend((name, food_id) for name in names
+                     if isinstance(name, str) and name and name.lower() not in pantry)
+    return pairs[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.6, 0.65, 0.7, 0.75, 0.8, 0.85])
+    parser.add_argument('--limit', type=int, default=2000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        get_pantry_snapshot()
+        index = _query_embedding_index(get_versions(EMBEDDING_SCOPE)[EMBEDDING_SCOPE])
+        pairs = labelled_aliases(args.limit)
+    if not pairs or not len(index):
+        print("Nothing to tune on: no aliases outside the pantry, or no embeddings.")
+        return
+
+    queries = [ai_engine.normalize_ingredient_name(name) or name.lower() for name, _ in pairs]
+    vectors = ai_engine._query_encoder.encode(queries)
+    best = [hits[0] if hits else (None, 0.0) for hits in index.search(vectors, 1)]
+
+    print(f"{len(pairs)} labelled aliases, {len(index)} embedded ingredients "
+          f"(current threshold {ai_engine.SEMANTIC_MATCH_THRESHOLD})")
+    print(f"{'threshold':>9}  {'accepted':>8}  {'precision':>9}  {'recall':>6}")
+    for threshold in sorted(args.thresholds):
+        accepted = correct = 0
+        for (_, food_id), (row, sim) in zip(pairs, best):
+            if row is None or sim < threshold:
+                continue
+            accepted += 1
+            correct += index.food_ids[row] == food_id
+        precision = correct / accepted if accepted else 0.0
+        print(f"{threshold:>9.2f}  {accepted / len(pairs):>8.1%}  {precision:>9.1%}  {correct / len(pairs):>6.1%}")
+
+
+if __name__ == '__main__':
+    main()
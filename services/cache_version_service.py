@@ -0,0 +1,55 @@
+"""
+Cache Version Service — DB-backed version counters for in-process caches.
+
+Each gunicorn worker keeps its own copy of hot, read-mostly data (the pantry
+snapshot, the ingredient embedding index, ...). Writers bump the scope's counter inside their own transaction;
+readers compare the stored version with the one their copy was built from and
+rebuild only when it moved.
+"""
+
+import datetime
+
+from database.models import db, CacheVersion
+
+PANTRY_SCOPE = 'pantry'
+EMBEDDING_SCOPE = 'ingredient_embeddings'
+MERGE_SUGGESTIONS_SCOPE = 'merge_suggestions'  # > 0 once the suggestion table was first built
+UNIT_CONVERSION_SCOPE = 'unit_conversions'
+RECIPE_GRAPH_SCOPE = 'recipe_graph'
+INGREDIENT_GRAPH_SCOPE = 'ingredient_graph'
+FEED_SCOPE = 'feed_recipes'  # the set of approved recipes
+
+
+def get_version(scope: str) -> int:
+    """Current version for a scope (0 if it was never bumped). One PK lookup."""
+    version = db.session.execute(
+        db.select(CacheVersion.version).where(CacheVersion.scope == scope)
+    ).scalar()
+    return version or 0
+
+
+def get_versions(*scopes: str) -> dict[str, int]:
+    """Current versions for several scopes in one query ({scope: version}, 0 if never bumped)."""
+    rows = db.session.execute(
+        db.select(CacheVersion.scope, CacheVersion.version).where(CacheVersion.scope.in_(scopes))
+    ).all()
+    versions = {scope: 0 for scope in scopes}
+    versions.update({scope: version or 0 for scope, version in rows})
+    return versions
+
+
+def bump_version(scope: str, connection=None) -> None:
+    """
+    Increments a scope's version. Runs on the caller's connection/transaction,
+    so the bump becomes visible to other workers exactly when the write that
+    caused it commits. Does NOT commit.
+    """
+    conn = connection if connection is not None else db.session.connection()
+    now = datetime.datetime.utcnow()
+    result = conn.execute(
+        db.update(CacheVersion)
+        .where(CacheVersion.scope == scope)
+        .values(version=CacheVersion.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        conn.execute(db.insert(CacheVersion).values(scope=scope, version=1, updated_at=now))
@@ -0,0 +1,121 @@
+"""
+Curated collections — public page loader and precomputed collection stats.
+
+The public /collections pages show, per published collection, its approved
+recipes as cards. published_collections() reads collections, items and
+recipe card columns in one outer-joined query, so no collection, item or
+recipe is lazily loaded, whatever the number of collections.
+
+Each collection also stores its approved-recipe count and a cover image (the
+image of its earliest-added approved recipe that has one). They are
+refreshed at commit time for every collection whose items changed (admin
+builder adds / removes, recipe deletes) or that holds a recipe whose status
+or image changed, so list pages never count rows per collection.
+"""
+
+from sqlalchemy import and_, event, func, inspect
+
+from database.models import db, CollectionItem, Recipe, RecipeCollection
+from services.commit_hooks import COLLECTION_HOOK, on_commit, track
+from services.recipe_cards import RecipeCard, card_columns, cards_from_rows
+
+# Recipe columns that change a collection's stats
+RECIPE_FIELDS = ('status', 'image_filename')
+
+
+def published_collections(*criteria) -> list[tuple[RecipeCollection, list[RecipeCard]]]:
+    """
+    [(collection, approved recipe cards in the order they were added)] of the
+    published collections matching `criteria`, newest collection first.
+    """
+    rows = db.session.execute(
+        db.select(*card_columns(), RecipeCollection)
+        .select_from(RecipeCollection)
+        .outerjoin(CollectionItem, CollectionItem.collection_id == RecipeCollection.id)
+        .outerjoin(Recipe, and_(Recipe.id == CollectionItem.recipe_id, Recipe.status == 'approved'))
+        .where(RecipeCollection.is_published.is_(True), *criteria)
+        .order_by(RecipeCollection.created_at.desc(), RecipeCollection.id,
+                  CollectionItem.added_at, Recipe.id)
+    ).all()
+
+    collections: dict[int, tuple[RecipeCollection, list[RecipeCard]]] = {}
+    for row in rows:
+        collection = row[-1]
+        _, cards = collections.setdefault(collection.id, (collection, []))
+        # Collections without (approved) recipes come back as one row of NULL card columns
+        if row[0] is not None:
+            cards.extend(cards_from_rows([row[:-1]]))
+    return list(collections.values())
+
+
+def refresh_collection_stats(collection_ids) -> None:
+    """
+    Recomputes recipe_count and cover_image_filename of `collection_ids`
+    (three reads, one bulk UPDATE). Flushes nothing; the caller commits.
+    """
+    collection_ids = set(collection_ids)
+    if not collection_ids:
+        return
+    counts = dict(db.session.execute(
+        db.select(CollectionItem.collection_id, func.count())
+        .join(Recipe, Recipe.id == CollectionItem.recipe_id)
+        .where(CollectionItem.collection_id.in_(collection_ids), Recipe.status == 'approved')
+        .group_by(CollectionItem.collection_id)
+    ).all())
+    covers: dict[int, str] = {}
+    for collection_id, image_filename in db.session.execute(
+        db.select(CollectionItem.collection_id, Recipe.image_filename)
+        .join(Recipe, Recipe.id == CollectionItem.recipe_id)
+        .where(CollectionItem.collection_id.in_(collection_ids), Recipe.status == 'approved',
+               Recipe.image_filename.is_not(None))
+        .order_by(CollectionItem.added_at, Recipe.id)
+    ):
+        covers.setdefault(collection_id, image_filename)
+
+    params = [
+        {'id': collection_id,
+         'recipe_count': counts.get(collection_id, 0),
+         'cover_image_filename': covers.get(collection_id)}
+        for collection_id in db.session.execute(
+            db.select(RecipeCollection.id).where(RecipeCollection.id.in_(collection_ids))
+        ).scalars()
+    ]
+    if params:
+        db.session.execute(db.update(RecipeCollection), params)
+
+
+def queue_collection_refresh(collection_ids) -> None:
+    """For writes that bypass the ORM (e.g. bulk recipe deletes): refresh these collections at commit."""
+    track(db.session(), COLLECTION_HOOK, collection_ids)
+
+
+# ---------------------------------------------------------------------------
+# Tracking: remember collections whose items changed and recipes whose
+# status / image changed per transaction, refresh their stats on commit.
+# ---------------------------------------------------------------------------
+
+@event.listens_for(db.session, 'after_flush')
+def _track_collection_changes(session, flush_context):
+    collections, recipes = set(), set()
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, CollectionItem):
+            collections.add(obj.collection_id)
+    for obj in session.dirty:
+        if isinstance(obj, Recipe):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in RECIPE_FIELDS):
+                recipes.add(obj.id)
+    track(session, COLLECTION_HOOK, collections)
+    track(session, COLLECTION_HOOK, recipes, kind='recipes')
+
+
+@on_commit(COLLECTION_HOOK)
+def _refresh_stats_on_commit(session, pending):
+    collections = pending.get('ids', set())
+    recipes = pending.get('recipes')
+    if recipes:
+        collections.update(session.execute(
+            db.select(CollectionItem.collection_id).where(CollectionItem.recipe_id.in_(recipes))
+        ).scalars())
+    if collections:
+        refresh_collection_stats(collections)
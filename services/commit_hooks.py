@@ -0,0 +1,88 @@
+"""
+Commit hooks — derived rows refreshed in the writer's transaction.
+
+Several services keep derived tables in step with ORM writes (nutrition
+totals, protein tags, similarity signatures, galaxy positions, collection
+stats, merge suggestions). Each one tracks what changed in its own
+after_flush listener and records the ids here with track(); the single
+before_commit listener below
+flushes, hands every hook its pending ids in HOOK_ORDER, and repeats while
+the hooks' own writes queued more work (up to MAX_PASSES; what is still
+queued then is dropped with an error log, never left for an unrelated
+commit). A rollback discards everything pending.
+
+    @on_commit(PROTEIN_HOOK)
+    def _sync_proteins(session, pending):   # pending: {kind: set of ids}
+        ...
+"""
+
+import logging
+
+from sqlalchemy import event
+
+from database.models import db
+
+logger = logging.getLogger(__name__)
+
+NUTRITION_HOOK = 'nutrition'
+PROTEIN_HOOK = 'recipe_proteins'
+SIMILARITY_HOOK = 'similarity'
+LAYOUT_HOOK = 'galaxy_layout'
+COLLECTION_HOOK = 'collection_stats'
+MERGE_HOOK = 'merge_suggestions'
+
+# Run order: totals first, then the indexes derived from ingredient lines, collection stats last;
+# merge suggestions only read ingredient names
+HOOK_ORDER = (NUTRITION_HOOK, PROTEIN_HOOK, SIMILARITY_HOOK, LAYOUT_HOOK, COLLECTION_HOOK, MERGE_HOOK)
+
+# Passes before giving up on hooks that keep queueing work for each other
+MAX_PASSES = 3
+
+_PENDING_KEY = 'commit_hooks_pending'
+
+_hooks: dict[str, object] = {}
+
+
+def on_commit(name: str):
+    """Registers sync(session, pending) as the commit hook `name` (one of HOOK_ORDER)."""
+    if name not in HOOK_ORDER:
+        raise ValueError(f"Unknown commit hook: {name}")
+
+    def register(sync):
+        _hooks[name] = sync
+        return sync
+    return register
+
+
+def track(session, name: str, ids, kind: str = 'ids') -> None:
+    """Queues `ids` for hook `name` at the next commit (no-op for no ids)."""
+    ids = set(ids)
+    ids.discard(None)
+    if ids:
+        pending = session.info.setdefault(_PENDING_KEY, {}).setdefault(name, {})
+        pending.setdefault(kind, set()).update(ids)
+
+
+def take_pending(session, name: str) -> dict[str, set]:
+    """Removes and returns hook `name`'s pending ids ({kind: ids}), for callers that sync them themselves."""
+    return session.info.get(_PENDING_KEY, {}).pop(name, {})
+
+
+@event.listens_for(db.session, 'before_commit')
+def _run_commit_hooks(session):
+    for _ in range(MAX_PASSES):
+        # commit() only flushes after this hook; flush now so the hooks see every change
+        session.flush()
+        pending = session.info.pop(_PENDING_KEY, None)
+        if not pending:
+            return
+        for name in HOOK_ORDER:
+            if name in pending and name in _hooks:
+                _hooks[name](session, pending[name])
+    leftover = session.info.pop(_PENDING_KEY, {})
+    logger.error("Commit hooks still queueing work after %d passes, dropped: %s", MAX_PASSES, leftover)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,243 @@
+"""
+Swipe-feed sampler — random recipes without ORDER BY random().
+
+Each visitor walks a shuffled deck over the approved recipes. The deck is
+never materialised: it is a seeded Feistel permutation of [0, size) stored
+as three integers (seed, size, cursor) in the Flask session, and a deck
+position maps to the approved recipe at that index of the worker's sorted
+approved-id list. That list is cached per worker and reloaded only when the
+FEED_SCOPE version moves (bumped by any flush that adds, deletes, approves
+or unapproves a recipe). Every probe therefore lands on an approved recipe,
+however sparse approved ids are in the id range; only recipes the visitor
+already swiped are skipped.
+
+The next batch maps the next few deck positions to ids and fetches them with
+one primary-key IN lookup that also drops recipes unapproved since the list
+was loaded and (for logged-in users) the ones they already swiped. That
+lookup is a seek per id, so its cost does not grow with the catalog or the
+interaction history. Batches are card projections (services.recipe_cards),
+not Recipe entities.
+
+Recipes approved after a deck was shuffled join the feed on the next
+reshuffle (when the deck runs out); a deck dealt over an older list may skip
+or repeat a few recipes. When a visitor has already swiped nearly everything,
+the probe budget runs out before a batch fills; the rest is topped up by
+seeking from a random id for unseen recipes (then for passed ones), which
+reads the recipe / interaction primary keys in order instead of sorting the
+catalog.
+"""
+
+import hashlib
+import random
+
+from sqlalchemy import event, exists, inspect
+from database.models import db, Recipe, UserRecipeInteraction
+from services.cache_version_service import FEED_SCOPE, get_version, bump_version
+from services.recipe_cards import RecipeCard, card_select, load_cards
+
+FEED_BATCH = 10
+PROBE_FACTOR = 3     # deck positions probed per missing card in one round
+MAX_PROBES = 300     # deck positions examined per request before topping up by seek
+FEISTEL_ROUNDS = 4
+
+_BUMPED_KEY = 'feed_scope_bumped'
+
+# (FEED_SCOPE version, sorted approved recipe ids) of this worker
+_approved_ids: tuple[int | None, tuple[int, ...]] = (None, ())
+
+
+def approved_recipe_ids() -> tuple[int, ...]:
+    """Sorted ids of the approved recipes; one PK lookup unless the list changed."""
+    global _approved_ids
+    # Version before rows: a concurrent write can only make the list newer than its label
+    version = get_version(FEED_SCOPE)
+    if _approved_ids[0] != version:
+        ids = db.session.execute(
+            db.select(Recipe.id).where(Recipe.status == 'approved').order_by(Recipe.id)
+        ).scalars().all()
+        _approved_ids = (version, tuple(ids))
+    return _approved_ids[1]
+
+
+def _round_function(value: int, seed: int, rnd: int) -> int:
+    digest = hashlib.blake2b(f'{seed}:{rnd}:{value}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def permute(position: int, span: int, seed: int) -> int:
+    """
+    Bijection of [0, span): a balanced Feistel network over the next even
+    power of two, cycle-walked until the result falls inside the range.
+    """
+    if span <= 1:
+        return 0
+    bits = max(2, (span - 1).bit_length())
+    bits += bits & 1
+    half = bits // 2
+    mask = (1 << half) - 1
+    x = position
+    while True:
+        left, right = x >> half, x & mask
+        for rnd in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ (_round_function(right, seed, rnd) & mask)
+        x = (left << half) | right
+        if x < span:
+            return x
+
+
+class FeedDeck:
+    """A position in one visitor's shuffled pass over the approved recipes."""
+
+    def __init__(self, seed: int, size: int, cursor: int = 0):
+        self.seed, self.size, self.cursor = seed, size, cursor
+
+    @classmethod
+    def shuffle(cls) -> 'FeedDeck':
+        return cls(random.getrandbits(32), len(approved_recipe_ids()))
+
+    @classmethod
+    def from_state(cls, state) -> 'FeedDeck | None':
+        try:
+            return cls(int(state['seed']), int(state['size']), int(state['cursor']))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def state(self) -> dict:
+        return {'seed': self.seed, 'size': self.size, 'cursor': self.cursor}
+
+    @property
+    def exhausted(self) -> bool:
+        return self.cursor >= self.size
+
+    def draw(self, limit: int, user_id: int | None = None, budget: int | None = None) -> list[RecipeCard]:
+        """
+        Up to `limit` eligible recipes from the next positions (examining at
+        most `budget`, default MAX_PROBES); advances the cursor past them.
+        """
+        budget = MAX_PROBES if budget is None else budget
+        approved = approved_recipe_ids()
+        found: list[RecipeCard] = []
+        while len(found) < limit and not self.exhausted and budget > 0:
+            count = min((limit - len(found)) * PROBE_FACTOR, self.size - self.cursor, budget)
+            positions = range(self.cursor, self.cursor + count)
+            indexes = [permute(p, self.size, self.seed) for p in positions]
+            # The list may have shrunk since the shuffle
+            ids = [approved[i] if i < len(approved) else None for i in indexes]
+            budget -= count
+
+            stmt = card_select().where(Recipe.id.in_([i for i in ids if i is not None]),
+                                       Recipe.status == 'approved')
+            if user_id is not None:
+                stmt = stmt.where(_unseen(user_id))
+            eligible = {card.id: card for card in load_cards(stmt)}
+
+            for position, recipe_id in zip(positions, ids):
+                self.cursor = position + 1
+                if recipe_id in eligible:
+                    found.append(eligible[recipe_id])
+                    if len(found) == limit:
+                        break
+        return found
+
+
+def _unseen(user_id: int):
+    return ~exists().where(
+        UserRecipeInteraction.user_id == user_id,
+        UserRecipeInteraction.recipe_id == Recipe.id,
+    )
+
+
+def _seek_from(stmt, column, pivot: int, limit: int) -> list[RecipeCard]:
+    """`stmt` rows with column >= pivot in column order, wrapping around to the start if short."""
+    recipes = load_cards(stmt.where(column >= pivot).order_by(column).limit(limit))
+    if len(recipes) < limit:
+        recipes += load_cards(stmt.where(column < pivot).order_by(column).limit(limit - len(recipes)))
+    return recipes
+
+
+def _top_up_batch(user_id: int | None, limit: int, exclude: set[int]) -> list[RecipeCard]:
+    """
+    Up to `limit` recipes not in `exclude`, read from a random approved id
+    onwards: unseen ones, then (seen everything) the user's passes.
+    """
+    approved = approved_recipe_ids()
+    if not approved:
+        return []
+    pivot = random.choice(approved)
+    stmt = card_select().where(Recipe.status == 'approved')
+    if exclude:
+        stmt = stmt.where(Recipe.id.not_in(exclude))
+    if user_id is None:
+        return _seek_from(stmt, Recipe.id, pivot, limit)
+
+    recipes = _seek_from(stmt.where(_unseen(user_id)), Recipe.id, pivot, limit)
+    if not recipes:
+        # Seen everything: shuffle through the "no" stack, seeking on the interaction primary key
+        passed = stmt.join(UserRecipeInteraction, db.and_(
+            UserRecipeInteraction.recipe_id == Recipe.id,
+            UserRecipeInteraction.user_id == user_id,
+            UserRecipeInteraction.status == 'pass',
+        ))
+        recipes = _seek_from(passed, UserRecipeInteraction.recipe_id, pivot, limit)
+    return recipes
+
+
+def next_feed_batch(state: dict | None, user_id: int | None = None,
+                    limit: int = FEED_BATCH) -> tuple[list[RecipeCard], dict]:
+    """
+    The next `limit` feed recipes for a visitor and their updated deck state
+    (to be stored back in the session). Reshuffles once when the deck runs
+    out; a batch the probe budget could not fill is topped up by seek.
+    """
+    deck = FeedDeck.from_state(state) if state else None
+    if deck is None:
+        deck = FeedDeck.shuffle()
+
+    recipes = deck.draw(limit, user_id)
+    if len(recipes) < limit and deck.exhausted:
+        deck = FeedDeck.shuffle()
+        taken = {r.id for r in recipes}
+        recipes += [r for r in deck.draw(limit - len(recipes), user_id) if r.id not in taken]
+    if len(recipes) < limit:
+        recipes += _top_up_batch(user_id, limit - len(recipes), {r.id for r in recipes})
+    return recipes, deck.state()
+
+
+# ---------------------------------------------------------------------------
+# Invalidation: flushes that change the set of approved recipes bump
+# FEED_SCOPE inside the writer's transaction.
+# ---------------------------------------------------------------------------
+
+def _touches_feed(session) -> bool:
+    for obj in session.new:
+        if isinstance(obj, Recipe) and obj.status == 'approved':
+            return True
+    if any(isinstance(obj, Recipe) for obj in session.deleted):
+        return True
+    for obj in session.dirty:
+        if isinstance(obj, Recipe) and inspect(obj).attrs.status.history.has_changes():
+            return True
+    return False
+
+
+def bump_feed_version() -> None:
+    """Explicit bump for writes that bypass the ORM (bulk deletes). Call before committing."""
+    bump_version(FEED_SCOPE)
+    db.session.info[_BUMPED_KEY] = True
+
+
+@event.listens_for(db.session, 'before_flush')
+def _bump_feed_version_on_flush(session, flush_context, instances):
+    if not session.info.get(_BUMPED_KEY) and _touches_feed(session):
+        bump_version(FEED_SCOPE, session.connection())
+        session.info[_BUMPED_KEY] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _reset_feed_flag_after_commit(session):
+    session.info.pop(_BUMPED_KEY, None)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _reset_feed_flag_after_rollback(session):
+    session.info.pop(_BUMPED_KEY, None)
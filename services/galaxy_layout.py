@@ -0,0 +1,352 @@
+"""
+Galaxy layout — precomputed positions for the level-of-detail recipe galaxy.
+
+Instead of shipping every recipe to the browser for a D3 force simulation,
+the layout is computed on the server and stored:
+
+  - graph_anchor: one point per cuisine / protein, from a networkx spring
+    layout of the cuisine-protein co-occurrence graph (edge weight grows
+    with the number of recipes pairing them);
+  - recipe_graph_position: each approved recipe sits on a sunflower spiral
+    around its (cuisine, protein) cluster centre, between the two anchors.
+    Spiral slot k lies at radius RECIPE_SPACING * sqrt(k), so clusters fill
+    evenly outwards and low slots are the cluster's core.
+
+The explore page draws zoom level 0 (/api/graph/galaxy/clusters): the
+anchors with their recipe counts. Zoomed in (/api/graph/galaxy/viewport) it
+asks for the recipes inside its visible bounding box — an indexed range
+query on recipe_graph_position, capped at VIEWPORT_LIMIT nodes (cluster
+cores first).
+
+Updates are incremental: approving (or re-tagging) a recipe places just that
+recipe at its cluster's next free slot at commit time, adding an anchor next
+to its neighbours when a cuisine or protein is new. That needs a first
+layout: scripts/rebuild_galaxy_layout.py is a required step after the
+migration that adds the tables (and re-lays out everything when run again).
+Until it has run the galaxy is empty and approvals are not placed.
+"""
+
+import hashlib
+import math
+
+import networkx as nx
+import numpy as np
+from sqlalchemy import event, func, inspect
+
+from database.models import db, Recipe, GraphAnchor, RecipeGraphPosition
+from services.cache_version_service import RECIPE_GRAPH_SCOPE
+from services.graph_cache import bump_graph_version
+from services.commit_hooks import LAYOUT_HOOK, on_commit, track
+
+OTHER_CUISINE = 'Other'      # anchor for recipes without a cuisine
+LAYOUT_MIN_SCALE = 1000.0    # spring layout radius before it grows with the catalog
+RECIPE_SPACING = 12.0        # distance between neighbouring recipes on a cluster spiral
+NEW_ANCHOR_OFFSET = 150.0    # distance of an incrementally added anchor from its neighbours
+CUISINE_PULL = 2 / 3         # cluster centre: this share of the way to the cuisine anchor
+VIEWPORT_LIMIT = 1500
+LAYOUT_SEED = 42
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+# Recipe columns that decide whether and where a recipe is placed
+LAYOUT_FIELDS = ('status', 'cuisine', 'protein_type')
+
+
+def cluster_key(cuisine: str | None, protein: str | None) -> tuple[str, str | None]:
+    return (cuisine or OTHER_CUISINE, protein or None)
+
+
+def anchor_id(kind: str, name: str) -> str:
+    """Node id of an anchor — the same ids the full galaxy graph uses."""
+    return f"attr_{kind}_{name}"
+
+
+# ---------------------------------------------------------------------------
+# Geometry (pure)
+# ---------------------------------------------------------------------------
+
+def layout_anchors(cluster_sizes: dict[tuple[str, str | None], int]) -> dict[tuple[str, str], tuple[float, float]]:
+    """
+    Spring layout of the cuisine/protein graph for {(cuisine, protein): recipe count}.
+    Returns {(kind, name): (x, y)}; the radius grows with sqrt(total recipes)
+    so the spirals have room.
+    """
+    graph = nx.Graph()
+    for (cuisine, protein), count in cluster_sizes.items():
+        graph.add_node(('cuisine', cuisine))
+        if protein:
+            graph.add_node(('protein', protein))
+            previous = graph.get_edge_data(('cuisine', cuisine), ('protein', protein), {}).get('count', 0)
+            graph.add_edge(('cuisine', cuisine), ('protein', protein), count=previous + count)
+    if not graph:
+        return {}
+    if len(graph) == 1:
+        return {node: (0.0, 0.0) for node in graph}
+    for _, _, data in graph.edges(data=True):
+        # Log-damped so a few huge pairings don't collapse the layout
+        data['weight'] = math.log1p(data['count'])
+    scale = LAYOUT_MIN_SCALE + 2 * RECIPE_SPACING * math.sqrt(sum(cluster_sizes.values()))
+    positions = nx.spring_layout(graph, weight='weight', seed=LAYOUT_SEED, scale=scale)
+    return {node: (float(x), float(y)) for node, (x, y) in positions.items()}
+
+
+def cluster_center(anchors: dict, cuisine: str, protein: str | None) -> np.ndarray:
+    center = np.array(anchors[('cuisine', cuisine)])
+    if protein and ('protein', protein) in anchors:
+        center = CUISINE_PULL * center + (1 - CUISINE_PULL) * np.array(anchors[('protein', protein)])
+    return center
+
+
+def spiral_offsets(slots) -> np.ndarray:
+    """(n, 2) offsets of spiral slots from their cluster centre (Vogel's sunflower spiral)."""
+    slots = np.asarray(slots, dtype=float)
+    radius = RECIPE_SPACING * np.sqrt(slots + 0.5)
+    angle = slots * GOLDEN_ANGLE
+    return np.column_stack((radius * np.cos(angle), radius * np.sin(angle)))
+
+
+def _hash_angle(text: str) -> float:
+    digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64 * 2 * math.pi
+
+
+def place_new_anchor(anchors: dict, node: tuple[str, str], neighbours) -> tuple[float, float]:
+    """
+    Position for an anchor missing from the layout: NEW_ANCHOR_OFFSET from the
+    mean of its already placed neighbours, or just outside the layout when it
+    has none. The direction comes from a hash of the name, so it is stable.
+    """
+    angle = _hash_angle(f'{node[0]}:{node[1]}')
+    direction = np.array([math.cos(angle), math.sin(angle)])
+    known = [anchors[n] for n in neighbours if n in anchors]
+    if known:
+        point = np.mean(known, axis=0) + NEW_ANCHOR_OFFSET * direction
+    else:
+        radius = max((math.hypot(x, y) for x, y in anchors.values()), default=0.0)
+        point = (radius + NEW_ANCHOR_OFFSET) * direction
+    return float(point[0]), float(point[1])
+
+
+# ---------------------------------------------------------------------------
+# Layout maintenance
+# ---------------------------------------------------------------------------
+
+def _load_anchors() -> dict[tuple[str, str], tuple[float, float]]:
+    rows = db.session.execute(db.select(GraphAnchor.kind, GraphAnchor.name, GraphAnchor.x, GraphAnchor.y)).all()
+    return {(kind, name): (x, y) for kind, name, x, y in rows}
+
+
+def _approved_clusters(recipe_ids=None) -> dict[tuple[str, str | None], list[int]]:
+    """{cluster key: [recipe ids in id order]} for approved recipes (optionally only `recipe_ids`)."""
+    stmt = (
+        db.select(Recipe.id, Recipe.cuisine, Recipe.protein_type)
+        .where(Recipe.status == 'approved')
+        .order_by(Recipe.id)
+    )
+    if recipe_ids is not None:
+        stmt = stmt.where(Recipe.id.in_(recipe_ids))
+    clusters = {}
+    for recipe_id, cuisine, protein in db.session.execute(stmt).all():
+        clusters.setdefault(cluster_key(cuisine, protein), []).append(recipe_id)
+    return clusters
+
+
+def _position_rows(anchors: dict, key, recipe_ids: list[int], first_slot: int = 0) -> list[dict]:
+    slots = np.arange(first_slot, first_slot + len(recipe_ids))
+    points = cluster_center(anchors, *key) + spiral_offsets(slots)
+    return [
+        {'recipe_id': recipe_id, 'x': float(x), 'y': float(y), 'slot': int(slot)}
+        for recipe_id, slot, (x, y) in zip(recipe_ids, slots, points)
+    ]
+
+
+def rebuild_layout() -> int:
+    """
+    Lays out the whole catalog from scratch (anchors and every recipe).
+    Does NOT commit. Returns the number of recipes placed.
+    """
+    clusters = _approved_clusters()
+    anchors = layout_anchors({key: len(ids) for key, ids in clusters.items()})
+    positions = []
+    for key, recipe_ids in clusters.items():
+        positions += _position_rows(anchors, key, recipe_ids)
+
+    db.session.execute(db.delete(RecipeGraphPosition))
+    db.session.execute(db.delete(GraphAnchor))
+    if anchors:
+        db.session.execute(db.insert(GraphAnchor), [
+            {'kind': kind, 'name': name, 'x': x, 'y': y} for (kind, name), (x, y) in anchors.items()
+        ])
+    if positions:
+        db.session.execute(db.insert(RecipeGraphPosition), positions)
+    # Positions moved without any recipe changing
+    bump_graph_version(RECIPE_GRAPH_SCOPE)
+    return len(positions)
+
+
+def _next_slot(key) -> int:
+    cuisine, protein = key
+    stmt = (
+        db.select(func.max(RecipeGraphPosition.slot))
+        .join(Recipe, Recipe.id == RecipeGraphPosition.recipe_id)
+        .where(func.coalesce(Recipe.cuisine, OTHER_CUISINE) == cuisine)
+        .where(Recipe.protein_type == protein if protein else Recipe.protein_type.is_(None))
+    )
+    last = db.session.execute(stmt).scalar()
+    return 0 if last is None else last + 1
+
+
+def sync_recipe_positions(recipe_ids) -> int:
+    """
+    Incremental update: drops the positions of `recipe_ids` and places the
+    approved ones at the next free slots of their clusters. A no-op until a
+    first full layout exists. Does NOT commit. Returns the number placed.
+    """
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return 0
+    anchors = _load_anchors()
+    if not anchors:
+        return 0
+    db.session.execute(db.delete(RecipeGraphPosition).where(RecipeGraphPosition.recipe_id.in_(recipe_ids)))
+    clusters = _approved_clusters(recipe_ids)
+
+    new_anchors = []
+    for cuisine, protein in clusters:
+        nodes = [('cuisine', cuisine)] + ([('protein', protein)] if protein else [])
+        for node in nodes:
+            if node not in anchors:
+                anchors[node] = place_new_anchor(anchors, node, [n for n in nodes if n != node])
+                new_anchors.append({'kind': node[0], 'name': node[1], 'x': anchors[node][0], 'y': anchors[node][1]})
+    if new_anchors:
+        db.session.execute(db.insert(GraphAnchor), new_anchors)
+
+    positions = []
+    for key, ids in clusters.items():
+        positions += _position_rows(anchors, key, ids, _next_slot(key))
+    if positions:
+        db.session.execute(db.insert(RecipeGraphPosition), positions)
+    return len(positions)
+
+
+# ---------------------------------------------------------------------------
+# Zoom levels
+# ---------------------------------------------------------------------------
+
+def cluster_graph(node_image) -> dict:
+    """
+    Zoom level 0: one node per cuisine / protein anchor (position + recipe
+    count), cuisine-protein links weighted by shared recipes, and the bounds
+    of all recipe positions. `node_image(kind, name)` gives an anchor's icon.
+    `built` is False until scripts/rebuild_galaxy_layout.py has run.
+    """
+    anchors = _load_anchors()
+    approved = Recipe.status == 'approved'
+    cuisine = func.coalesce(Recipe.cuisine, OTHER_CUISINE)
+
+    counts = {}
+    for name, count in db.session.execute(db.select(cuisine, func.count()).where(approved).group_by(cuisine)):
+        counts[('cuisine', name)] = count
+    for name, count in db.session.execute(
+            db.select(Recipe.protein_type, func.count())
+            .where(approved, Recipe.protein_type.is_not(None)).group_by(Recipe.protein_type)):
+        counts[('protein', name)] = count
+
+    nodes = [
+        {'id': anchor_id(kind, name), 'name': name, 'group': kind,
+         'image': node_image(kind, name), 'x': x, 'y': y, 'count': counts.get((kind, name), 0)}
+        for (kind, name), (x, y) in anchors.items()
+        if counts.get((kind, name))
+    ]
+    links = [
+        {'source': anchor_id('cuisine', c), 'target': anchor_id('protein', p), 'weight': n}
+        for c, p, n in db.session.execute(
+            db.select(cuisine, Recipe.protein_type, func.count())
+            .where(approved, Recipe.protein_type.is_not(None))
+            .group_by(cuisine, Recipe.protein_type)
+        )
+        if ('cuisine', c) in anchors and ('protein', p) in anchors
+    ]
+    x0, y0, x1, y1 = db.session.execute(db.select(
+        func.min(RecipeGraphPosition.x), func.min(RecipeGraphPosition.y),
+        func.max(RecipeGraphPosition.x), func.max(RecipeGraphPosition.y),
+    )).one()
+    bounds = None if x0 is None else [x0, y0, x1, y1]
+    return {'nodes': nodes, 'links': links, 'bounds': bounds, 'built': bool(anchors)}
+
+
+def parse_bbox(value: str | None) -> tuple[float, float, float, float]:
+    """'x0,y0,x1,y1' -> (min x, min y, max x, max y). Raises ValueError."""
+    try:
+        x0, y0, x1, y1 = (float(v) for v in (value or '').split(','))
+    except (TypeError, ValueError) as e:
+        raise ValueError("bbox must be 'x0,y0,x1,y1'") from e
+    if not all(math.isfinite(v) for v in (x0, y0, x1, y1)):
+        raise ValueError("bbox must be finite")
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+def recipe_positions(recipe_ids) -> dict[int, tuple[float, float]]:
+    """{recipe_id: (x, y)} for the placed recipes of `recipe_ids`."""
+    if not recipe_ids:
+        return {}
+    rows = db.session.execute(
+        db.select(RecipeGraphPosition.recipe_id, RecipeGraphPosition.x, RecipeGraphPosition.y)
+        .where(RecipeGraphPosition.recipe_id.in_(recipe_ids))
+    ).all()
+    return {recipe_id: (x, y) for recipe_id, x, y in rows}
+
+
+def viewport_graph(bbox, recipe_image, recipe_url, limit: int = VIEWPORT_LIMIT) -> dict:
+    """
+    Recipes placed inside `bbox` (cluster cores first, at most `limit`), each
+    linked to its cuisine and protein anchors. `truncated` tells the client
+    to zoom in for the rest.
+    """
+    x0, y0, x1, y1 = bbox
+    rows = db.session.execute(
+        db.select(Recipe.id, Recipe.title, Recipe.cuisine, Recipe.protein_type, Recipe.image_filename,
+                  RecipeGraphPosition.x, RecipeGraphPosition.y)
+        .join(Recipe, Recipe.id == RecipeGraphPosition.recipe_id)
+        .where(RecipeGraphPosition.x.between(x0, x1), RecipeGraphPosition.y.between(y0, y1),
+               Recipe.status == 'approved')
+        .order_by(RecipeGraphPosition.slot, RecipeGraphPosition.recipe_id)
+        .limit(limit + 1)
+    ).all()
+    truncated = len(rows) > limit
+
+    nodes, links = [], []
+    for r in rows[:limit]:
+        rec_id = f"recipe_{r.id}"
+        nodes.append({
+            'id': rec_id, 'name': r.title, 'group': 'recipe',
+            'image': recipe_image(r) if r.image_filename else None,
+            'url': recipe_url(r.id), 'x': r.x, 'y': r.y,
+        })
+        links.append({'source': rec_id, 'target': anchor_id('cuisine', r.cuisine or OTHER_CUISINE), 'weight': 1.0})
+        if r.protein_type:
+            links.append({'source': rec_id, 'target': anchor_id('protein', r.protein_type), 'weight': 1.0})
+    return {'nodes': nodes, 'links': links, 'truncated': truncated}
+
+
+# ---------------------------------------------------------------------------
+# Tracking: recipes approved / unapproved / re-tagged in a transaction are
+# (re)placed on commit.
+# ---------------------------------------------------------------------------
+
+@event.listens_for(db.session, 'after_flush')
+def _track_layout_changes(session, flush_context):
+    changed = set()
+    for obj in session.new:
+        if isinstance(obj, Recipe) and obj.status == 'approved':
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Recipe):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in LAYOUT_FIELDS):
+                changed.add(obj.id)
+    track(session, LAYOUT_HOOK, changed)
+
+
+@on_commit(LAYOUT_HOOK)
+def _sync_layout_on_commit(session, pending):
+    sync_recipe_positions(pending['ids'])
@@ -0,0 +1,126 @@
+"""
+Galaxy graph payload cache — serialized graph JSON per catalog version.
+
+The explore pages fetch one graph of the whole catalog (the recipe galaxy's
+clusters, /api/graph/ingredient-galaxy). Each worker keeps the last serialized payload
+per graph together with the cache_version it was built from; a request costs
+one version lookup, and the payload is rebuilt only after a write that can
+change the graph bumped that version (same scheme as the pantry snapshot).
+
+Responses carry a content-hash ETag, so a browser revalidating an unchanged
+graph gets a bodiless 304.
+"""
+
+import hashlib
+import json
+import threading
+from typing import NamedTuple
+
+from flask import current_app, request
+from sqlalchemy import event, inspect
+
+from database.models import db, Ingredient, Recipe
+from services.cache_version_service import RECIPE_GRAPH_SCOPE, INGREDIENT_GRAPH_SCOPE, get_version, bump_version
+
+# Columns the graphs read; other edits (nutrition, instructions, ...) keep the cached payload
+RECIPE_GRAPH_FIELDS = ('title', 'cuisine', 'protein_type', 'image_filename', 'status')
+INGREDIENT_GRAPH_FIELDS = ('name', 'image_url', 'main_category', 'sub_category', 'status')
+
+_BUMPED_KEY = 'graph_scopes_bumped'
+
+
+class GraphPayload(NamedTuple):
+    version: int
+    body: bytes
+    etag: str
+
+
+_payloads: dict[tuple[str, str], GraphPayload] = {}
+_build_lock = threading.Lock()
+
+
+def graph_payload(scope: str, build, variant: str = 'full') -> GraphPayload:
+    """
+    The serialized graph for `scope` (one cached payload per `variant`, e.g. a
+    zoom level), rebuilt with build() -> dict when the scope's version moved.
+    """
+    # Version first, rows second: a concurrent write can only make the payload newer than its label
+    version = get_version(scope)
+    payload = _payloads.get((scope, variant))
+    if payload is not None and payload.version == version:
+        return payload
+    with _build_lock:
+        payload = _payloads.get((scope, variant))
+        if payload is None or payload.version != version:
+            body = json.dumps(build(), separators=(',', ':')).encode()
+            payload = GraphPayload(version, body, hashlib.blake2b(body, digest_size=16).hexdigest())
+            _payloads[(scope, variant)] = payload
+            print(f"🌌 Built {scope}/{variant} payload v{version} ({len(body) // 1024} KB)")
+    return payload
+
+
+def graph_response(scope: str, build, variant: str = 'full'):
+    """JSON response for a graph, 304 when the request's If-None-Match still matches."""
+    payload = graph_payload(scope, build, variant)
+    response = current_app.response_class(payload.body, mimetype='application/json')
+    response.set_etag(payload.etag)
+    # Cacheable, but revalidated on every use so a new catalog shows up immediately
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def bump_graph_version(scope: str) -> None:
+    """Explicit bump for writes that bypass the ORM (bulk deletes, layout rebuilds). Call before committing."""
+    bump_version(scope)
+    db.session.info.setdefault(_BUMPED_KEY, set()).add(scope)
+
+
+# ---------------------------------------------------------------------------
+# Invalidation: flushed changes to graph columns bump the graph's version
+# inside the writer's transaction.
+# ---------------------------------------------------------------------------
+
+def _touches_recipe_graph(session) -> bool:
+    for obj in session.new:
+        if isinstance(obj, Recipe) and obj.status == 'approved':
+            return True
+    if any(isinstance(obj, Recipe) for obj in session.deleted):
+        return True
+    for obj in session.dirty:
+        if isinstance(obj, Recipe):
+            attrs = inspect(obj).attrs
+            was_approved = obj.status == 'approved' or 'approved' in (attrs.status.history.deleted or ())
+            if was_approved and any(attrs[field].history.has_changes() for field in RECIPE_GRAPH_FIELDS):
+                return True
+    return False
+
+
+def _touches_ingredient_graph(session) -> bool:
+    if any(isinstance(obj, Ingredient) for obj in (*session.new, *session.deleted)):
+        return True
+    for obj in session.dirty:
+        if isinstance(obj, Ingredient):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in INGREDIENT_GRAPH_FIELDS):
+                return True
+    return False
+
+
+@event.listens_for(db.session, 'before_flush')
+def _bump_graph_versions_on_flush(session, flush_context, instances):
+    bumped = session.info.setdefault(_BUMPED_KEY, set())
+    for scope, touches in ((RECIPE_GRAPH_SCOPE, _touches_recipe_graph),
+                           (INGREDIENT_GRAPH_SCOPE, _touches_ingredient_graph)):
+        if scope not in bumped and touches(session):
+            bump_version(scope, session.connection())
+            bumped.add(scope)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _reset_graph_flags_after_commit(session):
+    session.info.pop(_BUMPED_KEY, None)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _reset_graph_flags_after_rollback(session):
+    session.info.pop(_BUMPED_KEY, None)
@@ -1,4 +1,9 @@
 from database.models import db, Ingredient, RecipeIngredient, IngredientEvaluation
+from sqlalchemy.orm import selectinload
+from services.similarity_index import queue_signature_refresh
+from services.nutrition_propagation import queue_nutrition_refresh
+from services.recipe_protein_service import queue_protein_refresh
+from services.recipe_json_cache import bump_recipe_revisions
 import json
 
 def get_list_from_json(field_value):
@@ -14,6 +19,72 @@ def get_list_from_json(field_value):
         # If it's a raw string (e.g. from an old format or just bad data), wrap it
         return [str(field_value)]
 
+def _repoint_usages(winner_id: int, loser_id: int) -> tuple[int, int]:
+    """
+    Moves every RecipeIngredient of loser to winner with two set-based statements.
+    Recipes that already use the winner just lose the loser row (no duplicate
+    ingredient per recipe). Returns (count_updated, count_conflicts).
+    """
+    winner_recipes = db.select(RecipeIngredient.recipe_id).where(RecipeIngredient.ingredient_id == winner_id)
+    # Set-based statements skip the flush listeners; their recipes' ingredient sets change
+    affected = db.session.execute(
+        db.select(RecipeIngredient.recipe_id).where(RecipeIngredient.ingredient_id == loser_id)
+    ).scalars().all()
+    queue_signature_refresh(affected)
+    queue_nutrition_refresh(affected)
+    queue_protein_refresh(affected)
+    bump_recipe_revisions(affected)
+    conflicts = db.session.execute(
+        db.delete(RecipeIngredient)
+        .where(RecipeIngredient.ingredient_id == loser_id)
+        .where(RecipeIngredient.recipe_id.in_(winner_recipes))
+        .execution_options(synchronize_session='fetch')
+    ).rowcount
+    updated = db.session.execute(
+        db.update(RecipeIngredient)
+        .where(RecipeIngredient.ingredient_id == loser_id)
+        .values(ingredient_id=winner_id)
+        .execution_options(synchronize_session='fetch')
+    ).rowcount
+    return updated, conflicts
+
+
+def _merge_aliases(winner: Ingredient, loser: Ingredient):
+    """Appends loser.name and loser.aliases to winner.aliases (JSON array), skipping duplicates."""
+    # The prompt instructed: "Read the loser.name (and any strings in loser.aliases) and append them to the winner.aliases JSON array."
+    winner_aliases = get_list_from_json(winner.aliases)
+    loser_aliases = get_list_from_json(loser.aliases)
+
+    # We need to add the loser's primary name as an alias
+    strings_to_add = [loser.name] + loser_aliases
+
+    for string in strings_to_add:
+        # Add to winner if it's not the winner's actual name, and not already an alias
+        if string and string.lower() != winner.name.lower() and string not in [a.lower() for a in winner_aliases]:
+            winner_aliases.append(string)
+
+    winner.aliases = json.dumps(winner_aliases)
+
+
+def _delete_losers(loser_ids: list[int]):
+    """
+    Deletes merged-away ingredients through the ORM, so flush listeners (pantry
+    version, merge suggestions) see them. Loaded only after re-pointing, with
+    their (now empty) usages and evaluation in two batched queries.
+    """
+    losers = db.session.execute(
+        db.select(Ingredient)
+        .where(Ingredient.id.in_(loser_ids))
+        .options(selectinload(Ingredient.recipe_ingredients), selectinload(Ingredient.evaluation))
+        .execution_options(populate_existing=True)
+    ).scalars().all()
+    # (IngredientEvaluation has cascade="all, delete-orphan", so it dies with loser.
+    # If SubRecipe or PantryItem existed pointing to it, we'd need to re-point them here.
+    # But SubRecipe is linked via sub_recipe_id ON the ingredient, not pointing TO the ingredient.)
+    for loser in losers:
+        db.session.delete(loser)
+
+
 def merge_ingredients(winner_id: int, loser_id: int) -> dict:
     """
     Core merge logic.
@@ -30,53 +101,97 @@ def merge_ingredients(winner_id: int, loser_id: int) -> dict:
         return {"success": False, "message": "One or both ingredients not found."}
 
     try:
-        # 1. Re-point RecipeIngredients
-        # First, find if the recipe already has the winner. 
-        # If so, we just remove the loser usage to prevent duplicate FK violations.
-        usages = list(loser.recipe_ingredients)
-        count_updated = 0
-        count_conflicts = 0
-
-        for usage in usages:
-            recipe = usage.recipe
-            conflict = next((ri for ri in recipe.ingredients if ri.ingredient_id == winner.id), None)
-            
-            if conflict:
-                # The recipe already has the winner. We can't have two RecipeIngredients for the same ingredient in the same recipe (likely).
-                # We'll just delete the loser usage.
-                db.session.delete(usage)
-                count_conflicts += 1
-            else:
-                # Safe to move
-                usage.ingredient_id = winner.id
-                count_updated += 1
-                
+        winner_name, loser_name = winner.name, loser.name
+
+        # 1. Re-point RecipeIngredients (set-based; conflicting usages are dropped)
+        count_updated, count_conflicts = _repoint_usages(winner.id, loser.id)
+
         # 2. Merge Aliases
-        # The prompt instructed: "Read the loser.name (and any strings in loser.aliases) and append them to the winner.aliases JSON array."
-        winner_aliases = get_list_from_json(winner.aliases)
-        loser_aliases = get_list_from_json(loser.aliases)
-        
-        # We need to add the loser's primary name as an alias
-        strings_to_add = [loser.name] + loser_aliases
-        
-        for string in strings_to_add:
-            # Add to winner if it's not the winner's actual name, and not already an alias
-            if string and string.lower() != winner.name.lower() and string not in [a.lower() for a in winner_aliases]:
-                winner_aliases.append(string)
-                
-        winner.aliases = json.dumps(winner_aliases)
-
-        # 3. Destroy Loser 
-        # (IngredientEvaluation has cascade="all, delete-orphan", so it dies with loser. 
-        # If SubRecipe or PantryItem existed pointing to it, we'd need to re-point them here. 
-        # But SubRecipe is linked via sub_recipe_id ON the ingredient, not pointing TO the ingredient.)
-        db.session.delete(loser)
+        _merge_aliases(winner, loser)
+
+        # 3. Destroy Loser
+        _delete_losers([loser.id])
 
         db.session.commit()
         return {
             "success": True, 
-            "message": f"Successfully merged {loser.name} into {winner.name}. Updated {count_updated} recipes, deleted {count_conflicts} duplicates."
+            "message": f"Successfully merged {loser_name} into {winner_name}. Updated {count_updated} recipes, deleted {count_conflicts} duplicates."
         }
     except Exception as e:
         db.session.rollback()
         return {"success": False, "message": f"Merge failed due to a database error: {str(e)}"}
+
+
+def resolve_merge_chains(pairs: list[tuple[int, int]]) -> dict[int, int]:
+    """
+    Turns (winner_id, loser_id) pairs into {loser_id: final_winner_id}, following
+    chains (A→B plus B→C sends A to C). Raises ValueError on self-merges, on a
+    loser given two different winners, and on cycles.
+    """
+    target: dict[int, int] = {}
+    for winner_id, loser_id in pairs:
+        if winner_id == loser_id:
+            raise ValueError(f"Cannot merge ingredient {loser_id} into itself.")
+        if target.get(loser_id, winner_id) != winner_id:
+            raise ValueError(f"Ingredient {loser_id} has conflicting merge targets.")
+        target[loser_id] = winner_id
+
+    resolved: dict[int, int] = {}
+    for loser_id in target:
+        path, node = [], loser_id
+        while node in target and node not in resolved:
+            if node in path:
+                raise ValueError(f"Merge cycle detected involving ingredient {node}.")
+            path.append(node)
+            node = target[node]
+        root = resolved.get(node, node)
+        for step in path:
+            resolved[step] = root
+    return resolved
+
+
+def merge_ingredients_batch(pairs: list[tuple[int, int]]) -> dict:
+    """
+    Applies many (winner_id, loser_id) merges in ONE transaction.
+    Chains are resolved first, so every loser goes straight to its final
+    winner; each merge is two set-based statements plus the alias update.
+    Returns dict: {'success': bool, 'message': str, 'merged': [{'loser_id', 'winner_id'}, ...]}
+    """
+    try:
+        mapping = resolve_merge_chains(pairs)
+    except ValueError as e:
+        return {"success": False, "message": str(e), "merged": []}
+    if not mapping:
+        return {"success": False, "message": "No merge pairs given.", "merged": []}
+
+    ids = set(mapping) | set(mapping.values())
+    ingredients = {
+        ing.id: ing for ing in db.session.execute(
+            db.select(Ingredient).where(Ingredient.id.in_(ids))
+        ).scalars()
+    }
+    missing = sorted(ids - set(ingredients))
+    if missing:
+        return {"success": False, "message": f"Ingredients not found: {missing}", "merged": []}
+
+    try:
+        count_updated = count_conflicts = 0
+        # Oldest losers first, so same-recipe duplicates resolve like sequential merges
+        for loser_id in sorted(mapping):
+            winner_id = mapping[loser_id]
+            updated, conflicts = _repoint_usages(winner_id, loser_id)
+            count_updated += updated
+            count_conflicts += conflicts
+            _merge_aliases(ingredients[winner_id], ingredients[loser_id])
+
+        _delete_losers(list(mapping))
+        db.session.commit()
+        return {
+            "success": True,
+            "message": f"Successfully merged {len(mapping)} ingredients into {len(set(mapping.values()))} winners. "
+                       f"Updated {count_updated} recipes, deleted {count_conflicts} duplicates.",
+            "merged": [{"loser_id": l, "winner_id": w} for l, w in sorted(mapping.items())],
+        }
+    except Exception as e:
+        db.session.rollback()
+        return {"success": False, "message": f"Merge failed due to a database error: {str(e)}", "merged": []}
@@ -0,0 +1,100 @@
+"""
+Keyset (cursor) pagination for listing queries.
+
+A page is the listing's ORDER BY plus "strictly after the last row of the
+previous page" on the same sort keys, with LIMIT page_size + 1. Every page —
+the first included — is one bounded index range scan, however large the
+table gets, and rows inserted meanwhile never shift or duplicate results the
+way OFFSET does.
+
+The sort keys must be NOT NULL and end in a unique column (e.g. Recipe.id)
+so the order is total.
+"""
+
+import base64
+import datetime
+import json
+from typing import Any, NamedTuple
+
+from sqlalchemy import and_, or_, false
+
+from database.models import db
+
+PAGE_SIZE = 24
+
+
+class SortKey(NamedTuple):
+    expression: Any
+    descending: bool = False
+    kind: str = 'int'   # 'int' | 'bool' | 'datetime' — how cursor values are decoded
+
+
+def order_by_keys(keys: list[SortKey]) -> list:
+    return [k.expression.desc() if k.descending else k.expression.asc() for k in keys]
+
+
+def after_clause(keys: list[SortKey], values: list):
+    """(k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... with each comparison following its key's direction."""
+    clauses = []
+    for i, key in enumerate(keys):
+        if key.kind == 'bool':
+            # Booleans only support equality; the one value "beyond" v is (not v), if v is first in order
+            beyond = key.expression == (not values[i]) if values[i] == key.descending else false()
+        else:
+            beyond = key.expression < values[i] if key.descending else key.expression > values[i]
+        clauses.append(and_(*[k.expression == v for k, v in zip(keys[:i], values[:i])], beyond))
+    return or_(*clauses)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _decode_value(kind: str, raw):
+    if kind == 'datetime':
+        return datetime.datetime.fromisoformat(raw)
+    if kind == 'bool':
+        return bool(raw)
+    return int(raw)
+
+
+def encode_cursor(values: list) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(keys: list[SortKey], cursor: str) -> list:
+    """Raises ValueError for a cursor that doesn't fit `keys`."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw, list) or len(raw) != len(keys):
+            raise ValueError
+        return [_decode_value(k.kind, v) for k, v in zip(keys, raw)]
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_page(stmt, keys: list[SortKey], cursor: str | None = None,
+                page_size: int = PAGE_SIZE) -> tuple[list[tuple], str | None]:
+    """
+    Runs one page of `stmt` (which must not have its own ORDER BY/LIMIT).
+    Returns (rows, next_cursor); rows are tuples of stmt's own columns and
+    next_cursor is None on the last page.
+    """
+    width = len(stmt.column_descriptions)
+    stmt = stmt.add_columns(*[k.expression.label(f'_keyset_{i}') for i, k in enumerate(keys)])
+    stmt = stmt.order_by(*order_by_keys(keys))
+    if cursor:
+        stmt = stmt.where(after_clause(keys, decode_cursor(keys, cursor)))
+
+    rows = db.session.execute(stmt.limit(page_size + 1)).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(list(rows[-1][width:]))
+    return [tuple(row[:width]) for row in rows], next_cursor
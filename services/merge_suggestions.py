@@ -1,104 +1,259 @@
-from database.models import db, Ingredient, RecipeIngredient
-from thefuzz import fuzz
+"""
+Duplicate-ingredient detection for the admin merge tool.
+
+Suggestions live in the ingredient_merge_suggestion table. The first update
+builds it with a blocked scan: each ingredient is only compared against the
+names sharing the most trigrams/tokens with it (utils.pantry_matcher.NGramIndex),
+scored with one RapidFuzz cdist per chunk. After that, ingredients added,
+renamed or reactivated in a transaction are re-scored against the full
+active list when it commits (one cdist over the changed names). Deleted or
+deactivated ingredients drop their suggestions in the same flush.
+
+The first build is a one-off: scripts/rebuild_merge_suggestions.py or the
+merge tool's Build action (a POST). Until it has run, changes only queue up
+in ingredient_merge_queue and the tool shows that suggestions are not built;
+the build (or a Refresh) then covers everything queued. Reading the
+suggestions never writes.
+"""
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import aliased
+
+from database.models import db, Ingredient, RecipeIngredient, IngredientMergeSuggestion, IngredientMergeQueue
+from services.cache_version_service import MERGE_SUGGESTIONS_SCOPE, get_version, bump_version
+from services.commit_hooks import MERGE_HOOK, on_commit, track
+from utils.pantry_matcher import NGramIndex, preprocess_choice
+
+# Rule thresholds (unchanged from the original pairwise scan)
+CONTAINMENT_MIN_RATIO = 65   # "tomato" vs "sliced tomato" — floor avoids "oat milk" vs "goat milk"
+LEXICAL_MIN_RATIO = 88       # typos/plurals — high to keep "lemon juice" and "lime juice" apart
+SAME_CATEGORY_BOOST = 5
+
+# Full build: candidates kept per ingredient, and rows scored per cdist call
+MERGE_SHORTLIST_SIZE = 50
+SCAN_CHUNK_SIZE = 256
+
+
+def _suggest(a, b, ratio: int) -> dict | None:
+    """
+    Applies the merge rules to one pair of (id, lowercased name, main_category)
+    rows with a.id < b.id. The shorter name wins; ties go to the older row.
+    """
+    name_a, name_b = a[1], b[1]
+    if name_a == name_b:
+        return None
+    winner, loser = (a, b) if len(name_a) <= len(name_b) else (b, a)
+    bonus = SAME_CATEGORY_BOOST if a[2] == b[2] else 0
+
+    # --- Rule 1: Substring containment (e.g. "tomato" and "sliced tomato") ---
+    if (name_a in name_b or name_b in name_a) and ratio > CONTAINMENT_MIN_RATIO:
+        reason = "Base Ingredient vs Prep Style"
+    # --- Rule 2: High Lexical Similarity (e.g., misspellings, plurals) ---
+    elif ratio > LEXICAL_MIN_RATIO:
+        reason = "High Lexical Similarity (Typo/Plural)"
+    else:
+        return None
+    return {"winner_id": winner[0], "loser_id": loser[0], "score": ratio + bonus, "reason": reason}
+
+
+def _score_rows(rows: list, columns: list, candidate_cols=None) -> dict[tuple[int, int], dict]:
+    """
+    Scores rows × columns (restricted to candidate_cols positions if given)
+    in one cdist call and returns {(low_id, high_id): suggestion}.
+    """
+    cols = columns if candidate_cols is None else [columns[c] for c in candidate_cols]
+    if not rows or not cols:
+        return {}
+    scores = process.cdist([r[1] for r in rows], [c[1] for c in cols], scorer=fuzz.ratio,
+                           dtype=np.float64, score_cutoff=CONTAINMENT_MIN_RATIO, workers=-1)
+    found = {}
+    for r, c in zip(*np.nonzero(scores)):
+        a, b = rows[r], cols[c]
+        if a[0] == b[0]:
+            continue
+        if a[0] > b[0]:
+            a, b = b, a
+        if (a[0], b[0]) in found:
+            continue
+        # thefuzz-compatible rounding (the rules were tuned on rounded scores)
+        suggestion = _suggest(a, b, int(round(scores[r, c])))
+        if suggestion:
+            found[(a[0], b[0])] = suggestion
+    return found
+
+
+def _active_rows() -> list:
+    stmt = (db.select(Ingredient.id, Ingredient.name, Ingredient.main_category)
+            .where(Ingredient.status == 'active').order_by(Ingredient.id))
+    return [(r.id, (r.name or '').lower(), r.main_category) for r in db.session.execute(stmt).all()]
+
+
+def _insert(suggestions):
+    suggestions = list(suggestions)
+    if suggestions:
+        db.session.execute(db.insert(IngredientMergeSuggestion), suggestions)
+
+
+def rebuild_merge_suggestions() -> int:
+    """Full blocked scan over all active ingredients. Replaces the table; returns the suggestion count."""
+    rows = _active_rows()
+    index = NGramIndex([preprocess_choice(r[1]) for r in rows])
+    found = {}
+    for start in range(0, len(rows), SCAN_CHUNK_SIZE):
+        chunk = rows[start:start + SCAN_CHUNK_SIZE]
+        shortlists = [index.shortlist(preprocess_choice(r[1]), size=MERGE_SHORTLIST_SIZE) for r in chunk]
+        shortlists = [s for s in shortlists if s is not None]
+        if not shortlists:
+            continue
+        for pair, suggestion in _score_rows(chunk, rows, np.unique(np.concatenate(shortlists))).items():
+            found.setdefault(pair, suggestion)
+
+    db.session.execute(db.delete(IngredientMergeSuggestion))
+    db.session.execute(db.delete(IngredientMergeQueue))
+    _insert(found[pair] for pair in sorted(found))
+    bump_version(MERGE_SUGGESTIONS_SCOPE)
+    db.session.commit()
+    print(f"🧬 Merge suggestions rebuilt: {len(found)} pairs over {len(rows)} active ingredients")
+    return len(found)
+
+
+def _rescore(ingredient_ids) -> None:
+    """Replaces the suggestions of `ingredient_ids` (scored against every active ingredient) and unqueues them. Does NOT commit."""
+    ingredient_ids = list(ingredient_ids)
+    rows = _active_rows()
+    wanted = set(ingredient_ids)
+    found = _score_rows([r for r in rows if r[0] in wanted], rows)
+
+    db.session.execute(db.delete(IngredientMergeSuggestion).where(db.or_(
+        IngredientMergeSuggestion.winner_id.in_(ingredient_ids), IngredientMergeSuggestion.loser_id.in_(ingredient_ids)
+    )))
+    db.session.execute(db.delete(IngredientMergeQueue).where(IngredientMergeQueue.ingredient_id.in_(ingredient_ids)))
+    _insert(found[pair] for pair in sorted(found))
+
+
+def refresh_merge_suggestions() -> int:
+    """Re-scores every queued ingredient against every active one. Returns how many were processed."""
+    queued = db.session.execute(db.select(IngredientMergeQueue.ingredient_id)).scalars().all()
+    if not queued:
+        return 0
+    _rescore(queued)
+    db.session.commit()
+    return len(queued)
+
+
+def update_merge_suggestions(full: bool = False) -> int:
+    """
+    Builds the suggestion table (first run, or `full`) or re-scores the queued
+    ingredients. Commits; returns the suggestion count / ingredients processed.
+    """
+    if full or not merge_suggestions_built():
+        return rebuild_merge_suggestions()
+    return refresh_merge_suggestions()
+
+
+def merge_suggestions_built() -> bool:
+    return get_version(MERGE_SUGGESTIONS_SCOPE) > 0
+
+
+def pending_merge_changes() -> int:
+    """Ingredients queued since the last update (not reflected in the suggestions yet)."""
+    return db.session.execute(db.select(db.func.count()).select_from(IngredientMergeQueue)).scalar()
+
 
 def get_suggested_merges(limit=20):
     """
-    Finds potentially duplicate ingredients and suggests a 'winner' and 'loser' 
+    Finds potentially duplicate ingredients and suggests a 'winner' and 'loser'
     based on lexical similarity and string heuristics.
+
+    Read-only: the persisted suggestions as of the last update (see
+    update_merge_suggestions) plus one grouped usage-count query.
     """
-    ingredients = db.session.query(Ingredient).filter(Ingredient.status == 'active').all()
-    
-    candidates = []
-    
-    # Simple O(N^2) comparison. OK for < 10,000 items (1000 items is ~500k ops, <1 sec in pure python)
-    for i in ingredients:
-        for j in ingredients:
-            if i.id >= j.id: continue
-            
-            name_i = i.name.lower()
-            name_j = j.name.lower()
-            
-            # Filter out identical exact matches (usually impossible due to UI constraints, but just in case)
-            if name_i == name_j:
-                continue
-
-            # Category sanity check:
-            # We don't want to over-reach by merging things in different categories unless they are super close.
-            # But AI generated ingredients often have wrong categories, so we won't strictly forbid it,
-            # but we can prioritize those in the same category or penalize those that aren't.
-            same_cat = getattr(i, 'main_category', '') == getattr(j, 'main_category', '')
-
-            # --- Rule 1: Substring containment (e.g. "tomato" and "sliced tomato") ---
-            if name_i in name_j or name_j in name_i:
-                # Winner is usually the shorter, base name
-                if len(name_i) <= len(name_j):
-                    winner = i
-                    loser = j
-                else:
-                    winner = j
-                    loser = i
-                    
-                # Calculate similarity ratio
-                ratio = fuzz.ratio(name_i, name_j)
-                
-                # To avoid merging "oat milk" with "goat milk", we enforce a fuzz ratio floor
-                # even if one is a substring of the other.
-                if ratio > 65:
-                    candidates.append({
-                        "winner_id": winner.id,
-                        "winner_name": winner.name,
-                        "loser_id": loser.id,
-                        "loser_name": loser.name,
-                        "score": ratio + (5 if same_cat else 0), # Small boost for same category
-                        "reason": "Base Ingredient vs Prep Style"
-                    })
-                    continue
-
-            # --- Rule 2: High Lexical Similarity (e.g., misspellings, plurals) ---
-            ratio = fuzz.ratio(name_i, name_j)
-            if ratio > 88: # High threshold to prevent false positives like "lemon juice" and "lime juice"
-                # Tie-breaker: Shorter name wins (usually the singular form or without a typo letter)
-                if len(name_i) <= len(name_j):
-                    winner = i
-                    loser = j
-                else:
-                    winner = j
-                    loser = i
-
-                candidates.append({
-                    "winner_id": winner.id,
-                    "winner_name": winner.name,
-                    "loser_id": loser.id,
-                    "loser_name": loser.name,
-                    "score": ratio + (5 if same_cat else 0),
-                    "reason": "High Lexical Similarity (Typo/Plural)"
-                })
-
-    # Sort by descending score
-    candidates.sort(key=lambda x: x['score'], reverse=True)
-    
+    winner, loser = aliased(Ingredient), aliased(Ingredient)
+    stmt = (
+        db.select(IngredientMergeSuggestion, winner.name, loser.name)
+        .join(winner, IngredientMergeSuggestion.winner_id == winner.id)
+        .join(loser, IngredientMergeSuggestion.loser_id == loser.id)
+        .order_by(IngredientMergeSuggestion.score.desc(), IngredientMergeSuggestion.id)
+    )
+
     # Deduplicate: A loser can only be suggested once to prevent UX clutter
     seen_losers = set()
     final_list = []
-    
-    for c in candidates:
-        if c['loser_id'] not in seen_losers:
-            # Also prevent chains if needed, e.g., A -> B, B -> C. We just skip them for now for simplicity.
-            final_list.append(c)
-            seen_losers.add(c['loser_id'])
-            
-            if len(final_list) >= limit:
-                break
-                
-    # Gather additional info for the top matches
+    for s, winner_name, loser_name in db.session.execute(stmt):
+        if s.loser_id in seen_losers:
+            continue
+        seen_losers.add(s.loser_id)
+        final_list.append({
+            "winner_id": s.winner_id,
+            "winner_name": winner_name,
+            "loser_id": s.loser_id,
+            "loser_name": loser_name,
+            "score": s.score,
+            "reason": s.reason,
+            # Ingredient has no image_filename; the merge tool shows a placeholder
+            "winner_image": '',
+            "loser_image": '',
+        })
+        if len(final_list) >= limit:
+            break
+
+    ids = {c['winner_id'] for c in final_list} | {c['loser_id'] for c in final_list}
+    counts = dict(db.session.execute(
+        db.select(RecipeIngredient.ingredient_id, db.func.count(RecipeIngredient.id))
+        .where(RecipeIngredient.ingredient_id.in_(ids))
+        .group_by(RecipeIngredient.ingredient_id)
+    ).all()) if ids else {}
     for c in final_list:
-        winner = db.session.get(Ingredient, c['winner_id'])
-        loser = db.session.get(Ingredient, c['loser_id'])
-        
-        c['winner_image'] = winner.image_filename if hasattr(winner, 'image_filename') and winner.image_filename else ''
-        c['loser_image'] = loser.image_filename if hasattr(loser, 'image_filename') and loser.image_filename else ''
-        
-        c['winner_count'] = db.session.query(db.func.count(RecipeIngredient.id)).filter(RecipeIngredient.ingredient_id == winner.id).scalar()
-        c['loser_count'] = db.session.query(db.func.count(RecipeIngredient.id)).filter(RecipeIngredient.ingredient_id == loser.id).scalar()
+        c['winner_count'] = counts.get(c['winner_id'], 0)
+        c['loser_count'] = counts.get(c['loser_id'], 0)
 
     return final_list
+
+
+# ---------------------------------------------------------------------------
+# Incremental maintenance: queue added/renamed/reactivated ingredients and
+# drop suggestions of deleted/deactivated ones, in the writer's transaction;
+# re-score the queued ones on commit once the table is built.
+# ---------------------------------------------------------------------------
+
+@event.listens_for(db.session, 'after_flush')
+def _track_merge_candidates(session, flush_context):
+    enqueue, drop = set(), set()
+    for obj in session.new:
+        if isinstance(obj, Ingredient) and obj.status == 'active':
+            enqueue.add(obj.id)
+    for obj in session.dirty:
+        if not isinstance(obj, Ingredient):
+            continue
+        attrs = inspect(obj).attrs
+        if obj.status != 'active':
+            if attrs.status.history.has_changes():
+                drop.add(obj.id)
+        elif attrs.name.history.has_changes() or attrs.status.history.has_changes() \
+                or attrs.main_category.history.has_changes():
+            enqueue.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Ingredient):
+            drop.add(obj.id)
+
+    if not enqueue and not drop:
+        return
+    conn = session.connection()
+    if drop:
+        conn.execute(db.delete(IngredientMergeSuggestion).where(db.or_(
+            IngredientMergeSuggestion.winner_id.in_(drop), IngredientMergeSuggestion.loser_id.in_(drop)
+        )))
+    touched = enqueue | drop
+    conn.execute(db.delete(IngredientMergeQueue).where(IngredientMergeQueue.ingredient_id.in_(touched)))
+    if enqueue:
+        conn.execute(db.insert(IngredientMergeQueue), [{"ingredient_id": i} for i in enqueue])
+    track(session, MERGE_HOOK, enqueue)
+
+
+@on_commit(MERGE_HOOK)
+def _rescore_on_commit(session, pending):
+    # Before the first build the queue just accumulates; the build covers it
+    if merge_suggestions_built():
+        _rescore(pending['ids'])
@@ -0,0 +1,299 @@
+"""
+Vectorized nutrition engine for bulk recalculation.
+
+Same maths as recipe_service.recalculate_recipe_nutrition (sum of
+grams / 100 × nutrient_per_100g over a recipe's ingredients, missing
+values counting as 0), but for many recipes at once:
+
+  N  (ingredients × 11)  dense nutrient-per-100g matrix
+  G  (recipes × ingredients)  sparse gram_weight / 100 matrix
+  T = G @ N  →  every recipe's 11 totals in one product
+
+Totals are written back with one executemany UPDATE keyed by recipe id.
+
+Ingredients that are themselves recipes (Ingredient.sub_recipe_id) are
+valued at that recipe's per-100g profile (totals / total weight) instead of
+their own flat columns. The sub-recipe DAG is walked once in topological
+order so every profile is computed a single time per pass, however deeply
+it is nested; cycles are detected and broken (see sub_recipe_levels).
+
+A pass over given recipes (the commit-time propagation) only reads their
+lines, the ingredients those lines use and the sub-recipe links among them;
+only a whole-catalog pass (recalculate_all_recipes) loads the full matrices.
+"""
+
+from graphlib import TopologicalSorter, CycleError
+
+import numpy as np
+from scipy import sparse
+
+from database.models import db, Recipe, Ingredient, RecipeIngredient
+from services.unit_conversion import ConversionTable, get_conversion_table
+from services.recipe_json_cache import bump_recipe_revisions
+
+# (Recipe total column, Ingredient per-100g column)
+NUTRIENT_COLUMNS = (
+    ('total_calories', 'calories_per_100g'),
+    ('total_protein', 'protein_per_100g'),
+    ('total_carbs', 'carbs_per_100g'),
+    ('total_fat', 'fat_per_100g'),
+    ('total_saturated_fat', 'fat_saturated_per_100g'),
+    ('total_fiber', 'fiber_per_100g'),
+    ('total_sugar', 'sugar_per_100g'),
+    ('total_cholesterol_mg', 'cholesterol_mg_per_100g'),
+    ('total_sodium_mg', 'sodium_mg_per_100g'),
+    ('total_calcium_mg', 'calcium_mg_per_100g'),
+    ('total_potassium_mg', 'potassium_mg_per_100g'),
+)
+TOTAL_FIELDS = tuple(total for total, _ in NUTRIENT_COLUMNS)
+
+# (Recipe per-serving column, Recipe total column) — materialized for indexed filters
+PER_SERVING_COLUMNS = (
+    ('calories_per_serving', 'total_calories'),
+    ('protein_per_serving', 'total_protein'),
+    ('carbs_per_serving', 'total_carbs'),
+    ('fat_per_serving', 'total_fat'),
+)
+
+# Ids per IN (...) list; longer lists are queried in chunks
+IN_CHUNK_SIZE = 1000
+
+
+def _select_in(stmt, column, ids) -> list:
+    """All rows of `stmt` with `column` IN `ids`, queried IN_CHUNK_SIZE ids at a time (in id order)."""
+    ids = sorted({int(i) for i in ids})
+    rows = []
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        rows += db.session.execute(stmt.where(column.in_(ids[start:start + IN_CHUNK_SIZE]))).all()
+    return rows
+
+
+def per_serving_values(totals: dict, base_servings) -> dict:
+    """{per-serving column: total / servings} from a {total column: value} dict; servings <= 0 count as 1."""
+    servings = base_servings if base_servings and base_servings > 0 else 1
+    return {
+        column: (totals[total] / servings if totals.get(total) is not None else None)
+        for column, total in PER_SERVING_COLUMNS
+    }
+
+
+def load_nutrient_matrix(ingredient_ids=None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (ids, N): ingredient ids (sorted) and their float64 nutrient matrix,
+    columns in NUTRIENT_COLUMNS order, NULLs as 0. ingredient_ids=None means
+    every ingredient; unknown ids are left out.
+    """
+    columns = [getattr(Ingredient, per_100g) for _, per_100g in NUTRIENT_COLUMNS]
+    stmt = db.select(Ingredient.id, *columns).order_by(Ingredient.id)
+    if ingredient_ids is None:
+        rows = db.session.execute(stmt).all()
+    else:
+        rows = _select_in(stmt, Ingredient.id, ingredient_ids)
+
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    matrix = np.array([r[1:] for r in rows], dtype=np.float64).reshape(len(rows), len(NUTRIENT_COLUMNS))
+    return ids, np.nan_to_num(matrix, nan=0.0)
+
+
+def load_usage_rows(recipe_ids=None) -> list:
+    """(recipe_id, ingredient_id, gram_weight, amount, unit) of the lines of `recipe_ids` (default: every recipe)."""
+    stmt = db.select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.gram_weight,
+                     RecipeIngredient.amount, RecipeIngredient.unit)
+    if recipe_ids is None:
+        return db.session.execute(stmt).all()
+    return _select_in(stmt, RecipeIngredient.recipe_id, recipe_ids)
+
+
+def load_gram_matrix(recipe_ids: np.ndarray, ingredient_ids: np.ndarray,
+                     conversions: ConversionTable | None = None, rows=None) -> sparse.csr_matrix:
+    """
+    Sparse (recipes × ingredients) matrix of gram weight / 100, the gram
+    weight being the stored one or, when missing, amount + unit through the
+    shared conversion table (services.unit_conversion). Rows/columns follow
+    recipe_ids / ingredient_ids (both sorted); usages of unknown ingredients
+    and non-positive weights are skipped. `conversions` overrides the
+    worker's cached table; `rows` are already loaded usage rows
+    (load_usage_rows) covering recipe_ids.
+    """
+    if rows is None:
+        rows = load_usage_rows(recipe_ids)
+
+    conversions = conversions if conversions is not None else get_conversion_table()
+    gram_weights = conversions.resolve_gram_weights((r[1], r[3], r[4], r[2]) for r in rows)
+    usage = np.array([(r[0], r[1], g if g is not None else 0.0) for r, g in zip(rows, gram_weights)],
+                     dtype=np.float64).reshape(len(rows), 3)
+    recipe_col, ingredient_col, grams = usage[:, 0].astype(np.int64), usage[:, 1].astype(np.int64), usage[:, 2]
+
+    r_pos = np.searchsorted(recipe_ids, recipe_col)
+    i_pos = np.searchsorted(ingredient_ids, ingredient_col)
+    keep = (r_pos < len(recipe_ids)) & (i_pos < len(ingredient_ids)) & (grams > 0)
+    keep[keep] &= (recipe_ids[r_pos[keep]] == recipe_col[keep]) & (ingredient_ids[i_pos[keep]] == ingredient_col[keep])
+
+    # Duplicate (recipe, ingredient) usages are summed, like the per-row loop
+    return sparse.csr_matrix(
+        (grams[keep] / 100.0, (r_pos[keep], i_pos[keep])),
+        shape=(len(recipe_ids), len(ingredient_ids))
+    )
+
+
+def load_sub_recipe_links(ingredient_ids=None) -> dict[int, int]:
+    """{ingredient_id: sub_recipe_id} for ingredients that are themselves recipes (default: among all ingredients)."""
+    stmt = db.select(Ingredient.id, Ingredient.sub_recipe_id).where(Ingredient.sub_recipe_id.is_not(None))
+    if ingredient_ids is None:
+        return dict(db.session.execute(stmt).all())
+    return dict(_select_in(stmt, Ingredient.id, ingredient_ids))
+
+
+def sub_recipe_levels(graph: dict[int, set[int]]) -> tuple[list[list[int]], set[int]]:
+    """
+    Topological levels of a {recipe_id: sub_recipe_ids} graph, sub-recipes
+    first; every recipe in a level only depends on earlier levels. Cycles are
+    reported and broken: their members come back in the second value and
+    their links are treated as plain ingredients.
+    """
+    graph = {node: set(deps) for node, deps in graph.items()}
+    cyclic = set()
+    while True:
+        sorter = TopologicalSorter(graph)
+        try:
+            sorter.prepare()
+            break
+        except CycleError as e:
+            cycle = e.args[1]
+            print(f"⚠️ Sub-recipe cycle {' → '.join(map(str, cycle))}: using flat per-100g values for its links")
+            members = set(cycle)
+            cyclic |= members
+            for node in members:
+                graph.setdefault(node, set()).difference_update(members)
+
+    levels = []
+    while sorter.is_active():
+        ready = sorted(sorter.get_ready())
+        levels.append(ready)
+        sorter.done(*ready)
+    return levels, cyclic
+
+
+def _existing_ingredient_ids(ingredient_ids) -> list[int]:
+    return [r[0] for r in _select_in(db.select(Ingredient.id), Ingredient.id, ingredient_ids)]
+
+
+def _per_100g(totals: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Nutrients per 100 g of finished recipe (rows with no weight stay 0)."""
+    out = np.zeros_like(totals)
+    positive = weights > 0
+    out[positive] = totals[positive] / weights[positive, None] * 100.0
+    return out
+
+
+def load_sub_recipe_profiles(ingredient_ids=None, conversions: ConversionTable | None = None) -> dict[int, np.ndarray]:
+    """
+    {ingredient_id: per-100g nutrient row} for sub-recipe ingredients, from
+    their recipe's STORED totals over its gram weight (the gram weights
+    behind Recipe.total_weight_g, converted where missing). Ingredients whose
+    recipe has no weight are left out (they keep their flat columns).
+    """
+    links = load_sub_recipe_links(ingredient_ids)
+    if not links:
+        return {}
+    sub_ids = np.array(sorted(set(links.values())), dtype=np.int64)
+    columns = [getattr(Recipe, total) for total in TOTAL_FIELDS]
+    stored = dict((r[0], r[1:]) for r in _select_in(db.select(Recipe.id, *columns), Recipe.id, sub_ids))
+    totals = np.nan_to_num(np.array([stored.get(int(r), (None,) * len(TOTAL_FIELDS)) for r in sub_ids],
+                                    dtype=np.float64).reshape(len(sub_ids), len(TOTAL_FIELDS)), nan=0.0)
+
+    rows = load_usage_rows(sub_ids)
+    used_ids = np.array(sorted(_existing_ingredient_ids({r[1] for r in rows})), dtype=np.int64)
+    weights = np.asarray(load_gram_matrix(sub_ids, used_ids, conversions, rows).sum(axis=1)).ravel() * 100.0
+    profiles = _per_100g(totals, weights)
+    row_of = {int(r): i for i, r in enumerate(sub_ids)}
+    return {i: profiles[row_of[r]] for i, r in links.items() if weights[row_of[r]] > 0}
+
+
+def _rollup(ids: np.ndarray, grams: sparse.csr_matrix, ingredient_ids: np.ndarray, nutrients: np.ndarray,
+            links: dict[int, int], conversions: ConversionTable | None) -> np.ndarray:
+    """
+    G @ N with sub-recipe ingredients valued at their recipe's per-100g
+    profile. Recipes in this batch are computed level by level (sub-recipes
+    first) and each profile is computed once, then reused by every parent;
+    sub-recipes outside the batch contribute their stored totals.
+    """
+    positions = {}  # sub_recipe_id -> columns of the ingredients linking to it
+    for ingredient_id, sub_id in links.items():
+        pos = int(np.searchsorted(ingredient_ids, ingredient_id))
+        if pos < len(ingredient_ids) and ingredient_ids[pos] == ingredient_id:
+            positions.setdefault(sub_id, []).append(pos)
+    link_cols = np.array(sorted(p for cols in positions.values() for p in cols), dtype=np.int64)
+    sub_of_col = {p: sub_id for sub_id, cols in positions.items() for p in cols}
+
+    row_of = {int(r): i for i, r in enumerate(ids)}
+    deps = {int(r): set() for r in ids}
+    used = grams[:, link_cols].tocoo()
+    for row, col in zip(used.row, used.col):
+        deps[int(ids[row])].add(sub_of_col[int(link_cols[col])])
+
+    outside = set().union(*deps.values()) - row_of.keys()
+    if outside:
+        linking = [i for i, sub_id in links.items() if sub_id in outside]
+        for ingredient_id, profile in load_sub_recipe_profiles(linking, conversions).items():
+            nutrients[np.searchsorted(ingredient_ids, ingredient_id)] = profile
+
+    levels, cyclic = sub_recipe_levels({r: d & row_of.keys() for r, d in deps.items()})
+    totals = np.zeros((len(ids), len(NUTRIENT_COLUMNS)))
+    weights = np.asarray(grams.sum(axis=1)).ravel() * 100.0
+    for level in levels:
+        rows = np.array([row_of[r] for r in level], dtype=np.int64)
+        totals[rows] = np.asarray(grams[rows] @ nutrients)
+        profiles = _per_100g(totals[rows], weights[rows])
+        for recipe_id, row, profile in zip(level, rows, profiles):
+            if recipe_id in positions and recipe_id not in cyclic and weights[row] > 0:
+                nutrients[positions[recipe_id]] = profile
+    return totals
+
+
+def compute_recipe_totals(recipe_ids=None, conversions: ConversionTable | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (recipe_ids, T) where T[i] holds recipe_ids[i]'s totals in
+    TOTAL_FIELDS order. recipe_ids=None means every recipe. Ingredients
+    linked to a sub-recipe count with that recipe's rolled-up profile.
+    """
+    stmt = db.select(Recipe.id).order_by(Recipe.id)
+    if recipe_ids is None:
+        ids = np.array(db.session.execute(stmt).scalars().all(), dtype=np.int64)
+        rows = load_usage_rows()
+        ingredient_ids, nutrients = load_nutrient_matrix()
+        links = load_sub_recipe_links()
+    else:
+        # Only what these recipes use: sub-recipes outside the batch count with their stored totals
+        ids = np.array([r[0] for r in _select_in(stmt, Recipe.id, recipe_ids)], dtype=np.int64)
+        rows = load_usage_rows(ids)
+        ingredient_ids, nutrients = load_nutrient_matrix({r[1] for r in rows})
+        links = load_sub_recipe_links(ingredient_ids)
+    grams = load_gram_matrix(ids, ingredient_ids, conversions, rows)
+    if not links or not len(ids):
+        return ids, np.asarray(grams @ nutrients)
+    return ids, _rollup(ids, grams, ingredient_ids, nutrients, links, conversions)
+
+
+def recalculate_nutrition_bulk(recipe_ids=None, conversions: ConversionTable | None = None) -> int:
+    """
+    Recomputes and writes the 11 nutrition totals (and the per-serving
+    columns) of the given recipes (default: the whole catalog) with a single
+    bulk UPDATE. Flushes; the
+    caller commits. Returns the number of recipes updated.
+    """
+    ids, totals = compute_recipe_totals(recipe_ids, conversions)
+    if not len(ids):
+        return 0
+    stmt = db.select(Recipe.id, Recipe.base_servings)
+    servings = dict(db.session.execute(stmt).all() if recipe_ids is None else _select_in(stmt, Recipe.id, ids))
+
+    params = []
+    for recipe_id, row in zip(ids, totals):
+        values = dict(zip(TOTAL_FIELDS, row.tolist()))
+        params.append({"id": int(recipe_id), **values, **per_serving_values(values, servings.get(int(recipe_id)))})
+    db.session.execute(db.update(Recipe), params)
+    # Bulk UPDATEs skip the flush listeners
+    bump_recipe_revisions(p["id"] for p in params)
+    db.session.flush()
+    return len(params)
@@ -0,0 +1,185 @@
+"""
+Incremental nutrition propagation.
+
+Recipe totals are derived from their ingredients' per-100g values, so editing
+an ingredient (/api/update-ingredient-data, a nutrition backfill) leaves every
+recipe that uses it stale. The flush listener below records which ingredients'
+nutrient columns, unit data or sub-recipe link changed; at commit time the
+affected recipes — direct users plus everything reaching them through
+Ingredient.sub_recipe_id — are recomputed with one bulk UPDATE in the same
+transaction.
+
+Edits to the lines of a recipe that is used as a sub-recipe propagate the
+same way, to the recipe itself and every recipe above it. Writes that bypass
+the ORM (set-based ingredient merges) queue their recipes with
+queue_nutrition_refresh().
+
+Changes are coalesced per transaction. Scripts that commit once per
+ingredient can wrap their loop in deferred_nutrition_propagation() to get a
+single pass at the end instead of one per commit.
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event, inspect
+
+from database.models import db, Ingredient, Recipe, RecipeIngredient
+from services.commit_hooks import NUTRITION_HOOK, on_commit, take_pending, track
+from services.nutrition_engine import (
+    NUTRIENT_COLUMNS, PER_SERVING_COLUMNS, per_serving_values, recalculate_nutrition_bulk
+)
+from services.unit_conversion import CONVERSION_FIELDS
+
+# Nutrient values, unit data (for lines without a stored gram_weight) and the sub-recipe link
+PROPAGATION_FIELDS = tuple(per_100g for _, per_100g in NUTRIENT_COLUMNS) + CONVERSION_FIELDS + ('sub_recipe_id',)
+
+_DEFERRED_KEY = 'nutrition_deferred_changes'
+
+# RecipeIngredient columns that change a recipe's totals
+LINE_FIELDS = ('recipe_id', 'ingredient_id', 'amount', 'unit', 'gram_weight')
+
+
+def affected_recipe_ids(ingredient_ids=(), recipe_ids=()) -> set[int]:
+    """
+    Reverse dependency walk: `recipe_ids` and the recipes using any of
+    `ingredient_ids`, then recipes using an ingredient whose sub-recipe is
+    affected, until nothing new turns up. Cycles stop at already-visited recipes.
+    """
+    affected: set[int] = set()
+    frontier = set(ingredient_ids)
+    recipes = set(recipe_ids)
+    while frontier or recipes:
+        if frontier:
+            recipes |= set(db.session.execute(
+                db.select(RecipeIngredient.recipe_id).distinct()
+                .where(RecipeIngredient.ingredient_id.in_(frontier))
+            ).scalars())
+        recipes -= affected
+        if not recipes:
+            break
+        affected |= recipes
+        frontier = set(db.session.execute(
+            db.select(Ingredient.id).where(Ingredient.sub_recipe_id.in_(recipes))
+        ).scalars())
+        recipes = set()
+    return affected
+
+
+def propagate_ingredient_changes(ingredient_ids=(), recipe_ids=()) -> int:
+    """
+    Recomputes totals for every recipe depending on `ingredient_ids` (and for
+    `recipe_ids` plus their parents). The engine orders the batch so nested
+    sub-recipes are recomputed before the recipes using them. Flushes; the
+    caller commits.
+    """
+    affected = affected_recipe_ids(ingredient_ids, recipe_ids)
+    if not affected:
+        return 0
+    # A transaction that edited unit data gets a fresh conversion table (see get_conversion_table)
+    updated = recalculate_nutrition_bulk(affected)
+    print(f"🥗 Nutrition propagated: {len(set(ingredient_ids))} ingredient(s), "
+          f"{len(set(recipe_ids))} recipe(s) → {updated} recipe(s)")
+    return updated
+
+
+def queue_nutrition_refresh(recipe_ids) -> None:
+    """For line writes that bypass the ORM (e.g. ingredient merges): recompute these recipes and their parents at commit."""
+    track(db.session(), NUTRITION_HOOK, recipe_ids, kind='totals')
+
+
+def _sub_recipes_among(recipe_ids) -> set[int]:
+    """The given recipes that some ingredient links to as its sub-recipe."""
+    if not recipe_ids:
+        return set()
+    return set(db.session.execute(
+        db.select(Ingredient.sub_recipe_id).distinct().where(Ingredient.sub_recipe_id.in_(recipe_ids))
+    ).scalars())
+
+
+@contextmanager
+def deferred_nutrition_propagation():
+    """
+    Collects ingredient changes across every commit inside the block and
+    propagates them once on exit (then commits). Changes from rolled-back
+    transactions are not carried over.
+    """
+    session = db.session()
+    if _DEFERRED_KEY in session.info:
+        # Nested: the outermost block does the pass
+        yield
+        return
+    session.info[_DEFERRED_KEY] = (set(), set(), set())
+    try:
+        yield
+    finally:
+        ingredients, recipes, totals = session.info.pop(_DEFERRED_KEY)
+    # Anything flushed but not yet committed joins this final pass
+    pending = take_pending(session, NUTRITION_HOOK)
+    ingredients |= pending.get('ingredients', set())
+    recipes |= pending.get('recipes', set())
+    recipes = _sub_recipes_among(recipes) | totals | pending.get('totals', set())
+    if ingredients or recipes:
+        propagate_ingredient_changes(ingredients, recipes)
+    db.session.commit()
+
+
+# ---------------------------------------------------------------------------
+# Tracking: remember changed ingredients per transaction, propagate on commit.
+# ---------------------------------------------------------------------------
+
+@event.listens_for(db.session, 'after_flush')
+def _track_nutrition_changes(session, flush_context):
+    changed, lines = set(), set()
+    for obj in session.dirty:
+        if isinstance(obj, Ingredient):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in PROPAGATION_FIELDS):
+                changed.add(obj.id)
+        elif isinstance(obj, RecipeIngredient):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in LINE_FIELDS):
+                lines.add(obj.recipe_id)
+                lines.update(attrs.recipe_id.history.deleted or ())
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, RecipeIngredient):
+            lines.add(obj.recipe_id)
+    track(session, NUTRITION_HOOK, changed, kind='ingredients')
+    track(session, NUTRITION_HOOK, lines, kind='recipes')
+
+
+@on_commit(NUTRITION_HOOK)
+def _propagate_on_commit(session, pending):
+    changed = pending.get('ingredients', set())
+    lines = pending.get('recipes', set())
+    stale = pending.get('totals', set())
+    if _DEFERRED_KEY in session.info:
+        ingredients, recipes, totals = session.info[_DEFERRED_KEY]
+        ingredients |= changed
+        recipes |= lines
+        totals |= stale
+        return
+    # ORM-edited recipes only need a pass when they are used as sub-recipes
+    # (their own totals are maintained by whoever edited them); queued ones always do
+    recipes = _sub_recipes_among(lines) | stale
+    if changed or recipes:
+        propagate_ingredient_changes(changed, recipes)
+
+
+# ---------------------------------------------------------------------------
+# Per-serving columns: recomputed in the same flush whenever an ORM write
+# changes a recipe's totals or servings (the bulk engine sets them itself).
+# ---------------------------------------------------------------------------
+
+_PER_SERVING_INPUTS = tuple(total for _, total in PER_SERVING_COLUMNS) + ('base_servings',)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _sync_per_serving_columns(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty):
+        if not isinstance(obj, Recipe):
+            continue
+        attrs = inspect(obj).attrs
+        if obj in session.new or any(attrs[field].history.has_changes() for field in _PER_SERVING_INPUTS):
+            totals = {total: getattr(obj, total) for _, total in PER_SERVING_COLUMNS}
+            for column, value in per_serving_values(totals, obj.base_servings).items():
+                setattr(obj, column, value)
@@ -1,5 +1,6 @@
 from database.models import Recipe, Ingredient, RecipeIngredient
 from database.models import db
+from services.unit_conversion import get_conversion_table
 
 def calculate_nutritional_totals(recipe_id):
     """
@@ -20,48 +21,18 @@ def calculate_nutritional_totals(recipe_id):
         "sugar": 0.0
     }
 
-    # Weight Conversions (Simplified for Standard Units)
-    # Ideally this would use a robust unit conversion library or table
-    UNIT_TO_GRAMS = {
-        'g': 1.0,
-        'kg': 1000.0,
-        'mg': 0.001,
-        'oz': 28.35,
-        'lb': 453.59,
-        'ml': 1.0, # Water density assumption fallback
-        'l': 1000.0,
-        'tbsp': 15.0, # Water density
-        'tsp': 5.0,   # Water density
-        'cup': 240.0, # Water density
-        'pinch': 0.5,
-        'clove': 5.0, # Garlic
-        'piece': 100.0, # Major assumption, prone to error without specific item data
-        'unit': 100.0   # Same as piece
-    }
+    # 1. Determine Gram Weights (stored gram_weight, else amount + unit via the shared conversion table)
+    usages = list(recipe.ingredients)
+    gram_weights = get_conversion_table().resolve_gram_weights(
+        (ri.ingredient_id, ri.amount, ri.unit, ri.gram_weight) for ri in usages
+    )
 
-    for ri in recipe.ingredients:
+    for ri, grams in zip(usages, gram_weights):
         ing = ri.ingredient
         if not ing: continue
 
-        # 1. Determine Gram Weight
-        grams = 0.0
-        unit_lower = ri.unit.lower().strip()
-        
-        # Check if ingredient has a specific density for 'unit' types (like 1 'unit' or 'serving')
-        if ing.average_g_per_unit and unit_lower in ['unit', 'piece', 'serving', 'slices', 'slice']:
-             grams = ri.amount * ing.average_g_per_unit
-        
-        # Use Standard Conversion Table
-        elif unit_lower in UNIT_TO_GRAMS:
-             grams = ri.amount * UNIT_TO_GRAMS[unit_lower]
-        
-        # Fallback for known specific words
-        elif 'onion' in ing.name.lower() and unit_lower in ['unit', 'whole']:
-             grams = ri.amount * 150.0 # Medium Onion
-        
-        # Ultimate Fallback: Treat as grams if unknown (Dangerous but better than 0 for logic flow?)
-        # Or just Skip? Let's Skip but log implicitly by not adding.
-        if grams <= 0:
+        # Unconvertible units are skipped rather than guessed
+        if grams is None or grams <= 0:
             continue
 
         # 2. Add Nutrients (Nutrient per 100g * (grams / 100))
@@ -1,10 +1,34 @@
+import json
+import threading
+import time
+
+from flask import has_app_context
+from sqlalchemy import event, inspect
+
+import ai_engine
 from database.models import db, Ingredient
+from services.cache_version_service import PANTRY_SCOPE, EMBEDDING_SCOPE, get_versions, bump_version
+from utils.vector_index import VectorIndex
 
-def get_slim_pantry_context():
+# How long a worker trusts its pantry snapshot before re-reading the DB
+# version (one PK lookup). Local writes reset the timer on commit.
+PANTRY_VERSION_CHECK_SECONDS = 5.0
+
+# Ingredient columns that feed the pantry snapshot / slim context
+PANTRY_FIELDS = ('food_id', 'name', 'main_category', 'default_unit', 'tags', 'is_staple', 'status', 'aliases')
+
+# Ingredient columns that feed the embedding index (semantic fallback)
+EMBEDDING_FIELDS = ('food_id', 'name', 'main_category', 'status', 'embedding')
+
+_refresh_lock = threading.Lock()
+_last_version_check = 0.0
+
+
+def _query_slim_pantry_context():
     """
     Provides the AI with the ingredient definition, including tags for filtering.
     Returns a minified list of dictionaries with abbreviated keys to save tokens.
-    
+
     Keys:
     i: food_id
     n: name
@@ -22,7 +46,7 @@ def get_slim_pantry_context():
         Ingredient.is_staple
     ).where(db.and_(Ingredient.status == 'active', Ingredient.main_category != 'Imported'))
     results = db.session.execute(stmt).all()
-    
+
     slim_context = []
     for row in results:
         slim_context.append({
@@ -33,5 +57,156 @@ def get_slim_pantry_context():
             "t": row.tags if row.tags else "",
             "s": bool(row.is_staple)
         })
-        
+
     return slim_context
+
+
+def _query_pantry_aliases() -> dict[str, list[str]]:
+    """
+    {food_id: [alias, ...]} for active ingredients with aliases (merged-away
+    names, see ingredient_service.merge_ingredients). Feeds the matcher's
+    blocking index only — aliases are not part of the LLM context.
+    """
+    stmt = db.select(Ingredient.food_id, Ingredient.aliases).where(db.and_(
+        Ingredient.status == 'active',
+        Ingredient.aliases.is_not(None),
+        Ingredient.aliases != '[]'
+    ))
+    aliases = {}
+    for food_id, raw in db.session.execute(stmt).all():
+        try:
+            names = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+        names = [n for n in names if isinstance(n, str) and n]
+        if names:
+            aliases[food_id] = names
+    return aliases
+
+
+def _query_embedding_index(version: int) -> VectorIndex:
+    """Embeddings of the same ingredients the pantry snapshot holds, as a VectorIndex."""
+    stmt = db.select(Ingredient.food_id, Ingredient.name, Ingredient.embedding).where(db.and_(
+        Ingredient.status == 'active',
+        Ingredient.main_category != 'Imported',
+        Ingredient.embedding.is_not(None)
+    ))
+    rows = db.session.execute(stmt).all()
+    return VectorIndex([r.food_id for r in rows], [r.name for r in rows], [r.embedding for r in rows], version)
+
+
+def get_pantry_snapshot() -> ai_engine.PantrySnapshot:
+    """
+    Returns the worker's current PantrySnapshot, rebuilding it only when the
+    DB pantry version moved. Within PANTRY_VERSION_CHECK_SECONDS of the last
+    check this does no DB work at all. The embedding index used for the
+    semantic fallback is refreshed the same way, on its own version.
+
+    Only one thread rebuilds; the others keep serving the previous snapshot
+    meanwhile (unless there is none yet, in which case they wait for it).
+    """
+    global _last_version_check
+    snapshot = ai_engine.current_pantry_snapshot()
+    if snapshot.version is not None and time.monotonic() - _last_version_check < PANTRY_VERSION_CHECK_SECONDS:
+        return snapshot
+
+    if not _refresh_lock.acquire(blocking=snapshot.version is None):
+        return snapshot
+    try:
+        snapshot = ai_engine.current_pantry_snapshot()
+        checked_at = time.monotonic()
+        # Read the version BEFORE the rows: a concurrent write can then only
+        # make the snapshot newer than its label (rebuilt again next check),
+        # never older.
+        versions = get_versions(PANTRY_SCOPE, EMBEDDING_SCOPE)
+        if versions[PANTRY_SCOPE] != snapshot.version:
+            ai_engine.set_pantry_memory(_query_slim_pantry_context(), version=versions[PANTRY_SCOPE],
+                                        aliases=_query_pantry_aliases())
+        if versions[EMBEDDING_SCOPE] != ai_engine.current_embedding_index().version:
+            ai_engine.set_embedding_index(_query_embedding_index(versions[EMBEDDING_SCOPE]))
+        _last_version_check = checked_at
+        return ai_engine.current_pantry_snapshot()
+    finally:
+        _refresh_lock.release()
+
+
+def _lookup_snapshot() -> ai_engine.PantrySnapshot:
+    # Outside an app context (offline scripts) there is no DB to check the version against
+    return get_pantry_snapshot() if has_app_context() else ai_engine.current_pantry_snapshot()
+
+
+# ai_engine's name resolution (get_pantry_id / get_pantry_ids) reads through
+# the version check too, so a worker that only resolves names still picks up
+# other workers' synonyms and ingredients.
+ai_engine.set_snapshot_provider(_lookup_snapshot)
+
+
+def get_slim_pantry_context():
+    """
+    Slim pantry context for LLM prompts (see _query_slim_pantry_context for keys),
+    served from the versioned pantry snapshot. The returned tuple is shared —
+    do not mutate its items.
+    """
+    return get_pantry_snapshot().slim_context
+
+
+def bump_pantry_version():
+    """
+    Explicit bump for pantry changes that don't flush an Ingredient row
+    (e.g. synonyms). Call before committing the session.
+    """
+    bump_version(PANTRY_SCOPE)
+    db.session.info.setdefault('cache_scopes_bumped', set()).add(PANTRY_SCOPE)
+
+
+def expire_pantry_snapshot():
+    """Forces the next get_pantry_snapshot() in this worker to re-check the DB version."""
+    global _last_version_check
+    _last_version_check = 0.0
+
+
+# ---------------------------------------------------------------------------
+# Invalidation: any flushed change to a pantry-relevant (or embedding-relevant)
+# Ingredient column bumps that scope's version inside the same transaction.
+# ---------------------------------------------------------------------------
+
+def _is_or_was_active(obj: Ingredient) -> bool:
+    """Only active ingredients are in the snapshot (pending/inactive ones are not)."""
+    history = inspect(obj).attrs.status.history
+    return obj.status == 'active' or 'active' in (history.deleted or ())
+
+
+def _touches(session, fields: tuple) -> bool:
+    for obj in session.new:
+        # status defaults to 'active' when not set explicitly
+        if isinstance(obj, Ingredient) and obj.status in (None, 'active'):
+            return True
+    for obj in session.deleted:
+        if isinstance(obj, Ingredient) and _is_or_was_active(obj):
+            return True
+    for obj in session.dirty:
+        if isinstance(obj, Ingredient) and _is_or_was_active(obj):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in fields):
+                return True
+    return False
+
+
+@event.listens_for(db.session, 'before_flush')
+def _bump_cache_versions_on_flush(session, flush_context, instances):
+    bumped = session.info.setdefault('cache_scopes_bumped', set())
+    for scope, fields in ((PANTRY_SCOPE, PANTRY_FIELDS), (EMBEDDING_SCOPE, EMBEDDING_FIELDS)):
+        if scope not in bumped and _touches(session, fields):
+            bump_version(scope, session.connection())
+            bumped.add(scope)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _expire_pantry_after_commit(session):
+    if session.info.pop('cache_scopes_bumped', None):
+        expire_pantry_snapshot()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _reset_pantry_flag_after_rollback(session):
+    session.info.pop('cache_scopes_bumped', None)
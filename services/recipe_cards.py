@@ -0,0 +1,98 @@
+"""
+Recipe card projection — what a recipe card shows, in one column-only query.
+
+The feed, the /recipes library, collections and the mirror results only need
+a handful of scalar columns plus the diet and meal-type labels. Selecting
+those columns (with the labels aggregated by correlated subqueries on the
+recipe_diet / recipe_meal_type primary keys) makes a page of N cards a single
+query, with no Recipe entities hydrated and no per-card lazy loads.
+
+Cards are read-only. Routes that edit a recipe keep loading the entity.
+"""
+
+from typing import NamedTuple, Optional
+
+from sqlalchemy import func
+
+from database.models import db, Recipe, RecipeDiet, RecipeMealType
+
+# Joins the aggregated labels; none of the diet / meal-type vocabularies contain it
+LABEL_SEPARATOR = '|'
+
+CARD_COLUMNS = (
+    Recipe.id,
+    Recipe.title,
+    Recipe.cuisine,
+    Recipe.difficulty,
+    Recipe.protein_type,
+    Recipe.image_filename,
+    Recipe.prep_time_mins,
+    Recipe.total_calories,
+    Recipe.base_servings,
+)
+
+
+class RecipeCard(NamedTuple):
+    id: int
+    title: str
+    cuisine: Optional[str]
+    difficulty: Optional[str]
+    protein_type: Optional[str]
+    image_filename: Optional[str]
+    prep_time_mins: Optional[int]
+    total_calories: Optional[float]
+    base_servings: Optional[int]
+    diets_list: list[str]
+    meal_types_list: list[str]
+    # Per-user extras, filled in by the views that select them
+    is_super_liked: bool = False
+    is_made: bool = False
+    queue_position: Optional[int] = None
+
+
+def _labels(model, column):
+    return (
+        db.select(func.aggregate_strings(column, LABEL_SEPARATOR))
+        .where(model.recipe_id == Recipe.id)
+        .scalar_subquery()
+    )
+
+
+def card_columns() -> tuple:
+    """The card columns and label subqueries, for statements that do not select from recipe first."""
+    return (
+        *CARD_COLUMNS,
+        _labels(RecipeDiet, RecipeDiet.diet).label('diets'),
+        _labels(RecipeMealType, RecipeMealType.meal_type).label('meal_types'),
+    )
+
+
+def card_select(*extra_columns):
+    """SELECT of the card columns (then `extra_columns`) from recipe; add joins / WHERE as needed."""
+    return db.select(*card_columns(), *extra_columns).select_from(Recipe)
+
+
+def split_labels(value: str | None) -> list[str]:
+    return sorted(value.split(LABEL_SEPARATOR)) if value else []
+
+
+def cards_from_rows(rows, extras: tuple[str, ...] = ()) -> list[RecipeCard]:
+    """
+    RecipeCards from rows of card_select(); `extras` names the RecipeCard
+    fields that the statement's extra columns fill, in order.
+    """
+    width = len(CARD_COLUMNS)
+    cards = []
+    for row in rows:
+        card = RecipeCard(*row[:width],
+                          diets_list=split_labels(row[width]),
+                          meal_types_list=split_labels(row[width + 1]))
+        if extras:
+            card = card._replace(**dict(zip(extras, row[width + 2:])))
+        cards.append(card)
+    return cards
+
+
+def load_cards(stmt, extras: tuple[str, ...] = ()) -> list[RecipeCard]:
+    """Runs a card_select() statement."""
+    return cards_from_rows(db.session.execute(stmt).all(), extras)
@@ -0,0 +1,48 @@
+"""
+Per-serving nutrition range filters for recipe listings.
+
+Query params min_<macro> / max_<macro> (per serving, inclusive) map onto the
+materialized, indexed Recipe.*_per_serving columns, so a filter like
+"max_calories=600&min_protein=30" is a plain range predicate in SQL.
+"""
+
+from database.models import Recipe
+
+# macro -> (column, label, unit) for the filter forms
+NUTRITION_RANGE_FILTERS = {
+    'calories': (Recipe.calories_per_serving, 'Calories', 'kcal'),
+    'protein': (Recipe.protein_per_serving, 'Protein', 'g'),
+    'carbs': (Recipe.carbs_per_serving, 'Carbs', 'g'),
+    'fat': (Recipe.fat_per_serving, 'Fat', 'g'),
+}
+
+
+def _parse_bound(value) -> float | None:
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        bound = float(value)
+    except (TypeError, ValueError):
+        return None
+    return bound if bound >= 0 else None
+
+
+def parse_nutrition_ranges(args) -> dict[str, tuple[float | None, float | None]]:
+    """{macro: (min, max)} for the macros with at least one valid bound in `args` (request.args)."""
+    ranges = {}
+    for macro in NUTRITION_RANGE_FILTERS:
+        low, high = _parse_bound(args.get(f'min_{macro}')), _parse_bound(args.get(f'max_{macro}'))
+        if low is not None or high is not None:
+            ranges[macro] = (low, high)
+    return ranges
+
+
+def apply_nutrition_ranges(stmt, ranges: dict):
+    """Adds one indexed range predicate per bound. Recipes without nutrition data never match."""
+    for macro, (low, high) in ranges.items():
+        column = NUTRITION_RANGE_FILTERS[macro][0]
+        if low is not None:
+            stmt = stmt.where(column >= low)
+        if high is not None:
+            stmt = stmt.where(column <= high)
+    return stmt
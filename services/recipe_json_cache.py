@@ -0,0 +1,268 @@
+"""
+Recipe JSON cache — serialized recipe payloads per recipe revision.
+
+The recipe JSON endpoints (/api/recipe/<id>, /api/sub-recipe/<id>, the media
+hub recipe-meta and sandbox contexts) used to re-serialize the same recipe
+from its ORM rows on every hit. Every recipe now carries a revision counter,
+bumped inside the writer's transaction whenever the recipe, one of its
+ingredient lines, instructions, diets or meal types, or an ingredient / chef
+field those payloads show changes. Payloads are cached as ready-to-send JSON
+bytes keyed by (recipe_id, revision, view). A repeat read is then one primary
+key lookup of the revision, with no ORM hydration, and it gets a
+content-hash ETag.
+
+Two tiers: a per-worker LRU, and optionally a SQLite file shared by the
+workers on one host (RECIPE_JSON_CACHE_DB=<path>). A new revision makes the
+old keys unreachable; the shared tier drops them when it stores the new one.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from flask import current_app, request
+from sqlalchemy import event, inspect
+
+from database.models import (
+    db, Chef, Ingredient, Instruction, Recipe, RecipeDiet, RecipeIngredient, RecipeMealType,
+)
+
+LRU_SIZE = 512
+SHARED_DB_PATH = os.getenv('RECIPE_JSON_CACHE_DB')
+
+# Child rows whose recipe's payloads change with them
+CHILD_MODELS = (RecipeIngredient, Instruction, RecipeDiet, RecipeMealType)
+# Columns of shared rows that the payloads show
+INGREDIENT_FIELDS = ('name', 'food_id', 'main_category', 'image_url')
+CHEF_FIELDS = ('name',)
+
+_PENDING_KEY = 'recipe_revision_pending'
+_BUMP_BATCH = 1000
+
+
+class CachedJson(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class _LruTier:
+    def __init__(self, size: int):
+        self.size = size
+        self._entries: OrderedDict[tuple, CachedJson] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[CachedJson]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: CachedJson) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class _SqliteTier:
+    """(recipe_id, view) -> latest (revision, body, etag), in a local SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS recipe_json ('
+                ' recipe_id INTEGER, view TEXT, revision INTEGER, body BLOB, etag TEXT,'
+                ' PRIMARY KEY (recipe_id, view))'
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: tuple) -> Optional[CachedJson]:
+        recipe_id, revision, view = key
+        try:
+            row = self._conn().execute(
+                'SELECT body, etag FROM recipe_json WHERE recipe_id = ? AND view = ? AND revision = ?',
+                (recipe_id, view, revision),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Recipe JSON cache read failed: {e}")
+            return None
+        return CachedJson(bytes(row[0]), row[1]) if row else None
+
+    def put(self, key: tuple, entry: CachedJson) -> None:
+        recipe_id, revision, view = key
+        try:
+            # Only ever moves forward, so a slow writer cannot replace a newer revision
+            self._conn().execute(
+                'INSERT INTO recipe_json (recipe_id, view, revision, body, etag) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (recipe_id, view) DO UPDATE SET revision = excluded.revision, '
+                'body = excluded.body, etag = excluded.etag WHERE excluded.revision > recipe_json.revision',
+                (recipe_id, view, revision, entry.body, entry.etag),
+            )
+        except sqlite3.Error as e:
+            print(f"⚠️ Recipe JSON cache write failed: {e}")
+
+    def clear(self) -> None:
+        try:
+            self._conn().execute('DELETE FROM recipe_json')
+        except sqlite3.Error as e:
+            print(f"⚠️ Recipe JSON cache clear failed: {e}")
+
+
+_lru = _LruTier(LRU_SIZE)
+_shared = _SqliteTier(SHARED_DB_PATH) if SHARED_DB_PATH else None
+
+
+def recipe_revision(recipe_id: int) -> Optional[int]:
+    """The recipe's revision, or None when it does not exist. One PK lookup."""
+    return db.session.execute(db.select(Recipe.revision).where(Recipe.id == recipe_id)).scalar()
+
+
+def encode(payload) -> CachedJson:
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    return CachedJson(body, hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def cached_recipe_json(recipe_id: int, view: str, build) -> Optional[CachedJson]:
+    """
+    The `view` payload of a recipe; build(recipe_id) -> JSON-serializable
+    value (None when there is nothing to serve) runs only on a miss in both
+    tiers. None when the recipe does not exist or build() returned None.
+    """
+    # Revision first, rows second: a concurrent write can only make the payload newer than its key
+    revision = recipe_revision(recipe_id)
+    if revision is None:
+        return None
+    key = (recipe_id, revision, view)
+    entry = _lru.get(key)
+    if entry is not None:
+        return entry
+    if _shared is not None:
+        entry = _shared.get(key)
+        if entry is not None:
+            _lru.put(key, entry)
+            return entry
+
+    payload = build(recipe_id)
+    if payload is None:
+        return None
+    entry = encode(payload)
+    _lru.put(key, entry)
+    if _shared is not None:
+        _shared.put(key, entry)
+    return entry
+
+
+def cached_recipe_data(recipe_id: int, view: str, build):
+    """The decoded `view` payload (for callers that use the data rather than send it), or None."""
+    entry = cached_recipe_json(recipe_id, view, build)
+    return None if entry is None else json.loads(entry.body)
+
+
+def recipe_json_response(recipe_id: int, view: str, build):
+    """JSON response with the payload's ETag (304 when If-None-Match still matches), or None."""
+    entry = cached_recipe_json(recipe_id, view, build)
+    if entry is None:
+        return None
+    response = current_app.response_class(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def clear() -> None:
+    _lru.clear()
+    if _shared is not None:
+        _shared.clear()
+
+
+def bump_recipe_revisions(recipe_ids, connection=None) -> None:
+    """
+    Bumps the revision of `recipe_ids`. For writes that bypass the ORM (bulk
+    UPDATEs, set-based merges); runs in the caller's transaction, does NOT commit.
+    """
+    recipe_ids = sorted(set(recipe_ids))
+    if not recipe_ids:
+        return
+    conn = connection if connection is not None else db.session.connection()
+    for start in range(0, len(recipe_ids), _BUMP_BATCH):
+        conn.execute(
+            db.update(Recipe)
+            .where(Recipe.id.in_(recipe_ids[start:start + _BUMP_BATCH]))
+            .values(revision=Recipe.revision + 1)
+        )
+
+
+# ---------------------------------------------------------------------------
+# Invalidation: flushed changes to a recipe, its child rows or the ingredient /
+# chef fields it shows bump the recipe's revision inside the writer's
+# transaction.
+# ---------------------------------------------------------------------------
+
+def _changed(obj, fields=None) -> bool:
+    state = inspect(obj)
+    if fields is None:
+        fields = [attr.key for attr in state.mapper.column_attrs if attr.key != 'revision']
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _track_recipe_writes(session, flush_context, instances):
+    pending = session.info.setdefault(_PENDING_KEY, {'recipes': set(), 'children': [],
+                                                     'ingredients': set(), 'chefs': set()})
+    for obj in session.dirty:
+        if isinstance(obj, Recipe) and _changed(obj):
+            pending['recipes'].add(obj.id)
+        elif isinstance(obj, CHILD_MODELS) and _changed(obj):
+            pending['children'].append(obj)
+            pending['recipes'].update(inspect(obj).attrs.recipe_id.history.deleted or ())
+        elif isinstance(obj, Ingredient) and obj.id is not None and _changed(obj, INGREDIENT_FIELDS):
+            pending['ingredients'].add(obj.id)
+        elif isinstance(obj, Chef) and _changed(obj, CHEF_FIELDS):
+            pending['chefs'].add(obj.id)
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, CHILD_MODELS):
+            # recipe_id may only be set during the flush (relationship appends); read it afterwards
+            pending['children'].append(obj)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_recipe_revisions(session, flush_context):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    recipes = set(pending['recipes'])
+    recipes.update(obj.recipe_id for obj in pending['children'])
+    recipes.discard(None)
+    conn = session.connection()
+    if pending['ingredients']:
+        recipes.update(conn.execute(
+            db.select(RecipeIngredient.recipe_id).where(RecipeIngredient.ingredient_id.in_(pending['ingredients']))
+        ).scalars())
+    if pending['chefs']:
+        recipes.update(conn.execute(
+            db.select(Recipe.id).where(Recipe.chef_id.in_(pending['chefs']))
+        ).scalars())
+    bump_recipe_revisions(recipes, conn)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_recipe_writes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,108 @@
+"""
+Recipe → protein tag index.
+
+The library's protein filter offers the `examples` of
+data/constraints/main_protein.json. A recipe carries a protein when one of
+its ingredient names contains that example (case-insensitive — the same rule
+the old per-request ILIKE filter applied). The tags are stored in
+recipe_protein and refreshed at commit time for every recipe whose
+ingredient lines, or whose ingredients' names, changed in the transaction,
+so filtering is a single indexed IN-join. Set-based line writes (ingredient
+merges) queue their recipes with queue_protein_refresh().
+
+Existing recipes are covered by scripts/backfill_recipe_proteins.py.
+"""
+
+from sqlalchemy import event, inspect
+
+from database.models import db, Ingredient, RecipeIngredient, RecipeProtein
+from services.commit_hooks import PROTEIN_HOOK, on_commit, track
+from utils.vocabulary import protein_examples
+
+# RecipeIngredient columns that change which ingredients a recipe uses
+LINE_FIELDS = ('recipe_id', 'ingredient_id')
+
+
+def protein_options() -> tuple[str, ...]:
+    """Sorted, de-duplicated protein examples from main_protein.json."""
+    return protein_examples()
+
+
+def match_proteins(ingredient_names, proteins=None) -> set[str]:
+    """The proteins whose (lowercased) name occurs in any of `ingredient_names`."""
+    proteins = protein_options() if proteins is None else proteins
+    names = [n.lower() for n in ingredient_names if n]
+    return {p for p in proteins if any(p.lower() in name for name in names)}
+
+
+def sync_recipe_proteins(recipe_ids) -> int:
+    """
+    Recomputes the protein tags of `recipe_ids` from their current ingredient
+    lines (one read, one delete, one insert). Flushes nothing; the caller commits.
+    Returns the number of tag rows written.
+    """
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return 0
+    names: dict[int, list[str]] = {}
+    rows = db.session.execute(
+        db.select(RecipeIngredient.recipe_id, Ingredient.name)
+        .join(Ingredient, RecipeIngredient.ingredient_id == Ingredient.id)
+        .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+    ).all()
+    for recipe_id, name in rows:
+        names.setdefault(recipe_id, []).append(name)
+
+    tags = [
+        {'recipe_id': recipe_id, 'protein': protein}
+        for recipe_id, ingredient_names in names.items()
+        for protein in sorted(match_proteins(ingredient_names))
+    ]
+    db.session.execute(db.delete(RecipeProtein).where(RecipeProtein.recipe_id.in_(recipe_ids)))
+    if tags:
+        db.session.execute(db.insert(RecipeProtein), tags)
+    return len(tags)
+
+
+def recipes_using_ingredients(ingredient_ids) -> set[int]:
+    if not ingredient_ids:
+        return set()
+    return set(db.session.execute(
+        db.select(RecipeIngredient.recipe_id).distinct()
+        .where(RecipeIngredient.ingredient_id.in_(ingredient_ids))
+    ).scalars())
+
+
+def queue_protein_refresh(recipe_ids) -> None:
+    """For writes that bypass the ORM (e.g. ingredient merges): re-tag these recipes at commit."""
+    track(db.session(), PROTEIN_HOOK, recipe_ids)
+
+
+# ---------------------------------------------------------------------------
+# Tracking: remember touched recipes / renamed ingredients per transaction,
+# refresh their tags on commit.
+# ---------------------------------------------------------------------------
+
+@event.listens_for(db.session, 'after_flush')
+def _track_protein_changes(session, flush_context):
+    recipes, renamed = set(), set()
+    for obj in session.dirty:
+        if isinstance(obj, RecipeIngredient):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in LINE_FIELDS):
+                recipes.add(obj.recipe_id)
+                recipes.update(attrs.recipe_id.history.deleted or ())
+        elif isinstance(obj, Ingredient) and inspect(obj).attrs.name.history.has_changes():
+            renamed.add(obj.id)
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, RecipeIngredient):
+            recipes.add(obj.recipe_id)
+    track(session, PROTEIN_HOOK, recipes)
+    track(session, PROTEIN_HOOK, renamed, kind='ingredients')
+
+
+@on_commit(PROTEIN_HOOK)
+def _sync_proteins_on_commit(session, pending):
+    recipes = pending.get('ids', set()) | recipes_using_ingredients(pending.get('ingredients'))
+    if recipes:
+        sync_recipe_proteins(recipes)
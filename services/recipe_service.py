@@ -16,10 +16,12 @@ from database.models import (
     db, Recipe, RecipeIngredient, RecipeMealType, RecipeDiet,
     Instruction, Ingredient, Chef
 )
-from ai_engine import get_pantry_id
+from ai_engine import get_pantry_ids
 from services.nutrition_service import calculate_nutritional_totals
-from utils.unit_helpers import normalize_unit
+from services.unit_conversion import get_conversion_table, ingredient_grams
+from services.nutrition_engine import TOTAL_FIELDS, load_sub_recipe_profiles
 from services.photographer_service import generate_visual_prompt, generate_actual_image
+from services.recipe_view import store_component_layout
 
 
 # ---------------------------------------------------------------------------
@@ -38,34 +40,58 @@ def _extract_pre_resolved_id(ing) -> str | None:
     return None
 
 
-def _resolve_ingredient(ing) -> Ingredient | None:
+def _ingredient_name(ing) -> str:
+    """Safely extract the ingredient name from an ingredient object."""
+    return ing.name if hasattr(ing, 'name') else ing.get('name', '')
+
+
+def resolve_ingredients(ingredients) -> dict[str, Ingredient]:
     """
-    Try to resolve an ingredient to a DB record.
+    Batch-resolve every ingredient of a recipe to its DB record.
     Priority 1: LLM-provided pantry_id.
-    Priority 2: Fuzzy name match via get_pantry_id.
-    Returns the Ingredient ORM object or None.
-    """
-    pre_id = _extract_pre_resolved_id(ing)
+    Priority 2: Fuzzy name match via get_pantry_ids (one vectorized pass).
 
-    # Priority 1: Pre-resolved ID (must exist in DB)
-    if pre_id:
-        record = db.session.execute(
-            db.select(Ingredient).where(Ingredient.food_id == pre_id)
-        ).scalars().first()
-        if record:
-            return record
-
-    # Priority 2: Fuzzy match by name
-    name = ing.name if hasattr(ing, 'name') else ing.get('name', '')
-    food_id = get_pantry_id(name)
-    if food_id:
-        record = db.session.execute(
-            db.select(Ingredient).where(Ingredient.food_id == food_id)
-        ).scalars().first()
-        if record:
-            return record
+    All candidate food_ids are loaded with a single IN (...) query; a second
+    query is only issued when the LLM hallucinated pantry_ids that don't exist
+    and their names had to fall back to fuzzy matching.
 
-    return None
+    Returns {ingredient name: Ingredient}. Names that could not be resolved
+    are absent from the mapping.
+    """
+    pre_ids = {}  # name → LLM-provided food_id
+    for ing in ingredients:
+        name = _ingredient_name(ing)
+        pre_id = _extract_pre_resolved_id(ing)
+        if pre_id and name not in pre_ids:
+            pre_ids[name] = pre_id
+
+    names = list(dict.fromkeys(_ingredient_name(ing) for ing in ingredients))
+    fuzzy_ids = get_pantry_ids([n for n in names if n not in pre_ids])
+
+    def _load(food_ids) -> dict[str, Ingredient]:
+        food_ids = {fid for fid in food_ids if fid}
+        if not food_ids:
+            return {}
+        rows = db.session.execute(
+            db.select(Ingredient).where(Ingredient.food_id.in_(food_ids))
+        ).scalars().all()
+        return {row.food_id: row for row in rows}
+
+    records = _load(list(pre_ids.values()) + list(fuzzy_ids.values()))
+
+    # Pre-resolved IDs that don't exist in DB fall back to fuzzy matching
+    stale = [name for name, fid in pre_ids.items() if fid not in records]
+    if stale:
+        fallback_ids = get_pantry_ids(stale)
+        fuzzy_ids.update(fallback_ids)
+        records.update(_load(fid for fid in fallback_ids.values() if fid not in records))
+
+    resolved = {}
+    for name in names:
+        record = records.get(pre_ids.get(name)) or records.get(fuzzy_ids.get(name))
+        if record:
+            resolved[name] = record
+    return resolved
 
 
 def sanitize_ai_ingredients(recipe_data) -> None:
@@ -139,41 +165,43 @@ def process_recipe_workflow(recipe_data, query_context: str, chef_id: str, sourc
     # ── Step 1: Pre-resolve and create missing ingredients ────────────────
     import datetime
 
-    for group in recipe_data.ingredient_groups:
-        for ing in group.ingredients:
-            record = _resolve_ingredient(ing)
-            if not record:
-                name = ing.name if hasattr(ing, 'name') else ing.get('name', 'Unknown')
-                
-                # Create pending ingredient gracefully
-                new_food_id = f"pending-{uuid.uuid4().hex[:8]}"
-                record = Ingredient(
-                    food_id=new_food_id,
-                    name=name,
-                    status='pending',
-                    is_staple=False,
-                    default_unit='g',
-                    calories_per_100g=0,
-                    kj_per_100g=0,
-                    protein_per_100g=0,
-                    carbs_per_100g=0,
-                    fat_per_100g=0,
-                    fat_saturated_per_100g=0,
-                    sugar_per_100g=0,
-                    fiber_per_100g=0,
-                    sodium_mg_per_100g=0,
-                    created_at=datetime.datetime.utcnow().isoformat()
-                )
-                db.session.add(record)
-                db.session.flush()
-                
-                # Attach to 'ing' so Step 5 finds it easily
-                if hasattr(ing, 'pantry_id'):
-                    ing.pantry_id = new_food_id
-                elif isinstance(ing, dict):
-                    ing['pantry_id'] = new_food_id
-                else:
-                    setattr(ing, 'pantry_id', new_food_id)
+    all_ingredients = [ing for group in recipe_data.ingredient_groups for ing in group.ingredients]
+    resolved = resolve_ingredients(all_ingredients)
+
+    for ing in all_ingredients:
+        name = _ingredient_name(ing)
+        if name in resolved:
+            continue
+
+        # Create pending ingredient gracefully
+        new_food_id = f"pending-{uuid.uuid4().hex[:8]}"
+        record = Ingredient(
+            food_id=new_food_id,
+            name=name or 'Unknown',
+            status='pending',
+            is_staple=False,
+            default_unit='g',
+            calories_per_100g=0,
+            kj_per_100g=0,
+            protein_per_100g=0,
+            carbs_per_100g=0,
+            fat_per_100g=0,
+            fat_saturated_per_100g=0,
+            sugar_per_100g=0,
+            fiber_per_100g=0,
+            sodium_mg_per_100g=0,
+            created_at=datetime.datetime.utcnow().isoformat()
+        )
+        db.session.add(record)
+
+        # Register in the mapping so Step 5 reuses it (and duplicates share one record)
+        resolved[name] = record
+        if hasattr(ing, 'pantry_id'):
+            ing.pantry_id = new_food_id
+        elif isinstance(ing, dict):
+            ing['pantry_id'] = new_food_id
+        else:
+            setattr(ing, 'pantry_id', new_food_id)
 
     # ── Step 2: Validate Chef ID ──────────────────────────────────────────
     valid_chef_id = None
@@ -209,7 +237,7 @@ def process_recipe_workflow(recipe_data, query_context: str, chef_id: str, sourc
         source_type=source_type,
     )
     db.session.add(new_recipe)
-    db.session.flush()  # get new_recipe.id
+    db.session.flush()  # get new_recipe.id (also assigns ids to pending ingredients)
 
     # ── Step 4: Save Meal Types ───────────────────────────────────────────
     meal_types = getattr(recipe_data, 'meal_types', None)
@@ -226,9 +254,10 @@ def process_recipe_workflow(recipe_data, query_context: str, chef_id: str, sourc
             db.session.add(RecipeDiet(recipe_id=new_recipe.id, diet=d))
 
     # ── Step 5: Save Ingredients (all validated — no auto-creation) ───────
+    conversions = get_conversion_table()
     for group in recipe_data.ingredient_groups:
         for ing in group.ingredients:
-            ingredient_record = _resolve_ingredient(ing)
+            ingredient_record = resolved.get(_ingredient_name(ing))
             if not ingredient_record:
                 # Should never happen — we validated above
                 raise ValueError(
@@ -252,10 +281,11 @@ def process_recipe_workflow(recipe_data, query_context: str, chef_id: str, sourc
             
             final_gram_weight = ai_gram_estimate
             
-            # Rule A: The Override
-            if ingredient_record.average_g_per_unit and ingredient_record.default_unit:
-                if normalize_unit(str(unit)) == normalize_unit(str(ingredient_record.default_unit)):
-                     final_gram_weight = float(amount) * float(ingredient_record.average_g_per_unit)
+            # Rule A: The Override — exact conversions (mass units, the ingredient's
+            # own unit weight, volume with a known density) beat the AI estimate
+            exact_grams = ingredient_grams(ingredient_record, amount, unit, conversions, exact_only=True)
+            if exact_grams is not None:
+                final_gram_weight = exact_grams
 
             db.session.add(RecipeIngredient(
                 recipe_id=new_recipe.id,
@@ -288,7 +318,9 @@ def process_recipe_workflow(recipe_data, query_context: str, chef_id: str, sourc
                 global_order_index=global_order_index,
             ))
 
-    # ── Step 7: Commit ────────────────────────────────────────────────────
+    # ── Step 7: Store the component layout, commit ────────────────────────
+    db.session.flush()
+    store_component_layout(new_recipe)
     db.session.commit()
 
     # ── Step 8: Post-processing (non-blocking) ────────────────────────────
@@ -369,7 +401,8 @@ def process_recipe_workflow(recipe_data, query_context: str, chef_id: str, sourc
 def recalculate_recipe_nutrition(recipe_id: int, db_session) -> None:
     """
     Recalculates macroscopic nutrition properties directly from the gram weight approximations 
-    attached to physical RecipeIngredients. Overwrites existing recipe totals in place.
+    attached to physical RecipeIngredients (converting amount + unit where none is stored).
+    Overwrites existing recipe totals in place.
     """
     recipe = db_session.get(Recipe, recipe_id)
     if not recipe:
@@ -387,13 +420,27 @@ def recalculate_recipe_nutrition(recipe_id: int, db_session) -> None:
     recipe.total_calcium_mg = 0.0
     recipe.total_potassium_mg = 0.0
     
-    for r_ing in recipe.ingredients:
+    usages = list(recipe.ingredients)
+    gram_weights = get_conversion_table().resolve_gram_weights(
+        (r_ing.ingredient_id, r_ing.amount, r_ing.unit, r_ing.gram_weight) for r_ing in usages
+    )
+    # Sub-recipe ingredients count with their recipe's per-100g profile (see nutrition_engine)
+    profiles = load_sub_recipe_profiles(
+        [r_ing.ingredient_id for r_ing in usages if r_ing.ingredient and r_ing.ingredient.sub_recipe_id]
+    )
+    for r_ing, grams in zip(usages, gram_weights):
         base_item = r_ing.ingredient
-        if not base_item or r_ing.gram_weight is None or r_ing.gram_weight <= 0:
+        if not base_item or grams is None or grams <= 0:
             continue
             
-        multiplier = r_ing.gram_weight / 100.0
+        multiplier = grams / 100.0
         
+        profile = profiles.get(r_ing.ingredient_id)
+        if profile is not None:
+            for total_field, value in zip(TOTAL_FIELDS, profile.tolist()):
+                setattr(recipe, total_field, getattr(recipe, total_field) + value * multiplier)
+            continue
+
         if base_item.calories_per_100g: recipe.total_calories += (base_item.calories_per_100g * multiplier)
         if base_item.protein_per_100g: recipe.total_protein += (base_item.protein_per_100g * multiplier)
         if base_item.carbs_per_100g: recipe.total_carbs += (base_item.carbs_per_100g * multiplier)
@@ -480,8 +527,9 @@ def clone_recipe(original_recipe_id: int, new_title: str, ingredient_overrides:
         )
         db_session.add(new_r_ing)
 
-    # 5. Flush and Math Trigger
+    # 5. Flush, Layout and Math Trigger
     db_session.flush()
+    store_component_layout(new_recipe)
     recalculate_recipe_nutrition(new_recipe.id, db_session)
     db_session.commit()
 
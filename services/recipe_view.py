@@ -0,0 +1,196 @@
+"""
+Recipe view loader — everything /recipe/<id> and kitchen mode render, in a
+fixed number of queries.
+
+load_recipe_view() fetches the recipe with its chef (joined), ingredient
+lines + ingredients, instructions, diets and meal types (one selectin query
+each), whatever the recipe's size. Nothing in the templates lazy-loads.
+
+How lines and steps are grouped for display is the recipe's component
+layout. It is computed at write time (process_recipe_workflow, clone_recipe)
+by build_component_layout() and stored in recipe.component_layout: step
+order, the display components, each ingredient line's display component
+(after reconciling ingredient components that have no steps) and the
+chronological step order. A stored layout that no longer matches the rows
+(lines or steps changed since) is rebuilt in memory for that view.
+
+Existing recipes are covered by scripts/backfill_component_layouts.py.
+"""
+
+from itertools import groupby
+from typing import NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+
+from database.models import db, Recipe, RecipeIngredient, Ingredient
+
+# Pseudo-component for ingredient lines of a recipe without steps
+OTHER_INGREDIENTS = "Other Ingredients"
+SUBSTITUTE_LIMIT = 3
+
+COMPONENT_THEMES = (
+    {'color': 'bg-blue-50 text-blue-800', 'border': 'border-blue-200', 'indent': 'ml-0 md:ml-0'},
+    {'color': 'bg-rose-50 text-rose-800', 'border': 'border-rose-200', 'indent': 'ml-4 md:ml-12'},
+    {'color': 'bg-emerald-50 text-emerald-800', 'border': 'border-emerald-200', 'indent': 'ml-8 md:ml-24'},
+    {'color': 'bg-amber-50 text-amber-800', 'border': 'border-amber-200', 'indent': 'ml-12 md:ml-36'},
+    {'color': 'bg-purple-50 text-purple-800', 'border': 'border-purple-200', 'indent': 'ml-16 md:ml-48'},
+)
+
+
+class RecipeView(NamedTuple):
+    recipe: Recipe
+    steps: list                      # instructions by (component, phase, step_number)
+    steps_by_phase: dict
+    steps_by_component: list         # [(component, [instructions])], display order
+    ingredients_by_component: dict   # {component: [RecipeIngredient]}
+    has_chronological_data: bool
+    chrono_steps: list               # instructions by global_order_index ([] unless every step has one)
+    component_meta: dict             # {component: theme}, for the chronological views
+
+
+def build_component_layout(instructions, ingredients) -> dict:
+    """
+    The stored component layout of a recipe's instructions and ingredient
+    lines (both need ids, so flush first):
+
+        {"steps": [instruction ids in (component, phase, step_number) order],
+         "components": [display components],
+         "ingredients": [[line id, display component], ...],
+         "chrono": [instruction ids by global_order_index] or None}
+
+    Ingredient components without steps would be invisible on the component
+    view, so their lines move to the step components: all to the only one,
+    split evenly over several, or under OTHER_INGREDIENTS when there are no
+    steps at all.
+    """
+    steps = sorted(instructions, key=lambda i: (i.component, i.phase, i.step_number))
+    components = [name for name, _ in groupby(steps, key=lambda i: i.component)]
+
+    placed = [[line.id, line.component] for line in ingredients]
+    step_components = set(components)
+    orphaned = [pair for pair in placed if pair[1] not in step_components]
+    if orphaned:
+        print(f"⚠️  Component name mismatch: ingredient components "
+              f"{sorted({c for _, c in orphaned})} have no steps (steps: {components})")
+        if len(components) == 1:
+            for pair in orphaned:
+                pair[1] = components[0]
+        elif len(components) > 1:
+            per_comp = max(1, len(orphaned) // len(components))
+            for idx, pair in enumerate(orphaned):
+                pair[1] = components[min(idx // per_comp, len(components) - 1)]
+        else:
+            for pair in orphaned:
+                pair[1] = OTHER_INGREDIENTS
+            components.append(OTHER_INGREDIENTS)
+
+    chrono = None
+    if steps and all(i.global_order_index is not None for i in steps):
+        chrono = [i.id for i in sorted(steps, key=lambda i: i.global_order_index)]
+
+    return {
+        'steps': [i.id for i in steps],
+        'components': components,
+        'ingredients': placed,
+        'chrono': chrono,
+    }
+
+
+def store_component_layout(recipe: Recipe) -> None:
+    """Recomputes recipe.component_layout from its (flushed) instructions and ingredient lines."""
+    recipe.component_layout = build_component_layout(recipe.instructions, recipe.ingredients)
+
+
+def _matches(layout, instructions, ingredients) -> bool:
+    if not isinstance(layout, dict):
+        return False
+    return (sorted(layout.get('steps') or ()) == sorted(i.id for i in instructions)
+            and sorted(line_id for line_id, _ in layout.get('ingredients') or ())
+            == sorted(line.id for line in ingredients))
+
+
+def load_recipe_view(recipe_id: int) -> Optional[RecipeView]:
+    """The recipe and its display structure, or None when it does not exist."""
+    recipe = db.session.execute(
+        db.select(Recipe)
+        .where(Recipe.id == recipe_id)
+        .options(
+            joinedload(Recipe.chef),
+            selectinload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient),
+            selectinload(Recipe.instructions),
+            selectinload(Recipe.diets),
+            selectinload(Recipe.meal_types),
+        )
+    ).scalar_one_or_none()
+    if recipe is None:
+        return None
+
+    instructions, ingredients = recipe.instructions, recipe.ingredients
+    layout = recipe.component_layout
+    if not _matches(layout, instructions, ingredients):
+        layout = build_component_layout(instructions, ingredients)
+
+    steps_by_id = {i.id: i for i in instructions}
+    lines_by_id = {line.id: line for line in ingredients}
+
+    steps = [steps_by_id[i] for i in layout['steps']]
+    steps_by_phase = {phase: [i for i in steps if i.phase == phase] for phase in ('Prep', 'Cook', 'Serve')}
+    grouped = {name: list(group) for name, group in groupby(steps, key=lambda i: i.component)}
+    steps_by_component = [(name, grouped.get(name, [])) for name in layout['components']]
+
+    ingredients_by_component: dict[str, list] = {}
+    for line_id, component in layout['ingredients']:
+        ingredients_by_component.setdefault(component, []).append(lines_by_id[line_id])
+
+    chrono_steps = [steps_by_id[i] for i in layout['chrono']] if layout['chrono'] else []
+    component_meta = {}
+    for step in chrono_steps:
+        if step.component not in component_meta:
+            component_meta[step.component] = COMPONENT_THEMES[min(len(component_meta), len(COMPONENT_THEMES) - 1)]
+
+    return RecipeView(
+        recipe=recipe,
+        steps=steps,
+        steps_by_phase=steps_by_phase,
+        steps_by_component=steps_by_component,
+        ingredients_by_component=ingredients_by_component,
+        has_chronological_data=bool(chrono_steps),
+        chrono_steps=chrono_steps,
+        component_meta=component_meta,
+    )
+
+
+def substitute_alternatives(ingredients, limit: int = SUBSTITUTE_LIMIT) -> dict[int, list[Ingredient]]:
+    """
+    {ingredient id: up to `limit` active ingredients of its sub_category,
+    staples first, then by name} for the given ingredients, in one query.
+    """
+    sub_categories = {ing.sub_category for ing in ingredients if ing is not None and ing.sub_category}
+    if not sub_categories:
+        return {}
+
+    # limit + 1 per sub-category, so there are still `limit` left after excluding the ingredient itself
+    rank = func.row_number().over(
+        partition_by=Ingredient.sub_category,
+        order_by=(Ingredient.is_staple.desc(), Ingredient.name.asc()),
+    ).label('rank')
+    ranked = (
+        db.select(Ingredient.id, rank)
+        .where(Ingredient.sub_category.in_(sub_categories), Ingredient.status == 'active')
+        .subquery()
+    )
+    candidates = db.session.execute(
+        db.select(Ingredient)
+        .join(ranked, ranked.c.id == Ingredient.id)
+        .where(ranked.c.rank <= limit + 1)
+        .order_by(ranked.c.rank)
+    ).scalars().all()
+
+    by_sub_category: dict[str, list[Ingredient]] = {}
+    for candidate in candidates:
+        by_sub_category.setdefault(candidate.sub_category, []).append(candidate)
+    return {
+        ing.id: [alt for alt in by_sub_category.get(ing.sub_category, []) if alt.id != ing.id][:limit]
+        for ing in ingredients if ing is not None and ing.sub_category
+    }
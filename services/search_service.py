@@ -0,0 +1,260 @@
+"""
+Search service — ranked, index-backed search over ingredients and recipes.
+
+Every search box (ingredient autocomplete, the sub-recipe picker, the admin
+recipe list, the media hub sandbox) goes through here instead of running its
+own leading-wildcard ILIKE.
+
+Postgres (cloudsql): matches on a 'simple' tsvector of the searchable columns
+(word prefixes, GIN expression index) OR a substring ILIKE served by pg_trgm
+GIN indexes. Both index families are created by migration 2d8c5e1f7a93.
+
+SQLite (local): FTS5 external-content tables kept in sync by triggers: a
+unicode61 one for word prefixes (bm25) and a trigram one for substrings of
+3+ characters (the ILIKE '%query%' Postgres runs through pg_trgm), so both
+backends find "Dark Chocolate" for "hocol". Local databases are usually made
+by db.create_all(), and batch migrations recreate tables without their
+triggers, so the FTS tables are (re)created on first use when missing.
+
+Ingredient searches cover Ingredient.aliases (the JSON list of merged-away
+names) as well as the name. Results are ranked: names starting with the query
+(exact match first; a range scan on the lower(name) / lower(title) index),
+then the remaining text matches by relevance (bm25 / ts_rank; on SQLite,
+word-prefix matches before substring-only ones).
+"""
+
+import re
+import threading
+
+from sqlalchemy import and_, func, literal_column, or_, table, text
+
+from database.models import db, Ingredient, Recipe
+
+SEARCH_LIMIT = 10
+
+# SQLite: FTS matches considered per search (limit x this), and the match
+# count up to which they are the best by bm25 rather than the first found
+CANDIDATE_FACTOR = 20
+FULL_RANK_MAX = 2000
+
+# Postgres: these expressions must stay identical to the migration's index definitions
+INGREDIENT_TSVECTOR = "to_tsvector('simple', coalesce(ingredient.name, '') || ' ' || coalesce(ingredient.aliases, ''))"
+RECIPE_TSVECTOR = "to_tsvector('simple', coalesce(recipe.title, '') || ' ' || coalesce(recipe.cuisine, ''))"
+
+# SQLite: FTS5 tables over (table, columns, options)
+FTS_TABLES = {
+    'ingredient_fts': ('ingredient', ('name', 'aliases'), "prefix='1 2 3'"),
+    'recipe_fts': ('recipe', ('title', 'cuisine'), "prefix='1 2 3'"),
+    'ingredient_trigram': ('ingredient', ('name', 'aliases'), "tokenize='trigram'"),
+    'recipe_trigram': ('recipe', ('title', 'cuisine'), "tokenize='trigram'"),
+}
+# Word-prefix table -> substring table of the same source
+TRIGRAM_TABLES = {'ingredient_fts': 'ingredient_trigram', 'recipe_fts': 'recipe_trigram'}
+# The trigram tokenizer cannot match anything shorter
+TRIGRAM_MIN_LENGTH = 3
+
+_fts_lock = threading.Lock()
+_fts_ready = set()
+
+
+def _tokens(query: str) -> list[str]:
+    return re.findall(r'\w+', (query or '').lower())
+
+
+def _is_postgres() -> bool:
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _prefix_tsquery(tokens: list[str]) -> str:
+    """'chick pea' -> 'chick:* & pea:*' (tokens are \\w+ only, so nothing to escape)."""
+    return ' & '.join(f'{t}:*' for t in tokens)
+
+
+def _fts_match(tokens: list[str]) -> str:
+    """'chick pea' -> '"chick"* "pea"*' — every word, as a prefix."""
+    return ' '.join(f'"{t}"*' for t in tokens)
+
+
+def _fts_substring(query: str) -> str:
+    """'dark "choc' -> '"dark ""choc"' — the whole query as one phrase (a substring for trigram tables)."""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _sqlite_lower(value: str) -> str:
+    """What SQLite's lower() makes of `value`: only ASCII letters are lowercased."""
+    return ''.join(c.lower() if c.isascii() else c for c in value)
+
+
+def _fts_ddl(fts: str) -> list[str]:
+    source, columns, options = FTS_TABLES[fts]
+    cols = ', '.join(columns)
+    new = ', '.join(f'new.{c}' for c in columns)
+    old = ', '.join(f'old.{c}' for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{source}', content_rowid='id', {options})",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def ensure_fts_index(fts: str) -> None:
+    """SQLite only: creates the FTS table + triggers (and rebuilds it) if any trigger is missing."""
+    if fts in _fts_ready:
+        return
+    with _fts_lock:
+        if fts in _fts_ready:
+            return
+        # Separate connection: the DDL commits on its own, outside the caller's transaction
+        with db.engine.begin() as conn:
+            triggers = conn.execute(
+                text("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE :p"),
+                {'p': f'{fts}_a%'}
+            ).scalar()
+            if triggers < 3:
+                print(f"🔎 Building search index {fts}")
+                for statement in _fts_ddl(fts):
+                    conn.execute(text(statement))
+        _fts_ready.add(fts)
+
+
+def _fts_rowids(fts: str, fts_query: str, candidates: int | None = None):
+    """
+    SQLite: (id, rank) subquery of the FTS matches. With `candidates`, at most
+    that many: the best by bm25 when the query matches up to FULL_RANK_MAX
+    rows, otherwise the first ones found. bm25 has to score every match, so
+    a one-letter keystroke on a large table would otherwise rank tens of
+    thousands of rows to show ten.
+    """
+    ensure_fts_index(fts)
+    match = text(f'{fts} MATCH :fts_query').bindparams(fts_query=fts_query)
+    stmt = (
+        db.select(literal_column('rowid').label('id'), literal_column('rank').label('rank'))
+        .select_from(table(fts))
+        .where(match)
+    )
+    if candidates is not None:
+        total = db.session.execute(db.select(func.count()).select_from(table(fts)).where(match)).scalar()
+        if total <= FULL_RANK_MAX:
+            stmt = stmt.order_by(literal_column('rank'))
+        stmt = stmt.limit(candidates)
+    return stmt.subquery()
+
+
+def _next_prefix(prefix: str) -> str:
+    """Smallest string greater than every string starting with `prefix`."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _prefix_clause(column, query: str):
+    """lower(column) starts with `query` — a range scan on the lower(...) expression index."""
+    if _is_postgres():
+        # text_pattern_ops index serves LIKE 'prefix%' whatever the DB collation
+        return func.lower(column).like(_like_pattern(query)[1:], escape='\\')
+    # Bounds in SQLite's own lower(): "Éclair" stays "Éclair" there, not "éclair".
+    # Other casings of non-ASCII letters are left to the (case-folding) FTS pass.
+    lowered = _sqlite_lower(query)
+    return and_(func.lower(column) >= lowered, func.lower(column) < _next_prefix(lowered))
+
+
+def _sqlite_matches(fts: str, query: str, tokens: list[str], candidates: int | None = None):
+    """
+    SQLite: (id, rank) subqueries of the word-prefix matches and, for queries
+    of TRIGRAM_MIN_LENGTH+ characters, the substring matches (else None).
+    """
+    words = _fts_rowids(fts, _fts_match(tokens), candidates)
+    if len(query) < TRIGRAM_MIN_LENGTH:
+        return words, None
+    return words, _fts_rowids(TRIGRAM_TABLES[fts], _fts_substring(query), candidates)
+
+
+def _text_match_stmts(model, column, query: str, tokens: list[str], candidates: int) -> list:
+    """
+    Statements for the text-match passes, most relevant first: Postgres, one
+    (word prefix or substring); SQLite, word prefixes then substrings.
+    """
+    if _is_postgres():
+        tsvector = literal_column(INGREDIENT_TSVECTOR if model is Ingredient else RECIPE_TSVECTOR)
+        tsquery = func.to_tsquery('simple', _prefix_tsquery(tokens))
+        pattern = _like_pattern(query)
+        other = Ingredient.aliases if model is Ingredient else Recipe.cuisine
+        return [
+            db.select(model)
+            .where(or_(tsvector.op('@@')(tsquery),
+                       column.ilike(pattern, escape='\\'),
+                       other.ilike(pattern, escape='\\')))
+            .order_by(func.ts_rank(tsvector, tsquery).desc(), column.asc())
+        ]
+    return [
+        db.select(model).join(matches, matches.c.id == model.id).order_by(matches.c.rank, column.asc())
+        for matches in _sqlite_matches('ingredient_fts' if model is Ingredient else 'recipe_fts',
+                                       query, tokens, candidates)
+        if matches is not None
+    ]
+
+
+def _ranked_search(model, column, query: str, limit: int, criteria=()) -> list:
+    """
+    Indexed passes: names starting with the query (exact match first, then
+    alphabetical), then — only while those don't fill `limit` — the best
+    text matches among the rest (see _text_match_stmts).
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return []
+    query = query.strip()
+    results = db.session.execute(
+        db.select(model).where(_prefix_clause(column, query), *criteria)
+        .order_by(func.lower(column)).limit(limit)
+    ).scalars().all()
+    for stmt in _text_match_stmts(model, column, query, tokens, limit * CANDIDATE_FACTOR):
+        if len(results) >= limit:
+            break
+        stmt = stmt.where(*criteria)
+        if results:
+            stmt = stmt.where(model.id.not_in([r.id for r in results]))
+        results += db.session.execute(stmt.limit(limit - len(results))).scalars().all()
+    return results
+
+
+def search_ingredients(query: str, limit: int = SEARCH_LIMIT, exclude_inactive: bool = False) -> list[Ingredient]:
+    """Best-ranked ingredients whose name or aliases match `query`."""
+    criteria = (Ingredient.status != 'inactive',) if exclude_inactive else ()
+    return _ranked_search(Ingredient, Ingredient.name, query, limit, criteria)
+
+
+def search_recipes(query: str, limit: int = SEARCH_LIMIT, approved_only: bool = False) -> list[Recipe]:
+    """Best-ranked recipes whose title or cuisine match `query`."""
+    criteria = (Recipe.status == 'approved',) if approved_only else ()
+    return _ranked_search(Recipe, Recipe.title, query, limit, criteria)
+
+
+def recipe_search_clause(query: str):
+    """
+    WHERE clause restricting a recipe listing to search matches (title or
+    cuisine), for listings with their own ordering such as the admin table.
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return Recipe.id.is_(None)
+    if _is_postgres():
+        pattern = _like_pattern(query)
+        return or_(
+            literal_column(RECIPE_TSVECTOR).op('@@')(func.to_tsquery('simple', _prefix_tsquery(tokens))),
+            Recipe.title.ilike(pattern, escape='\\'),
+            Recipe.cuisine.ilike(pattern, escape='\\'),
+        )
+    words, substrings = _sqlite_matches('recipe_fts', query.strip(), tokens)
+    if substrings is None:
+        return Recipe.id.in_(db.select(words.c.id))
+    return or_(Recipe.id.in_(db.select(words.c.id)), Recipe.id.in_(db.select(substrings.c.id)))
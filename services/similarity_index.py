@@ -0,0 +1,228 @@
+"""
+Recipe similarity index — MinHash signatures with LSH banding.
+
+A recipe is the set of its ingredient ids plus its cuisine and protein, so
+two recipes are similar when their feature sets overlap (Jaccard). Each
+recipe's set is compressed to a NUM_PERM-value MinHash signature (the share
+of equal values estimates the Jaccard similarity). The signature is then cut
+into BANDS bands of ROWS values, and each band is hashed to a bucket. Recipes
+that share a bucket in any band are candidates. With 32 bands of 2 rows,
+pairs from about 0.2 Jaccard up are likely to collide.
+
+Signatures and band buckets are stored in recipe_signature / recipe_lsh_band
+and refreshed at commit time for every recipe whose ingredient lines,
+cuisine or protein changed. A top-k lookup is therefore two indexed queries
+plus a NumPy comparison of at most CANDIDATE_LIMIT signatures. The candidates
+are the ones sharing the most buckets.
+
+Existing recipes are covered by scripts/build_similarity_index.py.
+"""
+
+import hashlib
+from typing import NamedTuple
+
+import numpy as np
+from sqlalchemy import event, func, inspect, tuple_
+
+from database.models import db, Recipe, RecipeIngredient, RecipeSignature, RecipeLshBand
+from services.commit_hooks import SIMILARITY_HOOK, on_commit, track
+
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SIMILAR_LIMIT = 10
+CANDIDATE_LIMIT = 200   # candidates (most shared buckets first) re-ranked by signature agreement
+
+# Hash family h(x) = (a * x + b) mod p over 31-bit feature hashes: a * x stays below 2**62
+_PRIME = (1 << 31) - 1
+
+# Recipe columns that are features
+FEATURE_FIELDS = ('cuisine', 'protein_type')
+# RecipeIngredient columns that change a recipe's ingredient set
+LINE_FIELDS = ('recipe_id', 'ingredient_id')
+
+
+def _hash31(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big') % _PRIME
+
+
+# Derived from fixed strings rather than a RNG, so stored signatures never go stale across NumPy versions
+_A = np.array([_hash31(f'minhash:a:{i}') or 1 for i in range(NUM_PERM)], dtype=np.uint64)
+_B = np.array([_hash31(f'minhash:b:{i}') for i in range(NUM_PERM)], dtype=np.uint64)
+
+
+class SimilarRecipe(NamedTuple):
+    recipe_id: int
+    similarity: float   # estimated Jaccard similarity of the feature sets
+
+
+def recipe_features(ingredient_ids, cuisine: str | None, protein: str | None) -> set[str]:
+    features = {f'i:{i}' for i in ingredient_ids if i is not None}
+    if cuisine:
+        features.add(f'c:{cuisine.lower()}')
+    if protein:
+        features.add(f'p:{protein.lower()}')
+    return features
+
+
+def minhash(features) -> np.ndarray:
+    """NUM_PERM uint32 MinHash signature of a feature set (all _PRIME for an empty set)."""
+    values = np.array([_hash31(f) for f in features], dtype=np.uint64)
+    if not len(values):
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint32)
+    hashed = (values[:, None] * _A[None, :] + _B[None, :]) % _PRIME
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> list[int]:
+    """One signed 64-bit bucket per band (BigInteger-safe)."""
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].astype('<u4').tobytes()
+        digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def estimate_similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of `signature` with each row of `others`."""
+    return (others == signature[None, :]).mean(axis=1)
+
+
+def _to_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype('<u4').tobytes()
+
+
+def _from_bytes(raw: bytes) -> np.ndarray:
+    return np.frombuffer(raw, dtype='<u4').astype(np.uint32)
+
+
+# ---------------------------------------------------------------------------
+# Index maintenance
+# ---------------------------------------------------------------------------
+
+def _current_features(recipe_ids) -> dict[int, set[str]]:
+    """{recipe_id: feature set} from the DB, for the recipes of `recipe_ids` that exist."""
+    recipes = db.session.execute(
+        db.select(Recipe.id, Recipe.cuisine, Recipe.protein_type).where(Recipe.id.in_(recipe_ids))
+    ).all()
+    ingredients: dict[int, list[int]] = {}
+    for recipe_id, ingredient_id in db.session.execute(
+        db.select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id)
+        .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+    ):
+        ingredients.setdefault(recipe_id, []).append(ingredient_id)
+    return {
+        recipe_id: recipe_features(ingredients.get(recipe_id, ()), cuisine, protein)
+        for recipe_id, cuisine, protein in recipes
+    }
+
+
+def sync_recipe_signatures(recipe_ids) -> int:
+    """
+    Recomputes the signatures and band buckets of `recipe_ids` (two reads,
+    two deletes, two inserts). Flushes nothing; the caller commits.
+    Returns the number of recipes indexed.
+    """
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return 0
+    features = _current_features(recipe_ids)
+
+    db.session.execute(db.delete(RecipeLshBand).where(RecipeLshBand.recipe_id.in_(recipe_ids)))
+    db.session.execute(db.delete(RecipeSignature).where(RecipeSignature.recipe_id.in_(recipe_ids)))
+    if not features:
+        return 0
+
+    signatures, bands = [], []
+    for recipe_id, feature_set in features.items():
+        signature = minhash(feature_set)
+        signatures.append({'recipe_id': recipe_id, 'signature': _to_bytes(signature)})
+        bands += [{'band': band, 'bucket': bucket, 'recipe_id': recipe_id}
+                  for band, bucket in enumerate(band_buckets(signature))]
+    db.session.execute(db.insert(RecipeSignature), signatures)
+    db.session.execute(db.insert(RecipeLshBand), bands)
+    return len(signatures)
+
+
+def queue_signature_refresh(recipe_ids) -> None:
+    """For writes that bypass the ORM (e.g. ingredient merges): refresh these recipes at commit."""
+    track(db.session(), SIMILARITY_HOOK, recipe_ids)
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def _signature_of(recipe_id: int) -> np.ndarray | None:
+    raw = db.session.execute(
+        db.select(RecipeSignature.signature).where(RecipeSignature.recipe_id == recipe_id)
+    ).scalar()
+    if raw is not None:
+        return _from_bytes(raw)
+    # Not indexed yet (e.g. before the backfill): compute it without storing
+    features = _current_features({recipe_id}).get(recipe_id)
+    return None if features is None else minhash(features)
+
+
+def similar_recipes(recipe_id: int, limit: int = SIMILAR_LIMIT) -> list[SimilarRecipe]:
+    """The `limit` approved recipes most similar to `recipe_id`, most similar first."""
+    signature = _signature_of(recipe_id)
+    if signature is None:
+        return []
+
+    keys = list(enumerate(band_buckets(signature)))
+    shared = func.count().label('shared')
+    candidates = db.session.execute(
+        db.select(RecipeLshBand.recipe_id, shared)
+        .join(Recipe, Recipe.id == RecipeLshBand.recipe_id)
+        .where(tuple_(RecipeLshBand.band, RecipeLshBand.bucket).in_(keys),
+               RecipeLshBand.recipe_id != recipe_id,
+               Recipe.status == 'approved')
+        .group_by(RecipeLshBand.recipe_id)
+        .order_by(shared.desc(), RecipeLshBand.recipe_id)
+        .limit(CANDIDATE_LIMIT)
+    ).scalars().all()
+    if not candidates:
+        return []
+
+    rows = db.session.execute(
+        db.select(RecipeSignature.recipe_id, RecipeSignature.signature)
+        .where(RecipeSignature.recipe_id.in_(candidates))
+    ).all()
+    ids = [r.recipe_id for r in rows]
+    scores = estimate_similarity(signature, np.stack([_from_bytes(r.signature) for r in rows]))
+    ranked = sorted(zip(ids, scores.tolist()), key=lambda pair: (-pair[1], pair[0]))
+    return [SimilarRecipe(rid, score) for rid, score in ranked[:limit]]
+
+
+# ---------------------------------------------------------------------------
+# Tracking: remember recipes whose features changed per transaction,
+# re-index them on commit.
+# ---------------------------------------------------------------------------
+
+@event.listens_for(db.session, 'after_flush')
+def _track_feature_changes(session, flush_context):
+    changed = set()
+    for obj in session.new:
+        if isinstance(obj, (Recipe, RecipeIngredient)):
+            changed.add(obj.id if isinstance(obj, Recipe) else obj.recipe_id)
+    for obj in session.deleted:
+        if isinstance(obj, RecipeIngredient):
+            changed.add(obj.recipe_id)
+    for obj in session.dirty:
+        if isinstance(obj, Recipe):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in FEATURE_FIELDS):
+                changed.add(obj.id)
+        elif isinstance(obj, RecipeIngredient):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in LINE_FIELDS):
+                changed.add(obj.recipe_id)
+                changed.update(attrs.recipe_id.history.deleted or ())
+    track(session, SIMILARITY_HOOK, changed)
+
+
+@on_commit(SIMILARITY_HOOK)
+def _sync_signatures_on_commit(session, pending):
+    sync_recipe_signatures(pending['ids'])
@@ -0,0 +1,205 @@
+"""
+Unit conversion engine — amount + unit → grams, for every nutrition path.
+
+The conversion rules live in utils.unit_helpers.grams_per_unit. This module
+precomputes them per ingredient into one lookup table keyed by
+(ingredient_id, canonical_unit), so process_recipe_workflow (Rule A),
+nutrition_service and the recalculation paths all resolve grams with a dict
+lookup instead of re-running string normalisation and unit tables per row.
+
+The table is versioned like the pantry snapshot (cache_version scope
+'unit_conversions'): any flushed change to an ingredient's unit data bumps it
+and each worker rebuilds on its next check. New ingredients without unit data
+of their own (the common case for pending ones) convert by the generic rules
+and don't bump; recipe lines using an ingredient the table hasn't seen yet
+resolve by those rules. A session whose uncommitted writes bumped the scope
+reads a fresh table instead of caching one.
+"""
+
+import threading
+import time
+from functools import lru_cache
+
+from sqlalchemy import event, inspect
+
+from database.models import db, Ingredient
+from services.cache_version_service import UNIT_CONVERSION_SCOPE, get_version, bump_version
+from utils.unit_helpers import (
+    normalize_unit, grams_per_unit, MASS_TO_GRAMS, VOLUME_TO_ML, COUNT_UNITS, FALLBACK_GRAMS
+)
+
+CONVERSION_VERSION_CHECK_SECONDS = 5.0
+
+# Ingredient columns the conversion rules read
+CONVERSION_FIELDS = ('name', 'default_unit', 'average_g_per_unit', 'density_g_per_ml')
+
+# Units precomputed for every ingredient (plus each ingredient's own default unit)
+TABLE_UNITS = tuple(dict.fromkeys((*MASS_TO_GRAMS, *VOLUME_TO_ML, *COUNT_UNITS, *FALLBACK_GRAMS)))
+
+_table_lock = threading.Lock()
+_table = None
+_last_version_check = 0.0
+
+
+@lru_cache(maxsize=2048)
+def canonical_unit(unit) -> str:
+    """normalize_unit, memoised — recipes reuse a small set of unit strings."""
+    return normalize_unit(str(unit)) if unit is not None else ""
+
+
+@lru_cache(maxsize=256)
+def generic_grams(unit: str) -> tuple[float, bool] | None:
+    """grams_per_unit of a canonical unit for an ingredient with no unit data of its own."""
+    return grams_per_unit(unit)
+
+
+def has_own_conversions(name, default_unit, average_g_per_unit, density_g_per_ml) -> bool:
+    """Whether an ingredient's conversions differ from the generic rules anywhere in the table."""
+    units = TABLE_UNITS + ((canonical_unit(default_unit),) if default_unit else ())
+    return any(grams_per_unit(unit, default_unit, average_g_per_unit, density_g_per_ml, name) != generic_grams(unit)
+               for unit in units)
+
+
+class ConversionTable:
+    """Immutable {(ingredient_id, canonical_unit): (grams_per_unit, exact)} lookup."""
+
+    def __init__(self, rows=(), version: int | None = None):
+        """`rows`: (id, name, default_unit, average_g_per_unit, density_g_per_ml) tuples."""
+        self.version = version
+        self._grams: dict[tuple[int, str], tuple[float, bool]] = {}
+        self._ids: set[int] = set()
+        for ingredient_id, name, default_unit, avg, density in rows:
+            self._ids.add(ingredient_id)
+            units = TABLE_UNITS + ((canonical_unit(default_unit),) if default_unit else ())
+            for unit in units:
+                conversion = grams_per_unit(unit, default_unit, avg, density, name)
+                if conversion is not None:
+                    self._grams[(ingredient_id, unit)] = conversion
+
+    def __len__(self) -> int:
+        return len(self._grams)
+
+    def __contains__(self, ingredient_id) -> bool:
+        return ingredient_id in self._ids
+
+    def lookup(self, ingredient_id: int, unit) -> tuple[float, bool] | None:
+        """(grams_per_unit, exact) for a raw or canonical unit string, or None."""
+        return self._grams.get((ingredient_id, canonical_unit(unit)))
+
+    def to_grams(self, ingredient_id: int, amount, unit, exact_only: bool = False) -> float | None:
+        """Grams for `amount` `unit` of an ingredient; None if unknown (or only assumed, with exact_only)."""
+        conversion = self.lookup(ingredient_id, unit)
+        if conversion is None or (exact_only and not conversion[1]):
+            return None
+        return float(amount or 0) * conversion[0]
+
+    def convert_many(self, usages, exact_only: bool = False) -> list[float | None]:
+        """Batch to_grams over (ingredient_id, amount, unit) tuples, e.g. a whole recipe."""
+        return [self.to_grams(i, amount, unit, exact_only) for i, amount, unit in usages]
+
+    def resolve_gram_weights(self, usages) -> list[float | None]:
+        """
+        The gram weight every nutrition path uses for a recipe line: the stored
+        gram_weight when positive, otherwise the converted amount + unit.
+        Ingredients added since the table was built (without unit data, so
+        without a version bump) convert by the generic rules.
+        `usages`: (ingredient_id, amount, unit, gram_weight) tuples.
+        """
+        return [gram_weight if gram_weight is not None and gram_weight > 0
+                else self.to_grams(i, amount, unit) if i in self._ids
+                else _generic_to_grams(amount, unit)
+                for i, amount, unit, gram_weight in usages]
+
+
+def _generic_to_grams(amount, unit) -> float | None:
+    conversion = generic_grams(canonical_unit(unit))
+    return float(amount or 0) * conversion[0] if conversion is not None else None
+
+
+def ingredient_grams(ingredient: Ingredient, amount, unit, table: ConversionTable | None = None,
+                     exact_only: bool = False) -> float | None:
+    """
+    to_grams for an Ingredient instance. Falls back to the rules on the
+    instance itself when it isn't in the table yet (created in this transaction).
+    """
+    table = table if table is not None else get_conversion_table()
+    if ingredient.id in table:
+        return table.to_grams(ingredient.id, amount, unit, exact_only)
+    conversion = grams_per_unit(canonical_unit(unit), ingredient.default_unit, ingredient.average_g_per_unit,
+                                ingredient.density_g_per_ml, ingredient.name)
+    if conversion is None or (exact_only and not conversion[1]):
+        return None
+    return float(amount or 0) * conversion[0]
+
+
+def load_conversion_table(version: int | None = None) -> ConversionTable:
+    """Builds a table from the session's current view of the ingredients (uncommitted changes included)."""
+    stmt = db.select(Ingredient.id, Ingredient.name, Ingredient.default_unit,
+                     Ingredient.average_g_per_unit, Ingredient.density_g_per_ml)
+    return ConversionTable(db.session.execute(stmt).all(), version)
+
+
+def get_conversion_table() -> ConversionTable:
+    """
+    The worker's conversion table, rebuilt only when the DB version moved
+    (checked at most every CONVERSION_VERSION_CHECK_SECONDS). Inside a
+    transaction that bumped the version, a fresh table is read and NOT
+    cached: its rows and version are uncommitted and may roll back.
+    """
+    global _table, _last_version_check
+    if db.session.info.get('unit_conversions_bumped'):
+        return load_conversion_table()
+    table = _table
+    if table is not None and time.monotonic() - _last_version_check < CONVERSION_VERSION_CHECK_SECONDS:
+        return table
+
+    with _table_lock:
+        checked_at = time.monotonic()
+        # Version before rows, as in pantry_service.get_pantry_snapshot
+        version = get_version(UNIT_CONVERSION_SCOPE)
+        if _table is None or _table.version != version:
+            _table = load_conversion_table(version)
+        _last_version_check = checked_at
+        return _table
+
+
+def expire_conversion_table():
+    """Forces the next get_conversion_table() in this worker to re-check the DB version."""
+    global _last_version_check
+    _last_version_check = 0.0
+
+
+# ---------------------------------------------------------------------------
+# Invalidation: added ingredients with unit data, deleted ingredients and
+# changed unit data bump the scope inside the writer's transaction.
+# ---------------------------------------------------------------------------
+
+def _touches_conversions(session) -> bool:
+    if any(isinstance(obj, Ingredient) and has_own_conversions(*(getattr(obj, f) for f in CONVERSION_FIELDS))
+           for obj in session.new) \
+            or any(isinstance(obj, Ingredient) for obj in session.deleted):
+        return True
+    for obj in session.dirty:
+        if isinstance(obj, Ingredient):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in CONVERSION_FIELDS):
+                return True
+    return False
+
+
+@event.listens_for(db.session, 'before_flush')
+def _bump_conversion_version_on_flush(session, flush_context, instances):
+    if not session.info.get('unit_conversions_bumped') and _touches_conversions(session):
+        bump_version(UNIT_CONVERSION_SCOPE, session.connection())
+        session.info['unit_conversions_bumped'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _expire_conversions_after_commit(session):
+    if session.info.pop('unit_conversions_bumped', None):
+        expire_conversion_table()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _reset_conversion_flag_after_rollback(session):
+    session.info.pop('unit_conversions_bumped', None)
@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+from flask import Flask
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.models import db
+from services import commit_hooks
+from services.commit_hooks import (
+    COLLECTION_HOOK, NUTRITION_HOOK, SIMILARITY_HOOK, on_commit, take_pending, track
+)
+
+
+class TestCommitHooks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp.name, 'hooks.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        # Swap in recording hooks for the real services' ones
+        self.calls = []
+        self.hooks = mock.patch.dict(commit_hooks._hooks, clear=True)
+        self.hooks.start()
+        for name in (COLLECTION_HOOK, NUTRITION_HOOK):
+            on_commit(name)(lambda session, pending, name=name: self.calls.append((name, pending)))
+
+    def tearDown(self):
+        self.hooks.stop()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+    def test_hooks_run_once_in_declared_order(self):
+        session = db.session()
+        track(session, COLLECTION_HOOK, {3, None})
+        track(session, NUTRITION_HOOK, {1}, kind='ingredients')
+        track(session, NUTRITION_HOOK, {2}, kind='recipes')
+        track(session, SIMILARITY_HOOK, set())
+        db.session.commit()
+        self.assertEqual(self.calls, [
+            (NUTRITION_HOOK, {'ingredients': {1}, 'recipes': {2}}),
+            (COLLECTION_HOOK, {'ids': {3}}),
+        ])
+        db.session.commit()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_work_queued_by_a_hook_runs_in_the_same_commit(self):
+        on_commit(NUTRITION_HOOK)(lambda session, pending: track(session, COLLECTION_HOOK, {7}))
+        track(db.session(), NUTRITION_HOOK, {1})
+        db.session.commit()
+        self.assertEqual(self.calls, [(COLLECTION_HOOK, {'ids': {7}})])
+
+    def test_endless_requeueing_is_dropped_after_max_passes(self):
+        on_commit(NUTRITION_HOOK)(lambda session, pending: track(session, NUTRITION_HOOK, {1}))
+        track(db.session(), NUTRITION_HOOK, {1})
+        with self.assertLogs(commit_hooks.logger, 'ERROR'):
+            db.session.commit()
+        self.assertNotIn(commit_hooks._PENDING_KEY, db.session().info)
+        # The next commit starts clean
+        db.session.commit()
+        self.assertEqual(self.calls, [])
+
+    def test_rollback_discards_and_take_pending_claims(self):
+        session = db.session()
+        session.execute(db.text('SELECT 1'))  # tracking happens inside a begun transaction
+        track(session, COLLECTION_HOOK, {1})
+        db.session.rollback()
+        db.session.commit()
+        self.assertEqual(self.calls, [])
+
+        track(session, NUTRITION_HOOK, {4}, kind='ingredients')
+        self.assertEqual(take_pending(session, NUTRITION_HOOK), {'ingredients': {4}})
+        db.session.commit()
+        self.assertEqual(self.calls, [])
+
+    def test_unknown_hook_is_rejected(self):
+        with self.assertRaises(ValueError):
+            on_commit('nope')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import random
+import tempfile
+from unittest import mock
+
+from flask import Flask
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.models import db, Recipe, User, UserRecipeInteraction
+from services import feed_sampler
+from services.feed_sampler import FeedDeck, next_feed_batch, permute
+
+
+class TestFeedDeck(unittest.TestCase):
+    def test_permutation_is_a_bijection(self):
+        for span in (1, 2, 7, 64, 1000, 1025):
+            self.assertEqual(sorted(permute(p, span, seed=1234) for p in range(span)), list(range(span)))
+
+    def test_seed_changes_the_order(self):
+        first = [permute(p, 1000, seed=1) for p in range(20)]
+        second = [permute(p, 1000, seed=2) for p in range(20)]
+        self.assertNotEqual(first, second)
+        self.assertNotEqual(first, sorted(first))
+
+    def test_state_round_trip_and_invalid_state(self):
+        deck = FeedDeck(seed=9, size=50, cursor=12)
+        self.assertEqual(FeedDeck.from_state(deck.state()).state(), deck.state())
+        self.assertIsNone(FeedDeck.from_state({'seed': 'x'}))
+        # Decks dealt over the old id-range state are reshuffled
+        self.assertIsNone(FeedDeck.from_state({'seed': 9, 'lo': 100, 'span': 50, 'cursor': 12}))
+
+
+class TestFeedBatches(unittest.TestCase):
+    """next_feed_batch against a real (SQLite) catalog."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp.name, 'feed.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        feed_sampler._approved_ids = (None, ())
+        # 40 approved recipes spread thinly over ids up to ~40k, drafts in between
+        for i in range(40):
+            db.session.add(Recipe(id=1 + i * 1000, title=f'Recipe {i}', cuisine='Thai', difficulty='Easy', status='approved'))
+            db.session.add(Recipe(id=2 + i * 1000, title=f'Draft {i}', cuisine='Thai', difficulty='Easy', status='draft'))
+        db.session.add(User(id=1, email='eater@example.com', password_hash='x'))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        feed_sampler._approved_ids = (None, ())
+        self.tmp.cleanup()
+
+    def test_sparse_ids_fill_batches_from_the_deck(self):
+        with mock.patch.object(feed_sampler, '_top_up_batch', side_effect=AssertionError('fallback used')):
+            state, seen = None, []
+            for _ in range(4):
+                recipes, state = next_feed_batch(state, limit=10)
+                self.assertEqual(len(recipes), 10)
+                seen += [r.id for r in recipes]
+        # One full pass: every approved recipe exactly once, no drafts
+        self.assertEqual(sorted(seen), [1 + i * 1000 for i in range(40)])
+
+    def test_heavy_user_batches_are_topped_up(self):
+        swiped = [1 + i * 1000 for i in range(37)]
+        for recipe_id in swiped:
+            db.session.add(UserRecipeInteraction(user_id=1, recipe_id=recipe_id, status='pass'))
+        db.session.commit()
+
+        # Three probes cannot find three unseen recipes among 40: the seek fills the batch
+        random.seed(1234)
+        with mock.patch.object(feed_sampler, 'MAX_PROBES', 3), \
+                mock.patch.object(feed_sampler, '_top_up_batch', wraps=feed_sampler._top_up_batch) as top_up:
+            recipes, _ = next_feed_batch(None, user_id=1, limit=3)
+        top_up.assert_called_once()
+        self.assertEqual(sorted(r.id for r in recipes), [37001, 38001, 39001])
+
+        for recipe_id in (37001, 38001, 39001):
+            db.session.add(UserRecipeInteraction(user_id=1, recipe_id=recipe_id, status='favorite'))
+        db.session.commit()
+        # Seen everything: passes come back, favourites do not
+        recipes, _ = next_feed_batch(None, user_id=1, limit=5)
+        self.assertEqual(len(recipes), 5)
+        self.assertTrue({r.id for r in recipes} <= set(swiped))
+
+    def test_approval_changes_reach_the_deck(self):
+        recipe = db.session.get(Recipe, 2)
+        recipe.status = 'approved'
+        db.session.commit()
+        self.assertIn(2, feed_sampler.approved_recipe_ids())
+        self.assertEqual(FeedDeck.shuffle().size, 41)
+
+
+if __name__ == '__main__':
+    unittest.main()
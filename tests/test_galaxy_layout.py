@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+import math
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.galaxy_layout import (
+    NEW_ANCHOR_OFFSET, RECIPE_SPACING, cluster_center, layout_anchors, parse_bbox,
+    place_new_anchor, spiral_offsets,
+)
+
+
+class TestGalaxyLayout(unittest.TestCase):
+    def test_anchor_layout_is_deterministic_and_complete(self):
+        sizes = {('Italian', 'Chicken'): 30, ('Italian', 'Beef'): 5, ('Thai', 'Chicken'): 12, ('Greek', None): 3}
+        anchors = layout_anchors(sizes)
+        self.assertEqual(set(anchors), {('cuisine', 'Italian'), ('cuisine', 'Thai'), ('cuisine', 'Greek'),
+                                        ('protein', 'Chicken'), ('protein', 'Beef')})
+        self.assertEqual(anchors, layout_anchors(sizes))
+        self.assertEqual(layout_anchors({}), {})
+        self.assertEqual(layout_anchors({('Greek', None): 2}), {('cuisine', 'Greek'): (0.0, 0.0)})
+
+    def test_spiral_fills_outwards_without_overlaps(self):
+        offsets = spiral_offsets(np.arange(200))
+        radii = np.hypot(offsets[:, 0], offsets[:, 1])
+        self.assertTrue(np.all(np.diff(radii) > 0))
+        distances = np.hypot(*(offsets[:, None, :] - offsets[None, :, :]).transpose(2, 0, 1))
+        np.fill_diagonal(distances, np.inf)
+        self.assertGreater(distances.min(), RECIPE_SPACING / 2)
+        # Appending slots later gives the same points as laying them out at once
+        self.assertTrue(np.allclose(spiral_offsets(np.arange(150, 200)), offsets[150:]))
+
+    def test_cluster_center_leans_towards_the_cuisine(self):
+        anchors = {('cuisine', 'Thai'): (0.0, 0.0), ('protein', 'Tofu'): (300.0, 0.0)}
+        self.assertTrue(np.allclose(cluster_center(anchors, 'Thai', 'Tofu'), (100.0, 0.0)))
+        self.assertEqual(tuple(cluster_center(anchors, 'Thai', None)), (0.0, 0.0))
+
+    def test_new_anchor_sits_next_to_its_neighbours(self):
+        anchors = {('cuisine', 'Thai'): (500.0, 500.0), ('protein', 'Tofu'): (-800.0, 0.0)}
+        x, y = place_new_anchor(anchors, ('cuisine', 'Lao'), [('protein', 'Tofu')])
+        self.assertAlmostEqual(math.hypot(x + 800.0, y), NEW_ANCHOR_OFFSET)
+        x, y = place_new_anchor(anchors, ('protein', 'Seitan'), [])
+        self.assertGreater(math.hypot(x, y), 800.0)
+
+    def test_parse_bbox(self):
+        self.assertEqual(parse_bbox('10,-5,-10,5'), (-10.0, -5.0, 10.0, 5.0))
+        for bad in (None, '', '1,2,3', 'a,b,c,d', '0,0,inf,1'):
+            with self.assertRaises(ValueError):
+                parse_bbox(bad)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+import json
+from unittest.mock import patch
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import graph_cache
+
+
+class TestGraphPayload(unittest.TestCase):
+    def setUp(self):
+        graph_cache._payloads.clear()
+        self.builds = 0
+
+    def _build(self):
+        self.builds += 1
+        return {'nodes': [{'id': 'recipe_1'}], 'links': [], 'build': self.builds}
+
+    @patch('services.graph_cache.get_version', return_value=3)
+    def test_payload_is_reused_until_the_version_moves(self, get_version):
+        first = graph_cache.graph_payload('recipe_graph', self._build)
+        second = graph_cache.graph_payload('recipe_graph', self._build)
+        self.assertIs(first, second)
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(json.loads(first.body)['nodes'], [{'id': 'recipe_1'}])
+
+        get_version.return_value = 4
+        third = graph_cache.graph_payload('recipe_graph', self._build)
+        self.assertEqual((third.version, self.builds), (4, 2))
+        # The ETag follows the content
+        self.assertNotEqual(third.etag, first.etag)
+
+    @patch('services.graph_cache.get_version', return_value=1)
+    def test_scopes_are_cached_separately(self, get_version):
+        graph_cache.graph_payload('recipe_graph', self._build)
+        graph_cache.graph_payload('ingredient_graph', self._build)
+        self.assertEqual(self.builds, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
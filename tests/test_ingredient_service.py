@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import tempfile
+
+from flask import Flask
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.models import db, Ingredient, Recipe, RecipeIngredient, RecipeProtein
+from services.ingredient_service import merge_ingredients, merge_ingredients_batch, resolve_merge_chains
+
+
+class TestResolveMergeChains(unittest.TestCase):
+    def test_chains_collapse_to_the_final_winner(self):
+        # (winner, loser): B←A, C←B, C←D, E←F
+        mapping = resolve_merge_chains([(2, 1), (3, 2), (3, 4), (5, 6)])
+        self.assertEqual(mapping, {1: 3, 2: 3, 4: 3, 6: 5})
+
+    def test_order_of_pairs_does_not_matter(self):
+        self.assertEqual(resolve_merge_chains([(3, 2), (2, 1)]), {1: 3, 2: 3})
+
+    def test_invalid_batches_are_rejected(self):
+        with self.assertRaises(ValueError):
+            resolve_merge_chains([(1, 1)])
+        with self.assertRaises(ValueError):
+            resolve_merge_chains([(2, 1), (3, 1)])
+        with self.assertRaises(ValueError):
+            resolve_merge_chains([(2, 1), (3, 2), (1, 3)])
+
+
+class TestMergeRefreshesRecipes(unittest.TestCase):
+    """Merges re-point lines with set-based SQL; the derived recipe columns must follow."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp.name, 'merge.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.tofu = self.ingredient('Tofu Block', 50.0)
+        self.chicken = self.ingredient('Chicken Breast', 165.0)
+        self.recipe = Recipe(title='Stir Fry', cuisine='Chinese', difficulty='Easy', base_servings=2, total_calories=50.0)
+        db.session.add(self.recipe)
+        db.session.flush()
+        db.session.add(RecipeIngredient(recipe_id=self.recipe.id, ingredient_id=self.tofu.id,
+                                        amount=100, unit='g', gram_weight=100))
+        db.session.commit()
+        self.assertEqual(self.proteins(), ['Tofu'])
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+    def ingredient(self, name, calories):
+        ingredient = Ingredient(food_id=f'F{name}', name=name, status='active', calories_per_100g=calories)
+        db.session.add(ingredient)
+        db.session.flush()
+        return ingredient
+
+    def proteins(self):
+        return list(db.session.execute(
+            db.select(RecipeProtein.protein).where(RecipeProtein.recipe_id == self.recipe.id)
+        ).scalars())
+
+    def test_merge_refreshes_nutrition_and_proteins(self):
+        result = merge_ingredients(self.chicken.id, self.tofu.id)
+        self.assertTrue(result['success'], result['message'])
+        recipe = db.session.get(Recipe, self.recipe.id)
+        self.assertEqual(recipe.total_calories, 165.0)
+        self.assertEqual(recipe.calories_per_serving, 82.5)
+        self.assertEqual(self.proteins(), ['Chicken'])
+
+    def test_batch_merge_refreshes_nutrition_and_proteins(self):
+        result = merge_ingredients_batch([(self.chicken.id, self.tofu.id)])
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(db.session.get(Recipe, self.recipe.id).total_calories, 165.0)
+        self.assertEqual(self.proteins(), ['Chicken'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+import datetime
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from database.models import Recipe, UserQueue, UserRecipeInteraction
+from services.keyset_pagination import SortKey, after_clause, encode_cursor, decode_cursor
+
+
+class TestKeysetPagination(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        keys = [SortKey(Recipe.id, True, 'bool'), SortKey(UserQueue.added_at, True, 'datetime'), SortKey(Recipe.id)]
+        values = [True, datetime.datetime(2025, 3, 1, 12, 30), 42]
+        self.assertEqual(decode_cursor(keys, encode_cursor(values)), values)
+
+    def test_invalid_cursor_raises_value_error(self):
+        keys = [SortKey(Recipe.id, True)]
+        for cursor in ('not-a-cursor', encode_cursor([1, 2]), encode_cursor(['x'])):
+            with self.assertRaises(ValueError):
+                decode_cursor(keys, cursor)
+
+    def test_after_clause_follows_key_directions(self):
+        keys = [SortKey(UserQueue.position), SortKey(UserQueue.id, True)]
+        stmt = select(UserQueue.id).where(after_clause(keys, [3, 10]))
+        sql = str(stmt.compile(compile_kwargs={'literal_binds': True}))
+        self.assertIn('user_queue.position > 3', sql)
+        self.assertIn('user_queue.position = 3 AND user_queue.id < 10', sql)
+
+    def test_boolean_keys_page_by_equality(self):
+        keys = [SortKey(UserRecipeInteraction.is_super_like, True, 'bool'), SortKey(Recipe.id, True)]
+        sql = str(select(Recipe.id).where(after_clause(keys, [True, 7])).compile(compile_kwargs={'literal_binds': True}))
+        self.assertIn('user_recipe_interaction.is_super_like = false', sql)
+        self.assertIn('recipe.id < 7', sql)
+
+
+if __name__ == '__main__':
+    unittest.main()
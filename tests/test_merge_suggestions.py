@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import tempfile
+
+from flask import Flask
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from thefuzz import fuzz
+from database.models import db, Ingredient
+from services.merge_suggestions import (
+    _score_rows, get_suggested_merges, merge_suggestions_built, pending_merge_changes, update_merge_suggestions,
+)
+
+ROWS = [
+    (1, "cherry tomatoes", "vegetables"),
+    (2, "cherry tomato", "vegetables"),
+    (3, "oat milk", "dairy"),
+    (4, "goat milk", "dairy"),
+    (5, "lemon juice", "fruits"),
+    (6, "lime juice", "fruits"),
+    (7, "parmesan chese", "dairy"),
+    (8, "parmesan cheese", "cheese"),
+]
+
+
+class TestMergeSuggestionScoring(unittest.TestCase):
+    def test_rules_match_the_pairwise_scan(self):
+        found = _score_rows(ROWS, ROWS)
+        # "oat milk" / "goat milk" passes the containment floor too (same as the original scan)
+        self.assertEqual(set(found), {(1, 2), (3, 4), (7, 8)})
+
+        containment = found[(1, 2)]
+        self.assertEqual((containment["winner_id"], containment["loser_id"]), (2, 1))
+        self.assertEqual(containment["score"], fuzz.ratio("cherry tomatoes", "cherry tomato") + 5)
+        self.assertEqual(containment["reason"], "Base Ingredient vs Prep Style")
+
+        typo = found[(7, 8)]
+        self.assertEqual((typo["winner_id"], typo["loser_id"]), (7, 8))
+        self.assertEqual(typo["score"], fuzz.ratio("parmesan chese", "parmesan cheese"))
+        self.assertEqual(typo["reason"], "High Lexical Similarity (Typo/Plural)")
+
+    def test_candidate_columns_restrict_the_scan(self):
+        self.assertEqual(set(_score_rows(ROWS[:2], ROWS, candidate_cols=[0, 1])), {(1, 2)})
+        self.assertEqual(_score_rows(ROWS[:2], ROWS, candidate_cols=[4, 5]), {})
+
+
+class TestIncrementalSuggestions(unittest.TestCase):
+    """The suggestion table against a real (SQLite) ingredient list."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp.name, 'merge.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.add('Cherry Tomato', 'Oat Milk')
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+    def add(self, *names):
+        for name in names:
+            db.session.add(Ingredient(food_id=f'F{name}', name=name, main_category='vegetables', status='active'))
+        db.session.commit()
+
+    def pairs(self):
+        return {(s['winner_name'], s['loser_name']) for s in get_suggested_merges()}
+
+    def test_changes_queue_until_the_first_build(self):
+        self.add('Cherry Tomatoes')
+        self.assertFalse(merge_suggestions_built())
+        self.assertEqual(self.pairs(), set())
+        self.assertEqual(pending_merge_changes(), 3)
+
+        update_merge_suggestions()
+        self.assertEqual(self.pairs(), {('Cherry Tomato', 'Cherry Tomatoes')})
+        self.assertEqual(pending_merge_changes(), 0)
+
+    def test_added_and_renamed_ingredients_are_scored_on_commit(self):
+        update_merge_suggestions()
+        self.assertEqual(self.pairs(), set())
+
+        self.add('Cherry Tomatoes')
+        self.assertEqual(self.pairs(), {('Cherry Tomato', 'Cherry Tomatoes')})
+        self.assertEqual(pending_merge_changes(), 0)
+
+        oat = db.session.execute(db.select(Ingredient).where(Ingredient.name == 'Oat Milk')).scalar_one()
+        oat.name = 'Cherry Tomatos'
+        db.session.commit()
+        self.assertIn(('Cherry Tomato', 'Cherry Tomatos'), self.pairs())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+from flask import Flask
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.models import db, Ingredient, Recipe, RecipeIngredient
+from services import nutrition_engine
+from services.nutrition_engine import compute_recipe_totals, recalculate_nutrition_bulk, sub_recipe_levels
+
+
+class TestSubRecipeLevels(unittest.TestCase):
+    def test_sub_recipes_come_first(self):
+        # 3 uses 2, 2 uses 1, 4 uses 1 and 2
+        levels, cyclic = sub_recipe_levels({1: set(), 2: {1}, 3: {2}, 4: {1, 2}, 5: set()})
+        self.assertEqual(levels, [[1, 5], [2], [3, 4]])
+        self.assertEqual(cyclic, set())
+
+    def test_cycles_are_broken_not_fatal(self):
+        levels, cyclic = sub_recipe_levels({1: {2}, 2: {1}, 3: {1}, 4: {4}})
+        self.assertEqual(cyclic, {1, 2, 4})
+        flat = [r for level in levels for r in level]
+        self.assertEqual(sorted(flat), [1, 2, 3, 4])
+        self.assertLess(flat.index(1), flat.index(3))
+
+
+class TestScopedTotals(unittest.TestCase):
+    """A pass over some recipes reads only what they use."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp.name, 'engine.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        # Sauce: 100 g of Tomato; Pasta: 50 g of Sauce (the ingredient) + 100 g of Noodles; Salad is unrelated
+        tomato, noodles, lettuce = (self.ingredient(n, kcal) for n, kcal in
+                                    (('Tomato', 100.0), ('Noodles', 200.0), ('Lettuce', 15.0)))
+        self.sauce, self.pasta, salad = (self.recipe(t) for t in ('Sauce', 'Pasta', 'Salad'))
+        sauce_ingredient = self.ingredient('Sauce', None, sub_recipe_id=self.sauce)
+        self.line(self.sauce, tomato, 100)
+        self.line(self.pasta, sauce_ingredient, 50)
+        self.line(self.pasta, noodles, 100)
+        self.line(salad, lettuce, 100)
+        self.used = {sauce_ingredient, noodles}
+        recalculate_nutrition_bulk()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+    def ingredient(self, name, calories, **fields):
+        ingredient = Ingredient(food_id=f'F{name}', name=name, calories_per_100g=calories, **fields)
+        db.session.add(ingredient)
+        db.session.flush()
+        return ingredient.id
+
+    def recipe(self, title):
+        recipe = Recipe(title=title, cuisine='Italian', difficulty='Easy')
+        db.session.add(recipe)
+        db.session.flush()
+        return recipe.id
+
+    def line(self, recipe_id, ingredient_id, grams):
+        db.session.add(RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                                        amount=grams, unit='g', gram_weight=grams))
+
+    def test_scoped_pass_matches_the_full_pass(self):
+        ids, totals = compute_recipe_totals()
+        full = dict(zip(ids.tolist(), totals[:, 0].tolist()))
+        self.assertEqual(full[self.pasta], 250.0)
+
+        with mock.patch.object(nutrition_engine, 'load_nutrient_matrix',
+                               wraps=nutrition_engine.load_nutrient_matrix) as nutrient_matrix:
+            ids, totals = compute_recipe_totals([self.pasta])
+        self.assertEqual(ids.tolist(), [self.pasta])
+        self.assertEqual(totals[0, 0], 250.0)
+        self.assertEqual(nutrient_matrix.call_args.args[0], self.used)
+
+        # With its sub-recipe in the batch, both are computed from their lines
+        ids, totals = compute_recipe_totals([self.sauce, self.pasta])
+        self.assertEqual(totals[:, 0].tolist(), [full[self.sauce], full[self.pasta]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from thefuzz import process as fuzz_process
+from thefuzz import fuzz as fuzz_scorer
+from utils.pantry_matcher import PantryMatcher, NGramIndex, preprocess_choice, preprocess_query
+
+PANTRY = {
+    "feta cheese": "000101",
+    "whole eggs": "000102",
+    "unsalted butter": "000103",
+    "salt": "000104",
+    "olive oil": "000105",
+    "crème fraîche": "000106",
+    "lime juice": "000107",
+    "lemon juice": "000108",
+}
+
+QUERIES = ["feta", "lrg eggs", "salt", "olive oil extra", "creme fraiche", "lime", "jalapeño", ""]
+
+
+class TestPantryMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = PantryMatcher(PANTRY)
+        self.keys = list(PANTRY.keys())
+
+    def test_best_matches_thefuzz_extract_one(self):
+        for query in QUERIES:
+            for scorer in (fuzz_scorer.WRatio, fuzz_scorer.token_set_ratio):
+                expected = fuzz_process.extractOne(query, self.keys, scorer=scorer)
+                key, score, _ = self.matcher.best(query, self.matcher_scorer(scorer))
+                self.assertEqual((key, score), expected, f"{query!r} / {scorer.__name__}")
+
+    def test_top_matches_thefuzz_extract(self):
+        results = self.matcher.top(QUERIES, limit=4)
+        i = 0
+        for query in QUERIES:
+            for scorer in (fuzz_scorer.WRatio, fuzz_scorer.token_set_ratio):
+                expected = fuzz_process.extract(query, self.keys, scorer=scorer, limit=4)
+                self.assertEqual(results[i], expected, f"{query!r} / {scorer.__name__}")
+                i += 1
+
+    def test_staged_match_falls_back_to_token_set(self):
+        # "feta" → "feta cheese" scores 90 on WRatio but 100 on token_set_ratio
+        self.assertEqual(self.matcher.match("feta", 85)[2], "WRatio")
+        result = self.matcher.match("feta", 95)
+        self.assertEqual(result[0], "feta cheese")
+        self.assertEqual(result[2], "token_set")
+        self.assertIsNone(self.matcher.match("jalapeño", 85))
+
+    def test_empty_pantry(self):
+        empty = PantryMatcher({})
+        self.assertIsNone(empty.best("salt"))
+        self.assertIsNone(empty.match("salt", 85))
+        self.assertEqual(empty.top(["salt"], limit=3), [[], []])
+
+    def test_blocked_matcher_agrees_with_full_scan(self):
+        blocked = PantryMatcher(PANTRY, blocking=True)
+        for query in QUERIES:
+            self.assertEqual(blocked.match(query, 85), self.matcher.match(query, 85), repr(query))
+        self.assertEqual(blocked.match_many(QUERIES, 85), self.matcher.match_many(QUERIES, 85))
+
+    def test_shortlist_keeps_pantry_order_and_falls_back(self):
+        index = NGramIndex([preprocess_choice(k) for k in self.keys])
+        shortlist = index.shortlist(preprocess_query("lime and lemon juice"), size=2)
+        self.assertEqual(list(shortlist), [self.keys.index("lime juice"), self.keys.index("lemon juice")])
+        # Nothing in common with any key → caller does a full scan
+        self.assertIsNone(index.shortlist(preprocess_query("xyzzy")))
+
+    def test_aliases_widen_the_shortlist(self):
+        pantry = {"cilantro": "000201", "salt": "000104"}
+        plain = NGramIndex([preprocess_choice(k) for k in pantry])
+        aliased = PantryMatcher(pantry, aliases={"000201": ["coriander leaves"]}, blocking=True)
+        self.assertIsNone(plain.shortlist(preprocess_query("coriander")))
+        self.assertEqual(list(aliased.index.shortlist(preprocess_query("coriander"))), [0])
+
+    @staticmethod
+    def matcher_scorer(thefuzz_scorer):
+        from rapidfuzz import fuzz
+        return fuzz.WRatio if thefuzz_scorer is fuzz_scorer.WRatio else fuzz.token_set_ratio
+
+
+if __name__ == '__main__':
+    unittest.main()
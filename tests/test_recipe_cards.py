@@ -0,0 +1,43 @@
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.recipe_cards import CARD_COLUMNS, cards_from_rows, split_labels
+
+
+class TestRecipeCards(unittest.TestCase):
+    def _row(self, recipe_id, diets=None, meal_types=None, *extra):
+        base = (recipe_id, f'Recipe {recipe_id}', 'Italian', 'Easy', 'Chicken',
+                'r.jpg', 20, 640.0, 4)
+        self.assertEqual(len(base), len(CARD_COLUMNS))
+        return base + (diets, meal_types) + extra
+
+    def test_split_labels(self):
+        self.assertEqual(split_labels(None), [])
+        self.assertEqual(split_labels(''), [])
+        self.assertEqual(split_labels('vegan|gluten-free'), ['gluten-free', 'vegan'])
+
+    def test_cards_from_plain_rows(self):
+        card, = cards_from_rows([self._row(7, 'vegan', 'dinner|lunch')])
+        self.assertEqual((card.id, card.title, card.total_calories), (7, 'Recipe 7', 640.0))
+        self.assertEqual(card.diets_list, ['vegan'])
+        self.assertEqual(card.meal_types_list, ['dinner', 'lunch'])
+        self.assertFalse(card.is_super_liked)
+        self.assertFalse(card.is_made)
+        self.assertIsNone(card.queue_position)
+
+    def test_extras_fill_named_fields(self):
+        card, = cards_from_rows([self._row(3, None, None, True, False)], extras=('is_super_liked', 'is_made'))
+        self.assertTrue(card.is_super_liked)
+        self.assertFalse(card.is_made)
+        self.assertEqual(card.diets_list, [])
+
+        card, = cards_from_rows([self._row(4, None, None, 2)], extras=('queue_position',))
+        self.assertEqual(card.queue_position, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
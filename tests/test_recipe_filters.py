@@ -0,0 +1,37 @@
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from database.models import Recipe
+from services.recipe_filters import parse_nutrition_ranges, apply_nutrition_ranges
+from services.nutrition_engine import per_serving_values
+
+
+class TestNutritionRanges(unittest.TestCase):
+    def test_parse_ignores_blank_and_invalid_bounds(self):
+        ranges = parse_nutrition_ranges({
+            'max_calories': '600', 'min_protein': '30', 'min_fat': '', 'max_carbs': 'lots', 'min_carbs': '-5',
+        })
+        self.assertEqual(ranges, {'calories': (None, 600.0), 'protein': (30.0, None)})
+
+    def test_ranges_become_sql_predicates(self):
+        stmt = apply_nutrition_ranges(select(Recipe.id), {'calories': (None, 600.0), 'protein': (30.0, 45.0)})
+        sql = str(stmt.compile(compile_kwargs={'literal_binds': True}))
+        self.assertIn('recipe.calories_per_serving <= 600.0', sql)
+        self.assertIn('recipe.protein_per_serving >= 30.0', sql)
+        self.assertIn('recipe.protein_per_serving <= 45.0', sql)
+
+    def test_per_serving_values(self):
+        values = per_serving_values({'total_calories': 2000.0, 'total_protein': 100.0, 'total_carbs': None,
+                                     'total_fat': 40.0}, 4)
+        self.assertEqual(values, {'calories_per_serving': 500.0, 'protein_per_serving': 25.0,
+                                  'carbs_per_serving': None, 'fat_per_serving': 10.0})
+        self.assertEqual(per_serving_values({'total_calories': 300.0}, 0)['calories_per_serving'], 300.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.recipe_json_cache import _LruTier, _SqliteTier, encode
+
+
+class TestRecipeJsonCache(unittest.TestCase):
+    def test_encode_is_compact_with_content_etag(self):
+        entry = encode({'id': 1, 'title': 'Soup'})
+        self.assertEqual(entry.body, b'{"id":1,"title":"Soup"}')
+        self.assertEqual(entry.etag, encode({'id': 1, 'title': 'Soup'}).etag)
+        self.assertNotEqual(entry.etag, encode({'id': 1, 'title': 'Stew'}).etag)
+
+    def test_lru_evicts_least_recently_used(self):
+        lru = _LruTier(2)
+        lru.put((1, 0, 'admin'), encode(1))
+        lru.put((2, 0, 'admin'), encode(2))
+        lru.get((1, 0, 'admin'))
+        lru.put((3, 0, 'admin'), encode(3))
+        self.assertIsNotNone(lru.get((1, 0, 'admin')))
+        self.assertIsNone(lru.get((2, 0, 'admin')))
+        self.assertIsNotNone(lru.get((3, 0, 'admin')))
+
+    def test_shared_tier_keeps_the_newest_revision(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            shared = _SqliteTier(os.path.join(tmp, 'cache.db'))
+            shared.put((7, 2, 'admin'), encode('v2'))
+            self.assertEqual(shared.get((7, 2, 'admin')).body, b'"v2"')
+            self.assertIsNone(shared.get((7, 1, 'admin')))
+            self.assertIsNone(shared.get((7, 2, 'sub_recipe')))
+            # An older revision arriving late does not replace the newer one
+            shared.put((7, 1, 'admin'), encode('v1'))
+            self.assertEqual(shared.get((7, 2, 'admin')).body, b'"v2"')
+            shared.put((7, 3, 'admin'), encode('v3'))
+            self.assertIsNone(shared.get((7, 2, 'admin')))
+            self.assertEqual(shared.get((7, 3, 'admin')).body, b'"v3"')
+            shared._conn().close()
+
+
+if __name__ == '__main__':
+    unittest.main()
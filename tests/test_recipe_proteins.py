@@ -0,0 +1,27 @@
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.recipe_protein_service import match_proteins, protein_options
+
+
+class TestRecipeProteins(unittest.TestCase):
+    def test_options_are_the_protein_examples(self):
+        options = protein_options()
+        self.assertIn('Chicken', options)
+        self.assertIn('White Fish', options)
+        self.assertEqual(list(options), sorted(set(options)))
+
+    def test_match_is_case_insensitive_substring(self):
+        proteins = ('Chicken', 'Beef', 'Tofu', 'White Fish')
+        self.assertEqual(match_proteins(['Boneless chicken thighs', 'GROUND BEEF', None, 'Rice'], proteins),
+                         {'Chicken', 'Beef'})
+        self.assertEqual(match_proteins(['white fish fillet'], proteins), {'White Fish'})
+        self.assertEqual(match_proteins([], proteins), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
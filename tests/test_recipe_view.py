@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.recipe_view import OTHER_INGREDIENTS, build_component_layout
+
+
+def step(id, component, phase, step_number, global_order_index=None):
+    return SimpleNamespace(id=id, component=component, phase=phase, step_number=step_number,
+                           global_order_index=global_order_index)
+
+
+def line(id, component):
+    return SimpleNamespace(id=id, component=component)
+
+
+class TestComponentLayout(unittest.TestCase):
+    def test_steps_grouped_by_component_and_chronology(self):
+        steps = [step(1, 'Steak', 'Prep', 1, 1), step(2, 'Sauce', 'Cook', 2, 4),
+                 step(3, 'Sauce', 'Prep', 1, 2), step(4, 'Steak', 'Cook', 2, 3)]
+        layout = build_component_layout(steps, [line(10, 'Steak'), line(11, 'Sauce')])
+        self.assertEqual(layout['steps'], [2, 3, 4, 1])
+        self.assertEqual(layout['components'], ['Sauce', 'Steak'])
+        self.assertEqual(layout['ingredients'], [[10, 'Steak'], [11, 'Sauce']])
+        self.assertEqual(layout['chrono'], [1, 3, 4, 2])
+
+    def test_no_chronology_unless_every_step_has_an_index(self):
+        steps = [step(1, 'Main', 'Prep', 1, 1), step(2, 'Main', 'Cook', 2)]
+        self.assertIsNone(build_component_layout(steps, [])['chrono'])
+        self.assertIsNone(build_component_layout([], [])['chrono'])
+
+    def test_orphaned_lines_join_the_only_component(self):
+        layout = build_component_layout([step(1, 'Main Dish', 'Prep', 1)],
+                                        [line(10, 'Main Dish'), line(11, 'Main'), line(12, 'Main')])
+        self.assertEqual(layout['ingredients'], [[10, 'Main Dish'], [11, 'Main Dish'], [12, 'Main Dish']])
+
+    def test_orphaned_lines_split_over_components(self):
+        steps = [step(1, 'A', 'Prep', 1), step(2, 'B', 'Prep', 1)]
+        lines = [line(10, 'A')] + [line(11 + i, 'X') for i in range(5)]
+        layout = build_component_layout(steps, lines)
+        self.assertEqual(layout['ingredients'],
+                         [[10, 'A'], [11, 'A'], [12, 'A'], [13, 'B'], [14, 'B'], [15, 'B']])
+        self.assertEqual(layout['components'], ['A', 'B'])
+
+    def test_lines_without_steps_go_to_other_ingredients(self):
+        layout = build_component_layout([], [line(10, 'Main'), line(11, 'Sauce')])
+        self.assertEqual(layout['components'], [OTHER_INGREDIENTS])
+        self.assertEqual({c for _, c in layout['ingredients']}, {OTHER_INGREDIENTS})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import tempfile
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ai_engine
+from utils.resolution_cache import ResolutionCache, Resolution
+
+PANTRY_CONTEXT = [
+    {"i": "000104", "n": "Salt", "c": "spices", "u": "g", "t": "", "s": True},
+    {"i": "000105", "n": "Olive Oil", "c": "oils", "u": "ml", "t": "", "s": True},
+    {"i": "000102", "n": "Whole Eggs", "c": "dairy", "u": "unit", "t": "", "s": False},
+]
+
+
+class TestResolutionCache(unittest.TestCase):
+    def test_lru_eviction_and_counters(self):
+        cache = ResolutionCache(maxsize=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, Resolution(key, key, 'exact'), (key,), cache.generation)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c").food_id, "c")
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_put_after_invalidation_is_ignored(self):
+        cache = ResolutionCache()
+        generation = cache.generation
+        cache.invalidate_methods({'none'})
+        cache.put("salt", Resolution("1", "salt", 'exact'), ("salt",), generation)
+        self.assertEqual(len(cache), 0)
+
+
+class TestPantryIdCaching(unittest.TestCase):
+    def setUp(self):
+        self.previous = ai_engine.current_pantry_snapshot()
+        self.synonyms = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+        self.synonyms.close()
+        os.unlink(self.synonyms.name)
+        self.synonyms_path = ai_engine.SYNONYMS_PATH
+        ai_engine.SYNONYMS_PATH = self.synonyms.name
+        ai_engine._resolution_cache.clear()
+        ai_engine.set_pantry_memory(PANTRY_CONTEXT)
+
+    def tearDown(self):
+        ai_engine.SYNONYMS_PATH = self.synonyms_path
+        if os.path.exists(self.synonyms.name):
+            os.unlink(self.synonyms.name)
+        ai_engine._swap_pantry_snapshot(self.previous)
+
+    def cached_keys(self):
+        return set(ai_engine._resolution_cache._entries)
+
+    def test_repeat_lookups_hit_the_cache(self):
+        before = ai_engine.get_resolution_cache_stats()
+        for _ in range(3):
+            self.assertEqual(ai_engine.get_pantry_id("Salt"), "000104")
+            self.assertIsNone(ai_engine.get_pantry_id("Soy Milk"))
+        self.assertEqual(ai_engine.get_pantry_ids(["salt", "soy milk", "olive oil"]),
+                         {"salt": "000104", "soy milk": None, "olive oil": "000105"})
+        after = ai_engine.get_resolution_cache_stats()
+        self.assertEqual(after["misses"] - before["misses"], 3)
+        self.assertEqual(after["hits"] - before["hits"], 6)
+
+    def test_add_synonym_only_drops_affected_entries(self):
+        ai_engine.get_pantry_id("Salt")
+        ai_engine.get_pantry_id("Soy Milk")
+        ai_engine.get_pantry_id("Dragonfruit")
+        ai_engine.add_synonym("soy milk", "000999")
+        self.assertEqual(self.cached_keys(), {"salt", "dragonfruit"})
+        self.assertEqual(ai_engine.get_pantry_id("Soy Milk"), "000999")
+
+    def test_removed_ingredient_drops_its_resolutions(self):
+        ai_engine.get_pantry_id("salt")
+        ai_engine.get_pantry_id("2 large whole eggs")
+        ai_engine.set_pantry_memory([item for item in PANTRY_CONTEXT if item["i"] != "000102"])
+        self.assertEqual(self.cached_keys(), {"salt"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import tempfile
+
+from flask import Flask
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.models import db, Ingredient, Recipe
+from services import search_service
+from services.search_service import (
+    _tokens, _fts_match, _fts_substring, _prefix_tsquery, _like_pattern, _next_prefix, _sqlite_lower,
+    search_ingredients, search_recipes,
+)
+
+
+class TestSearchQueries(unittest.TestCase):
+    def test_tokens_drop_punctuation(self):
+        self.assertEqual(_tokens('  Chick-Pea "flour" '), ['chick', 'pea', 'flour'])
+        self.assertEqual(_tokens('%%'), [])
+
+    def test_every_word_is_a_prefix_term(self):
+        self.assertEqual(_fts_match(['chick', 'pea']), '"chick"* "pea"*')
+        self.assertEqual(_prefix_tsquery(['chick', 'pea']), 'chick:* & pea:*')
+
+    def test_like_wildcards_are_escaped(self):
+        self.assertEqual(_like_pattern('100%_Juice'), '%100\\%\\_juice%')
+
+    def test_next_prefix_bounds_the_range(self):
+        upper = _next_prefix('chick')
+        self.assertEqual(upper, 'chicl')
+        self.assertTrue('chick' <= 'chickpeas' < upper)
+        self.assertFalse('chicl' < upper)
+
+    def test_sqlite_lower_only_folds_ascii(self):
+        self.assertEqual(_sqlite_lower('Éclair AU'), 'Éclair au')
+        self.assertEqual(_fts_substring('dark "choc'), '"dark ""choc"')
+
+
+class TestSqliteSearch(unittest.TestCase):
+    """search_ingredients against real FTS5 tables (SQLite backend)."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp.name, 'search.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        search_service._fts_ready.clear()
+        names = [
+            ('Chocolate Chips', None), ('Chocolate', None), ('Dark Chocolate', None),
+            ('Cocoa Powder', '["chocolate powder"]'), ('Oat Milk', None), ('Rolled Oats', None),
+            ('Goat Cheese', None), ('Éclair', None),
+        ]
+        for i, (name, aliases) in enumerate(names):
+            db.session.add(Ingredient(food_id=f'{i:06d}', name=name, aliases=aliases or '[]'))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        search_service._fts_ready.clear()
+        self.tmp.cleanup()
+
+    def names(self, query, limit=10):
+        return [i.name for i in search_ingredients(query, limit=limit)]
+
+    def test_exact_then_prefix_then_text_matches(self):
+        results = self.names('chocolate')
+        self.assertEqual(results[:2], ['Chocolate', 'Chocolate Chips'])
+        self.assertEqual(set(results[2:]), {'Dark Chocolate', 'Cocoa Powder'})
+        # Matched through its alias only
+        self.assertEqual(self.names('chocolate powder'), ['Cocoa Powder'])
+
+    def test_word_matches_rank_before_substrings(self):
+        self.assertEqual(self.names('oat'), ['Oat Milk', 'Rolled Oats', 'Goat Cheese'])
+        # Infix only: the trigram table, like Postgres' ILIKE '%hocol%' (aliases included)
+        self.assertEqual(set(self.names('hocol')), {'Chocolate', 'Chocolate Chips', 'Dark Chocolate', 'Cocoa Powder'})
+
+    def test_non_ascii_prefixes(self):
+        self.assertEqual(self.names('Écl'), ['Éclair'])
+        self.assertEqual(self.names('éclair'), ['Éclair'])
+
+    def test_triggers_follow_renames(self):
+        ingredient = db.session.execute(db.select(Ingredient).where(Ingredient.name == 'Goat Cheese')).scalar_one()
+        ingredient.name = 'Feta'
+        db.session.commit()
+        self.assertEqual(self.names('oat'), ['Oat Milk', 'Rolled Oats'])
+
+    def test_recipes_can_be_limited_to_approved(self):
+        for title, status in (('Oat Porridge', 'approved'), ('Oat Cookies', 'pending'), ('Baked Oats', 'approved')):
+            db.session.add(Recipe(title=title, cuisine='British', difficulty='Easy', status=status))
+        db.session.commit()
+        self.assertEqual([r.title for r in search_recipes('oat')], ['Oat Cookies', 'Oat Porridge', 'Baked Oats'])
+        self.assertEqual([r.title for r in search_recipes('oat', approved_only=True)], ['Oat Porridge', 'Baked Oats'])
+
+
+if __name__ == '__main__':
+    unittest.main()
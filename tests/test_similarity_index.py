@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+import random
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.similarity_index import (
+    BANDS, NUM_PERM, band_buckets, estimate_similarity, minhash, recipe_features,
+)
+
+
+class TestSimilarityIndex(unittest.TestCase):
+    def test_recipe_features(self):
+        self.assertEqual(recipe_features([3, 7, None], 'Thai', 'Tofu'), {'i:3', 'i:7', 'c:thai', 'p:tofu'})
+        self.assertEqual(recipe_features([], None, ''), set())
+
+    def test_minhash_is_deterministic(self):
+        features = {'i:1', 'i:2', 'c:italian'}
+        signature = minhash(features)
+        self.assertEqual(signature.shape, (NUM_PERM,))
+        self.assertEqual(signature.dtype, np.uint32)
+        self.assertTrue(np.array_equal(signature, minhash(set(features))))
+        self.assertEqual(band_buckets(signature), band_buckets(minhash(features)))
+        self.assertEqual(len(band_buckets(signature)), BANDS)
+
+    def test_estimate_tracks_jaccard(self):
+        rng = random.Random(7)
+        base = {f'i:{i}' for i in range(40)}
+        for shared in (10, 20, 30):
+            other = set(rng.sample(sorted(base), shared)) | {f'i:x{i}' for i in range(40 - shared)}
+            jaccard = len(base & other) / len(base | other)
+            estimate = estimate_similarity(minhash(base), minhash(other)[None, :])[0]
+            self.assertAlmostEqual(estimate, jaccard, delta=0.2)
+
+    def test_identical_sets_share_every_bucket(self):
+        a = band_buckets(minhash({'i:1', 'i:2', 'p:chicken'}))
+        b = band_buckets(minhash({'p:chicken', 'i:2', 'i:1'}))
+        self.assertEqual(a, b)
+        disjoint = band_buckets(minhash({'i:100', 'i:200', 'p:beef'}))
+        self.assertLess(sum(x == y for x, y in zip(a, disjoint)), BANDS // 4)
+        # Buckets fit a signed 64-bit column
+        self.assertTrue(all(-2 ** 63 <= bucket < 2 ** 63 for bucket in a))
+
+    def test_empty_set(self):
+        signature = minhash(set())
+        self.assertEqual(estimate_similarity(signature, signature[None, :])[0], 1.0)
+        self.assertEqual(estimate_similarity(signature, minhash({'i:1'})[None, :])[0], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
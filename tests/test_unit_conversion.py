@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+from flask import Flask
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.unit_helpers import grams_per_unit
+from database.models import db, Ingredient
+from services import unit_conversion
+from services.cache_version_service import UNIT_CONVERSION_SCOPE, get_version
+from services.unit_conversion import ConversionTable, get_conversion_table, has_own_conversions
+
+# (id, name, default_unit, average_g_per_unit, density_g_per_ml)
+ROWS = [
+    (1, "Garlic", "clove", 4.0, None),
+    (2, "Honey", "tbsp", None, 1.42),
+    (3, "Red Onion", "unit", None, None),
+    (4, "Eggs", "unit", 50.0, None),
+]
+
+
+class TestGramsPerUnit(unittest.TestCase):
+    def test_rule_priority(self):
+        self.assertEqual(grams_per_unit('kg'), (1000.0, True))
+        # The ingredient's own unit weight beats the generic fallback
+        self.assertEqual(grams_per_unit('clove', 'cloves', 4.0), (4.0, True))
+        self.assertEqual(grams_per_unit('clove'), (5.0, False))
+        self.assertEqual(grams_per_unit('cup', density_g_per_ml=0.5), (120.0, True))
+        self.assertEqual(grams_per_unit('cup'), (240.0, False))
+        self.assertEqual(grams_per_unit('whole', name='Red Onion'), (150.0, False))
+        self.assertIsNone(grams_per_unit('handful'))
+
+    def test_other_countables_are_estimates(self):
+        # A 500 g loaf weighed per 'whole': a slice or serving is not exactly 500 g
+        self.assertEqual(grams_per_unit('whole', 'whole', 500.0), (500.0, True))
+        self.assertEqual(grams_per_unit('slice', 'whole', 500.0), (500.0, False))
+        self.assertEqual(grams_per_unit('serving', 'whole', 500.0), (500.0, False))
+
+
+class TestConversionTable(unittest.TestCase):
+    def setUp(self):
+        self.table = ConversionTable(ROWS)
+
+    def test_lookup_normalizes_raw_units(self):
+        self.assertAlmostEqual(self.table.to_grams(2, 2, "Tablespoons"), 2 * 15 * 1.42)
+        self.assertEqual(self.table.to_grams(4, 3, "pieces"), 150.0)
+        self.assertEqual(self.table.to_grams(1, 2, "Grams"), 2.0)
+        self.assertIsNone(self.table.to_grams(1, 2, "handful"))
+        self.assertIsNone(self.table.to_grams(99, 2, "g"))
+
+    def test_exact_only_skips_assumptions(self):
+        self.assertEqual(self.table.to_grams(3, 1, "unit"), 100.0)
+        self.assertIsNone(self.table.to_grams(3, 1, "unit", exact_only=True))
+        self.assertEqual(self.table.to_grams(1, 3, "cloves", exact_only=True), 12.0)
+        self.assertEqual(self.table.to_grams(4, 2, "unit", exact_only=True), 100.0)
+        self.assertIsNone(self.table.to_grams(4, 2, "slices", exact_only=True))
+
+    def test_batch_apis(self):
+        self.assertEqual(self.table.convert_many([(1, 2, "clove"), (4, 1, "egg")]), [8.0, None])
+        # Stored gram weights win; missing/zero ones are converted
+        self.assertEqual(
+            self.table.resolve_gram_weights([(1, 2, "clove", 10.0), (1, 2, "clove", 0), (4, 2, "unit", None)]),
+            [10.0, 8.0, 100.0]
+        )
+        # An ingredient added after the build converts by the generic rules
+        self.assertEqual(self.table.resolve_gram_weights([(99, 2, "kg", None), (99, 1, "cup", None)]),
+                         [2000.0, 240.0])
+
+    def test_own_conversions(self):
+        self.assertFalse(has_own_conversions("Basil", None, None, None))
+        self.assertFalse(has_own_conversions("Basil", "g", None, None))
+        self.assertTrue(has_own_conversions("Honey", None, None, 1.42))
+        self.assertTrue(has_own_conversions("Eggs", "unit", 50.0, None))
+        self.assertTrue(has_own_conversions("Red Onion", None, None, None))
+
+
+class TestConversionVersioning(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.tmp.name, 'units.db')}"
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.cache = mock.patch.multiple(unit_conversion, _table=None, _last_version_check=0.0)
+        self.cache.start()
+
+    def tearDown(self):
+        self.cache.stop()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+    def test_ingredients_without_unit_data_do_not_bump(self):
+        db.session.add(Ingredient(food_id='F1', name='Basil'))
+        db.session.commit()
+        self.assertEqual(get_version(UNIT_CONVERSION_SCOPE), 0)
+        db.session.add(Ingredient(food_id='F2', name='Honey', density_g_per_ml=1.42))
+        db.session.commit()
+        self.assertEqual(get_version(UNIT_CONVERSION_SCOPE), 1)
+
+    def test_uncommitted_bumps_are_read_through(self):
+        honey = Ingredient(food_id='F2', name='Honey', density_g_per_ml=1.42)
+        db.session.add(honey)
+        db.session.flush()
+        table = get_conversion_table()
+        self.assertAlmostEqual(table.to_grams(honey.id, 1, 'tbsp'), 15 * 1.42)
+        self.assertIsNone(unit_conversion._table)
+
+        db.session.rollback()
+        self.assertNotIn(honey.id, get_conversion_table())
+        self.assertEqual(unit_conversion._table.version, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
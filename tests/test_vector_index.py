@@ -0,0 +1,143 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ai_engine
+from utils.vector_index import VectorIndex, HashingEncoder, CachedEncoder
+
+PANTRY_CONTEXT = [
+    {"i": "000201", "n": "Cilantro", "c": "herbs", "u": "g", "t": "", "s": False},
+    {"i": "000104", "n": "Salt", "c": "spices", "u": "g", "t": "", "s": True},
+    {"i": "000301", "n": "Zucchini", "c": "vegetables", "u": "unit", "t": "", "s": False},
+]
+
+
+class DictEncoder:
+    """Offline encoder for tests: fixed vectors per known text, zeros otherwise."""
+
+    def __init__(self, vectors: dict):
+        self.vectors = vectors
+
+    def encode(self, texts):
+        return np.array([self.vectors.get(t, [0.0, 0.0, 0.0]) for t in texts], dtype=np.float32)
+
+
+class TestVectorIndex(unittest.TestCase):
+    def test_batched_top_k_by_cosine(self):
+        index = VectorIndex(["a", "b", "c"], ["A", "B", "C"], [[1, 0, 0], [0, 2, 0], [1, 1, 0]])
+        results = index.search([[0, 1, 0], [3, 0, 0]], k=2)
+        self.assertEqual([row for row, _ in results[0]], [1, 2])
+        self.assertEqual([row for row, _ in results[1]], [0, 2])
+        self.assertAlmostEqual(results[0][0][1], 1.0, places=5)
+        self.assertAlmostEqual(results[0][1][1], 1 / np.sqrt(2), places=5)
+
+    def test_empty_index(self):
+        index = VectorIndex([], [], [])
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.search(np.zeros((2, index.dim)), k=3), [[], []])
+
+    def test_hashing_encoder_is_deterministic_and_similarity_aware(self):
+        encoder = HashingEncoder()
+        vectors = encoder.encode(["olive oil", "olive oil", "olive oils", "brown sugar"])
+        self.assertTrue(np.array_equal(vectors[0], vectors[1]))
+        index = VectorIndex(["1", "2"], ["olive oil", "brown sugar"], vectors[[0, 3]])
+        self.assertEqual(index.search(vectors[2:3], k=1)[0][0][0], 0)
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        return np.array([[len(t), 1.0, 0.0] for t in texts], dtype=np.float32)
+
+
+class TestCachedEncoder(unittest.TestCase):
+    def test_only_unseen_texts_reach_the_encoder(self):
+        inner = CountingEncoder()
+        encoder = CachedEncoder(inner, size=2)
+        first = encoder.encode(["salt", "basil", "salt"])
+        self.assertEqual(inner.batches, [["salt", "basil"]])
+        self.assertTrue(np.array_equal(first[0], first[2]))
+        encoder.encode(["basil", "thyme"])
+        self.assertEqual(inner.batches[-1], ["thyme"])
+        # size=2: "salt" was evicted
+        encoder.encode(["salt"])
+        self.assertEqual(inner.batches[-1], ["salt"])
+
+
+class TestSemanticFallback(unittest.TestCase):
+    def setUp(self):
+        self.previous = (ai_engine.current_pantry_snapshot(), ai_engine.current_embedding_index(),
+                         ai_engine._query_encoder)
+        ai_engine.set_pantry_memory(PANTRY_CONTEXT)
+        ai_engine.set_embedding_index(VectorIndex(
+            ["000201", "000104", "000301"], ["Cilantro", "Salt", "Zucchini"],
+            [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+        ))
+        ai_engine.set_query_encoder(DictEncoder({
+            "coriander": [0.95, 0.1, 0.0],
+            "courgette": [0.0, 0.1, 0.95],
+            "spaceship": [0.5, 0.5, 0.5],
+        }))
+
+    def tearDown(self):
+        snapshot, index, encoder = self.previous
+        ai_engine._swap_pantry_snapshot(snapshot)
+        ai_engine.set_embedding_index(index)
+        ai_engine.set_query_encoder(encoder)
+
+    def test_get_pantry_id_falls_back_to_embeddings(self):
+        self.assertEqual(ai_engine.get_pantry_id("Salt"), "000104")
+        self.assertEqual(ai_engine.get_pantry_id("Coriander"), "000201")
+        # Below SEMANTIC_MATCH_THRESHOLD → still no match
+        self.assertIsNone(ai_engine.get_pantry_id("Spaceship"))
+
+    def test_get_pantry_ids_batches_the_fallback(self):
+        resolved = ai_engine.get_pantry_ids(["coriander", "courgette", "salt", "spaceship"])
+        self.assertEqual(resolved, {
+            "coriander": "000201", "courgette": "000301", "salt": "000104", "spaceship": None,
+        })
+
+    def test_suggestions_include_semantic_neighbours(self):
+        suggestions = ai_engine.get_top_pantry_suggestions("courgette", top_n=2)
+        self.assertEqual(suggestions[0]["food_id"], "000301")
+        self.assertEqual(suggestions[0]["name"], "zucchini")
+
+    def test_suggestions_read_the_provider_snapshot(self):
+        # e.g. pantry_service's version-checked snapshot, newer than this worker's module copy
+        fresh = ai_engine.PantrySnapshot({"tofu block": "000777"})
+        previous = ai_engine._snapshot_provider
+        ai_engine.set_snapshot_provider(lambda: fresh)
+        self.addCleanup(ai_engine.set_snapshot_provider, previous)
+        self.assertEqual(ai_engine.get_top_pantry_suggestions("tofu block", top_n=1)[0]["food_id"], "000777")
+
+    def test_encoder_failure_is_not_fatal(self):
+        class Broken:
+            def encode(self, texts):
+                raise RuntimeError("offline")
+        ai_engine.set_query_encoder(Broken())
+        self.assertIsNone(ai_engine.get_pantry_id("coriander"))
+
+    def test_failure_pauses_the_encoder(self):
+        calls = []
+
+        class Broken:
+            def encode(self, texts):
+                calls.append(texts)
+                raise TimeoutError("slow")
+        ai_engine.set_query_encoder(Broken())
+        self.assertEqual(ai_engine.get_pantry_ids(["coriander", "courgette"]), {"coriander": None, "courgette": None})
+        # Suggestions still come back, fuzzy only, without another encoder call
+        self.assertTrue(all(s["score"] < 85 for s in ai_engine.get_top_pantry_suggestions("spaceship", top_n=2)))
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.vocabulary import VocabularyRegistry
+
+
+class TestVocabularyRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = VocabularyRegistry(self.tmp.name)
+        self.builds = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, data, mtime):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        os.utime(path, (mtime, mtime))
+
+    def _sorted_diets(self, data):
+        self.builds += 1
+        return sorted(data['diets'])
+
+    def test_reloads_only_when_the_file_changes(self):
+        self._write('diets.json', {'diets': ['vegan']}, mtime=1000)
+        first = self.registry.load('diets.json')
+        self.assertIs(self.registry.load('diets.json'), first)
+
+        self._write('diets.json', {'diets': ['vegan', 'keto']}, mtime=2000)
+        self.assertEqual(self.registry.option('diets.json', 'diets'), ['vegan', 'keto'])
+
+    def test_derived_values_are_rebuilt_on_change(self):
+        self._write('diets.json', {'diets': ['vegan']}, mtime=1000)
+        for _ in range(3):
+            self.assertEqual(self.registry.derived('d', ('diets.json',), self._sorted_diets), ['vegan'])
+        self.assertEqual(self.builds, 1)
+
+        self._write('diets.json', {'diets': ['vegan', 'keto']}, mtime=2000)
+        self.assertEqual(self.registry.derived('d', ('diets.json',), self._sorted_diets), ['keto', 'vegan'])
+        self.assertEqual(self.builds, 2)
+
+    def test_missing_or_invalid_files(self):
+        self.assertEqual(self.registry.load('missing.json', default=[]), [])
+        self.assertEqual(self.registry.option('missing.json', 'diets'), [])
+        path = os.path.join(self.tmp.name, 'broken.json')
+        with open(path, 'w') as f:
+            f.write('{not json')
+        self.assertIsNone(self.registry.load('broken.json'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+"""
+Precompiled fuzzy matcher over a pantry snapshot.
+
+thefuzz's process.extractOne re-runs full_process() over every pantry key on
+every call. PantryMatcher does that work once when the snapshot is built and
+then scores queries with RapidFuzz directly against the already-processed
+choices. Scores are rounded exactly like thefuzz does, so thresholds tuned
+against thefuzz (e.g. FUZZY_MATCH_THRESHOLD) keep their meaning.
+
+Large pantries are additionally blocked: a character-trigram + token inverted
+index (NGramIndex) shortlists the SHORTLIST_SIZE most promising keys and only
+those are scored. See scripts/benchmark_pantry_matcher.py for the
+accuracy/latency comparison against the exhaustive scan.
+"""
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+# thefuzz.utils.ascii_only: drop Latin-1 supplement characters before processing
+_ASCII_TABLE = {i: None for i in range(128, 256)}
+
+# Staged scorer order shared by every lookup: WRatio first (similar-length
+# strings), then token_set_ratio (subsets such as "feta" in "feta cheese").
+SCORERS = (fuzz.WRatio, fuzz.token_set_ratio)
+
+# Candidates scored per query once blocking is on, and the pantry size from
+# which it turns on (below it a full cdist scan is already cheap and exact).
+SHORTLIST_SIZE = 300
+BLOCKING_MIN_KEYS = 1000
+
+
+def preprocess_choice(s: str) -> str:
+    """Mirrors thefuzz's processing of a choice for WRatio / token_set_ratio."""
+    return default_process(str(s).translate(_ASCII_TABLE))
+
+
+def preprocess_query(s: str) -> str:
+    """Mirrors thefuzz's processing of a query (full_process, then the scorer wrapper)."""
+    return preprocess_choice(default_process(s))
+
+
+def ngram_features(processed: str) -> set[str]:
+    """
+    Blocking features of an already-processed string: padded character
+    trigrams plus whole tokens (prefixed with '#', which default_process
+    never leaves in a string, so the two kinds cannot collide).
+    """
+    if not processed:
+        return set()
+    padded = f" {processed} "
+    features = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    features.update('#' + token for token in processed.split())
+    return features
+
+
+class NGramIndex:
+    """
+    Inverted index from blocking feature to pantry key positions.
+
+    A query's candidates are the keys sharing the most IDF-weighted features
+    with it, so rare trigrams/tokens ("feta", "jal") dominate common ones
+    ("ed ", "#fresh"); the sum is divided by sqrt(#features of the key) so
+    short keys ("red wine") aren't crowded out by long decorated ones that
+    merely share more n-grams. Aliases are indexed under every key of their food_id:
+    a query that only resembles an alias still shortlists the ingredient.
+    """
+
+    def __init__(self, choices: list[str], extra: list[list[str]] | None = None):
+        self.size = len(choices)
+        postings: dict[str, list[int]] = {}
+        for idx, choice in enumerate(choices):
+            features = ngram_features(choice)
+            for alias in (extra[idx] if extra else ()):
+                features |= ngram_features(alias)
+            for feature in features:
+                postings.setdefault(feature, []).append(idx)
+
+        self.features: dict[str, int] = {}
+        self.postings: list[np.ndarray] = []
+        for feature, positions in postings.items():
+            self.features[feature] = len(self.postings)
+            self.postings.append(np.asarray(positions, dtype=np.int32))
+        df = np.array([len(p) for p in self.postings], dtype=np.float64)
+        self.idf = np.log1p(self.size / df) if len(df) else df
+        per_key = np.bincount(np.concatenate(self.postings), minlength=self.size) if self.postings \
+            else np.zeros(self.size)
+        self.norm = 1.0 / np.sqrt(np.maximum(per_key, 1))
+
+    def shortlist(self, processed_query: str, size: int = SHORTLIST_SIZE) -> np.ndarray | None:
+        """
+        Up to `size` candidate positions for a processed query, in ascending
+        (pantry) order so scoring keeps extractOne's first-best tie-break.
+        None when the query shares no feature with any key (caller scans all).
+        """
+        ids = [self.features[f] for f in sorted(ngram_features(processed_query)) if f in self.features]
+        if not ids:
+            return None
+        hits = np.concatenate([self.postings[i] for i in ids])
+        weights = np.repeat(self.idf[ids], [len(self.postings[i]) for i in ids])
+        scores = np.bincount(hits, weights=weights, minlength=self.size) * self.norm
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > size:
+            top = np.argpartition(-scores[candidates], size - 1)[:size]
+            candidates = np.sort(candidates[top])
+        return candidates
+
+
+class PantryMatcher:
+    """
+    Immutable fuzzy index over a {name: food_id} pantry mapping.
+
+    keys / food_ids / choices are parallel arrays in the mapping's insertion
+    order, so tie-breaking matches thefuzz on list(pantry_map.keys()).
+
+    aliases ({food_id: [alias, ...]}) only widen the blocking index; matches
+    are still reported against pantry keys. blocking=None enables the
+    n-gram shortlist from BLOCKING_MIN_KEYS keys on; False forces a full scan.
+    """
+
+    def __init__(self, pantry: dict[str, str], aliases: dict[str, list[str]] | None = None,
+                 blocking: bool | None = None):
+        self.keys: list[str] = list(pantry.keys())
+        self.food_ids: list[str] = [pantry[k] for k in self.keys]
+        self.choices: list[str] = [preprocess_choice(k) for k in self.keys]
+
+        if blocking is None:
+            blocking = len(self.keys) >= BLOCKING_MIN_KEYS
+        self.index: NGramIndex | None = None
+        if blocking and self.keys:
+            extra = None
+            if aliases:
+                extra = [[preprocess_choice(a) for a in aliases.get(fid, ()) if a] for fid in self.food_ids]
+            self.index = NGramIndex(self.choices, extra)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def candidates(self, processed_queries: list[str]) -> np.ndarray | None:
+        """
+        Union of the shortlists of already-processed queries (ascending
+        positions), or None when they must be scored against every key —
+        blocking is off or some query's shortlist came back empty.
+        """
+        if self.index is None:
+            return None
+        shortlists = []
+        for q in processed_queries:
+            shortlist = self.index.shortlist(q)
+            if shortlist is None:
+                return None
+            shortlists.append(shortlist)
+        return np.unique(np.concatenate(shortlists)) if shortlists else None
+
+    def _cdist(self, processed_queries: list[str], scorer, cand: np.ndarray | None) -> np.ndarray:
+        """Score matrix against the candidate positions (or every key when cand is None)."""
+        choices = self.choices if cand is None else [self.choices[i] for i in cand]
+        return process.cdist(processed_queries, choices, scorer=scorer, processor=None,
+                             dtype=np.float64, workers=-1)
+
+    def _best(self, processed: str, cand: np.ndarray | None, scorer) -> tuple[str, int, int] | None:
+        choices = self.choices if cand is None else [self.choices[i] for i in cand]
+        result = process.extractOne(processed, choices, scorer=scorer, processor=None)
+        if result is None:
+            return None
+        _, score, idx = result
+        if cand is not None:
+            idx = int(cand[idx])
+        return self.keys[idx], int(round(score)), idx
+
+    def best(self, query: str, scorer=fuzz.WRatio) -> tuple[str, int, int] | None:
+        """
+        Single best match for one scorer.
+        Returns (matched_key, rounded_score, index) or None for an empty pantry.
+        """
+        if not self.choices:
+            return None
+        processed = preprocess_query(query)
+        return self._best(processed, self.candidates([processed]), scorer)
+
+    def match(self, query: str, threshold: int) -> tuple[str, int, str] | None:
+        """
+        Staged match: WRatio, then token_set_ratio.
+        Returns (matched_key, score, scorer_label) for the first stage that
+        reaches threshold, else None.
+        """
+        if not self.choices:
+            return None
+        processed = preprocess_query(query)
+        cand = self.candidates([processed])
+        for scorer, label in zip(SCORERS, ('WRatio', 'token_set')):
+            result = self._best(processed, cand, scorer)
+            if result and result[1] >= threshold:
+                return result[0], result[1], label
+        return None
+
+    def match_many(self, queries: list[str], threshold: int) -> list[tuple[str, int, str] | None]:
+        """
+        Vectorized match(): one cdist pass per scorer over every query still
+        unresolved, returning one result (or None) per query in input order.
+        """
+        results: list[tuple[str, int, str] | None] = [None] * len(queries)
+        if not self.choices or not queries:
+            return results
+
+        pending = list(range(len(queries)))
+        processed = [preprocess_query(q) for q in queries]
+        for scorer, label in zip(SCORERS, ('WRatio', 'token_set')):
+            if not pending:
+                break
+            queries_left = [processed[i] for i in pending]
+            cand = self.candidates(queries_left)
+            scores = self._cdist(queries_left, scorer, cand)
+            # argmax keeps the first best choice, the same tie-break as extractOne
+            best = scores.argmax(axis=1)
+            still_pending = []
+            for row, qi in enumerate(pending):
+                col = int(best[row])
+                score = int(round(scores[row, col]))
+                idx = col if cand is None else int(cand[col])
+                if score >= threshold:
+                    results[qi] = (self.keys[idx], score, label)
+                else:
+                    still_pending.append(qi)
+            pending = still_pending
+        return results
+
+    def top(self, queries: list[str], limit: int) -> list[list[tuple[str, int]]]:
+        """
+        Top `limit` matches per (query, scorer), scored in one vectorized
+        cdist pass per scorer. Output order is [q0/WRatio, q0/token_set,
+        q1/WRatio, ...], each list sorted by score descending (ties by
+        pantry order), mirroring thefuzz's process.extract.
+        """
+        if not self.choices or not queries:
+            return [[] for _ in queries for _ in SCORERS]
+
+        processed = [preprocess_query(q) for q in queries]
+        cand = self.candidates(processed)
+        matrices = [self._cdist(processed, scorer, cand) for scorer in SCORERS]
+
+        out = []
+        for qi in range(len(queries)):
+            for scores in matrices:
+                row = scores[qi]
+                order = np.argsort(-row, kind='stable')[:limit]
+                positions = order if cand is None else cand[order]
+                out.append([(self.keys[i], int(round(row[j]))) for i, j in zip(positions, order)])
+        return out
@@ -0,0 +1,125 @@
+"""
+LRU cache of ingredient name → pantry resolution, with selective invalidation.
+
+Recipes keep asking for the same strings ("salt", "olive oil", "2 cloves
+garlic, minced"), so ai_engine remembers each lowercased name's outcome,
+misses included. Every entry records how it was resolved, which lets a
+pantry change drop only the entries it can actually affect:
+
+  - a key removed or re-pointed drops the entries that resolved to it;
+  - a key added (or whose aliases changed) drops the entries for which it
+    is an exact form or scores >= the fuzzy threshold, since only those
+    could now resolve differently (misses included);
+  - a new embedding index drops the semantic hits and the misses.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+from rapidfuzz import process
+
+from utils.pantry_matcher import SCORERS, preprocess_choice, preprocess_query
+
+RESOLUTION_CACHE_SIZE = 4096
+
+
+class Resolution(NamedTuple):
+    food_id: str | None
+    matched_key: str | None   # pantry key for exact/fuzzy hits
+    method: str               # 'exact' | 'fuzzy' | 'semantic' | 'none'
+
+
+class _Entry(NamedTuple):
+    resolution: Resolution
+    forms: tuple[str, ...]    # (n_lower, n_clean) the lookup matched on
+
+
+class ResolutionCache:
+    def __init__(self, maxsize: int = RESOLUTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; put() ignores results computed
+        # against a pantry that changed while they were being resolved.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Resolution | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.resolution
+
+    def put(self, key: str, resolution: Resolution, forms: tuple[str, ...], generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = _Entry(resolution, forms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _drop(self, keys: list[str]):
+        # caller holds the lock
+        for key in keys:
+            del self._entries[key]
+        self.invalidated += len(keys)
+        self.generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._drop(list(self._entries))
+
+    def invalidate_methods(self, methods: set[str]):
+        """Drops every entry resolved by one of `methods` (e.g. {'semantic', 'none'})."""
+        with self._lock:
+            self._drop([k for k, e in self._entries.items() if e.resolution.method in methods])
+
+    def invalidate_pantry_change(self, removed: set[str], added: list[str], threshold: int):
+        """
+        Applies a pantry diff: `removed` keys no longer map where they did,
+        `added` keys are new (or re-pointed, or got new aliases).
+        """
+        with self._lock:
+            stale = {k for k, e in self._entries.items() if e.resolution.matched_key in removed}
+            if added:
+                candidates = [k for k in self._entries if k not in stale]
+                added_set = set(added)
+                for key in candidates:
+                    if any(form in added_set for form in self._entries[key].forms):
+                        stale.add(key)
+                candidates = [k for k in candidates if k not in stale]
+                if candidates:
+                    rows = [(k, form) for k in candidates for form in self._entries[k].forms]
+                    queries = [preprocess_query(form) for _, form in rows]
+                    choices = [preprocess_choice(a) for a in added]
+                    close = np.zeros(len(rows), dtype=bool)
+                    for scorer in SCORERS:
+                        scores = process.cdist(queries, choices, scorer=scorer, processor=None,
+                                               score_cutoff=threshold - 0.5, workers=-1)
+                        close |= (scores > 0).any(axis=1)
+                    stale.update(k for (k, _), hit in zip(rows, close) if hit)
+            self._drop(list(stale))
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidated": self.invalidated,
+            }
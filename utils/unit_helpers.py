@@ -47,9 +47,42 @@ UNIT_ALIASES: dict[str, str] = {
     'milliliters': 'ml',
     'milliliter': 'ml',
     'ml.': 'ml',
-    'mls': 'ml'
+    'mls': 'ml',
+    'millilitre': 'ml',
+    'millilitres': 'ml',
+
+    # Larger / smaller metric and imperial weights
+    'kilogram': 'kg',
+    'kilograms': 'kg',
+    'kgs': 'kg',
+    'milligram': 'mg',
+    'milligrams': 'mg',
+    'pound': 'lb',
+    'pounds': 'lb',
+    'lbs': 'lb',
+    'liter': 'l',
+    'liters': 'l',
+    'litre': 'l',
+    'litres': 'l',
+
+    # Countables
+    'units': 'unit',
+    'pieces': 'piece',
+    'slices': 'slice',
+    'servings': 'serving'
 }
 
+# --- Gram conversion rules (shared by every nutrition path) ---
+MASS_TO_GRAMS: dict[str, float] = {'g': 1.0, 'kg': 1000.0, 'mg': 0.001, 'oz': 28.35, 'lb': 453.59}
+VOLUME_TO_ML: dict[str, float] = {'ml': 1.0, 'l': 1000.0, 'tsp': 5.0, 'tbsp': 15.0, 'cup': 240.0, 'fl oz': 29.57}
+# Units meaning "one of the item" — weighed with the ingredient's average_g_per_unit
+COUNT_UNITS: tuple[str, ...] = ('unit', 'piece', 'serving', 'slice', 'whole')
+# Last-resort guesses when the ingredient has no data of its own
+FALLBACK_GRAMS: dict[str, float] = {'pinch': 0.5, 'clove': 5.0, 'piece': 100.0, 'unit': 100.0}
+ONION_WHOLE_GRAMS = 150.0  # medium onion
+WATER_DENSITY = 1.0
+
+
 def normalize_unit(unit_string: str) -> str:
     """
     Lowercases, strips, and attempts to resolve a unit string to its canonical form.
@@ -60,3 +93,33 @@ def normalize_unit(unit_string: str) -> str:
         
     cleaned = unit_string.lower().strip()
     return UNIT_ALIASES.get(cleaned, cleaned)
+
+
+def grams_per_unit(unit: str, default_unit: str | None = None, average_g_per_unit: float | None = None,
+                   density_g_per_ml: float | None = None, name: str | None = None) -> tuple[float, bool] | None:
+    """
+    Grams in one `unit` (already canonical) of an ingredient, as (grams, exact).
+    `exact` is False for assumptions (water density, generic piece weights).
+    Returns None if the unit can't be converted.
+
+    Priority: mass units, then the ingredient's own unit weight (exact for its
+    default unit, an estimate for other countables), then volume × density,
+    then fallbacks.
+    """
+    if unit in MASS_TO_GRAMS:
+        return MASS_TO_GRAMS[unit], True
+    if average_g_per_unit and average_g_per_unit > 0:
+        if default_unit and unit == normalize_unit(default_unit):
+            return float(average_g_per_unit), True
+        # A slice or serving of an item weighed per 'whole' is not one whole
+        if unit in COUNT_UNITS:
+            return float(average_g_per_unit), False
+    if unit in VOLUME_TO_ML:
+        if density_g_per_ml and density_g_per_ml > 0:
+            return VOLUME_TO_ML[unit] * density_g_per_ml, True
+        return VOLUME_TO_ML[unit] * WATER_DENSITY, False
+    if unit == 'whole' and name and 'onion' in name.lower():
+        return ONION_WHOLE_GRAMS, False
+    if unit in FALLBACK_GRAMS:
+        return FALLBACK_GRAMS[unit], False
+    return None
@@ -0,0 +1,161 @@
+"""
+In-process vector index over ingredient embeddings, plus query encoders.
+
+Ingredient.embedding (768-dim, see scripts/generate_ingredient_embeddings.py)
+is loaded once into a row-normalized float32 matrix, so cosine similarity
+for a whole batch of queries is a single matrix product. Works the same on
+Postgres (pgvector) and SQLite, where pgvector stores the vector as text.
+
+Query strings need embeddings in the same space as the stored ones, so the
+encoder is pluggable:
+  - GeminiEncoder: the text-embedding-004 model the stored vectors come from.
+    Stored vectors are embedded as RETRIEVAL_DOCUMENT (the full
+    embedding_text()), query names as RETRIEVAL_QUERY: the model's
+    asymmetric task pair, so a bare name and a "Name. Category: ..." text
+    land in comparable positions.
+  - HashingEncoder: deterministic character-trigram hashing, no network.
+    Only meaningful against embeddings produced by the same encoder (tests,
+    local databases seeded offline).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+EMBEDDING_DIM = 768
+
+# Gemini embedding task types for the two sides of a lookup
+DOCUMENT_TASK = 'RETRIEVAL_DOCUMENT'
+QUERY_TASK = 'RETRIEVAL_QUERY'
+
+
+def embedding_text(name: str, main_category: str = None, sub_category: str = None) -> str:
+    """Text embedded for a pantry ingredient (same format as generate_ingredient_embeddings.py)."""
+    return f"{name}. Category: {main_category or 'food'}. Sub-category: {sub_category or 'general'}."
+
+
+class VectorIndex:
+    """
+    Immutable cosine-similarity index: parallel food_ids / names and a
+    (n, dim) float32 matrix of unit-length rows.
+    """
+
+    def __init__(self, food_ids: list[str], names: list[str], vectors, version: int | None = None):
+        self.version = version
+        self.food_ids = list(food_ids)
+        self.names = list(names)
+        if self.food_ids:
+            matrix = np.asarray(vectors, dtype=np.float32).reshape(len(self.food_ids), -1)
+        else:
+            matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms == 0, 1, norms)
+        self.matrix.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.food_ids)
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def search(self, query_vectors, k: int = 5) -> list[list[tuple[int, float]]]:
+        """
+        Batched top-k by cosine similarity. query_vectors is (q, dim); returns
+        one [(row, similarity), ...] list per query, best first.
+        """
+        if not len(self) or k <= 0:
+            return [[] for _ in range(len(query_vectors))]
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        sims = queries @ self.matrix.T
+        k = min(k, len(self))
+        if k < len(self):
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(len(self)), (len(queries), 1))
+        out = []
+        for row, cols in zip(sims, top):
+            cols = cols[np.argsort(-row[cols], kind='stable')]
+            out.append([(int(c), float(row[c])) for c in cols])
+        return out
+
+
+class HashingEncoder:
+    """Offline encoder: signed feature hashing of padded character trigrams and tokens."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _features(self, text: str):
+        text = ' '.join(text.lower().split())
+        padded = f" {text} "
+        yield from (padded[i:i + 3] for i in range(len(padded) - 2))
+        yield from ('#' + token for token in text.split())
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.md5(feature.encode('utf-8')).digest()
+                bucket = int.from_bytes(digest[:4], 'little') % self.dim
+                out[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        return out
+
+
+class GeminiEncoder:
+    """
+    Encodes with the Gemini embedding model used for Ingredient.embedding
+    (one request per batch), as `task_type`. timeout_ms bounds the request.
+    """
+
+    def __init__(self, client, model: str = 'text-embedding-004', task_type: str | None = None,
+                 timeout_ms: int | None = None):
+        self.client = client
+        self.model = model
+        self.task_type = task_type
+        self.timeout_ms = timeout_ms
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        from google.genai import types
+        config = types.EmbedContentConfig(
+            task_type=self.task_type,
+            http_options=types.HttpOptions(timeout=self.timeout_ms) if self.timeout_ms else None,
+        )
+        result = self.client.models.embed_content(model=self.model, contents=list(texts), config=config)
+        return np.asarray([e.values for e in result.embeddings], dtype=np.float32)
+
+
+class CachedEncoder:
+    """
+    LRU of text -> vector in front of another encoder: repeat texts never
+    reach it again, and a batch only sends the texts it has not seen.
+    """
+
+    def __init__(self, encoder, size: int = 4096):
+        self.encoder = encoder
+        self.size = size
+        self._vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        texts = list(texts)
+        with self._lock:
+            known = {t: self._vectors[t] for t in texts if t in self._vectors}
+            for text in known:
+                self._vectors.move_to_end(text)
+        missing = list(dict.fromkeys(t for t in texts if t not in known))
+        if missing:
+            fresh = dict(zip(missing, self.encoder.encode(missing)))
+            known.update(fresh)
+            with self._lock:
+                self._vectors.update(fresh)
+                while len(self._vectors) > self.size:
+                    self._vectors.popitem(last=False)
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        return np.stack([np.asarray(known[t], dtype=np.float32) for t in texts])
@@ -0,0 +1,177 @@
+"""
+Vocabulary registry — the controlled vocabularies and option lists under data/.
+
+Recipe generation, the admin tables and every /recipes request need the same
+small JSON files (diets, cuisines, meal types, proteins, ...). The registry
+parses each file once and re-reads it only when its mtime (or size) changes,
+so edits on disk are still picked up without a restart. Structures derived
+from the files (flattened option lists, the protein example → category map)
+are cached the same way and rebuilt only when one of their source files
+changed.
+
+Returned lists and dicts are shared between callers: treat them as read-only.
+"""
+
+import json
+import threading
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+CONSTRAINTS = 'constraints'
+POST_PROCESSING = 'post_processing'
+
+
+class VocabularyRegistry:
+    def __init__(self, data_dir: Path | str = DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self._files: dict[str, tuple] = {}     # relpath -> (stamp, parsed JSON)
+        self._derived: dict[str, tuple] = {}   # name -> (source stamps, value)
+        self._lock = threading.Lock()
+
+    def _stamp(self, relpath: str):
+        try:
+            st = (self.data_dir / relpath).stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self, relpath: str, stamp):
+        """(stamp, parsed JSON or None), re-reading the file only when `stamp` differs from the cached one."""
+        cached = self._files.get(relpath)
+        if cached and cached[0] == stamp:
+            return cached
+        data = None
+        if stamp is not None:
+            try:
+                data = json.loads((self.data_dir / relpath).read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Warning: Could not load {relpath}: {e}")
+        with self._lock:
+            self._files[relpath] = (stamp, data)
+        return stamp, data
+
+    def load(self, relpath: str, default=None):
+        """Parsed JSON of data/<relpath>, or `default` when the file is missing or invalid."""
+        _, data = self._read(relpath, self._stamp(relpath))
+        return default if data is None else data
+
+    def option(self, relpath: str, key: str) -> list:
+        """`key` of a JSON object file (what app.load_json_option used to return); [] when absent."""
+        data = self.load(relpath)
+        return data.get(key, []) if isinstance(data, dict) else []
+
+    def derived(self, name: str, relpaths: tuple[str, ...], build):
+        """
+        build(*parsed files) (None for a missing file), cached under `name`
+        until one of `relpaths` changes on disk.
+        """
+        stamps = tuple(self._stamp(p) for p in relpaths)
+        cached = self._derived.get(name)
+        if cached and cached[0] == stamps:
+            return cached[1]
+        value = build(*(self._read(p, s)[1] for p, s in zip(relpaths, stamps)))
+        with self._lock:
+            self._derived[name] = (stamps, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._derived.clear()
+
+
+registry = VocabularyRegistry()
+
+
+# ---------------------------------------------------------------------------
+# Derived vocabularies
+# ---------------------------------------------------------------------------
+
+def _unwrap(data, key):
+    """{key: [...]} -> [...]; a bare list passes through; missing -> []."""
+    if data is None:
+        return []
+    return data.get(key, data) if isinstance(data, dict) else data
+
+
+CONTROLLED_VOCABULARY_FILES = (
+    f'{CONSTRAINTS}/diets.json',
+    f'{CONSTRAINTS}/main_protein.json',
+    f'{CONSTRAINTS}/meal_types.json',
+    f'{CONSTRAINTS}/difficulty.json',
+    f'{POST_PROCESSING}/cuisines.json',
+    f'{POST_PROCESSING}/cooking_methods.json',
+    f'{POST_PROCESSING}/taste.json',
+    f'{POST_PROCESSING}/time_intervals.json',
+    f'{POST_PROCESSING}/cleanup_factors.json',
+)
+
+
+def _build_controlled_vocabularies(diets, proteins, meal_types, difficulty, cuisines,
+                                   cooking_methods, tastes, time_intervals, cleanup_factors) -> dict:
+    vocab = {
+        "diets": _unwrap(diets, 'diets'),
+        "cuisines": _unwrap(cuisines, 'cuisines'),
+        "meal_types": _unwrap(meal_types, 'meal_types'),
+        "cooking_methods": [],
+        "tastes": _unwrap(tastes, 'tastes'),
+        "cleanup_factors": [str(x) for x in _unwrap(cleanup_factors, 'cleanup_factors')],
+        "difficulty": _unwrap(difficulty, 'difficulty'),
+        "time_intervals": _unwrap(time_intervals, 'time_intervals'),
+    }
+    if proteins is not None:
+        # {"protein_types": [{"category": "Beef", ...}]} -> category names
+        raw = _unwrap(proteins, 'protein_types')
+        if isinstance(raw, list) and raw and isinstance(raw[0], dict):
+            vocab["protein_types"] = [item.get('category') for item in raw]
+        else:
+            vocab["protein_types"] = raw
+    # List of {"method", "category"} objects -> method names
+    raw = _unwrap(cooking_methods, 'cooking_methods')
+    if isinstance(raw, list) and raw and isinstance(raw[0], dict):
+        vocab["cooking_methods"] = [m.get('method') for m in raw]
+    else:
+        vocab["cooking_methods"] = raw
+    return vocab
+
+
+def controlled_vocabularies() -> dict:
+    """The metadata tagging vocabularies (see ai_engine.load_controlled_vocabularies)."""
+    return registry.derived('controlled_vocabularies', CONTROLLED_VOCABULARY_FILES,
+                            _build_controlled_vocabularies)
+
+
+def _protein_types(data) -> list[dict]:
+    raw = _unwrap(data, 'protein_types')
+    return [p for p in raw if isinstance(p, dict)] if isinstance(raw, list) else []
+
+
+def protein_category_map() -> dict[str, str]:
+    """Protein example -> its main_protein.json category (first category wins)."""
+    def build(data):
+        categories = {}
+        for p in _protein_types(data):
+            for example in p.get('examples', []):
+                categories.setdefault(example, p.get('category'))
+        return categories
+    return registry.derived('protein_categories', (f'{CONSTRAINTS}/main_protein.json',), build)
+
+
+def protein_examples() -> tuple[str, ...]:
+    """Sorted, de-duplicated protein examples from main_protein.json."""
+    return registry.derived('protein_examples', (f'{CONSTRAINTS}/main_protein.json',),
+                            lambda data: tuple(sorted(protein_category_map())))
+
+
+def meal_type_options() -> list[str]:
+    """meal_types.json's meal_classification (category -> meal types), flattened and sorted."""
+    def build(data):
+        classification = data.get('meal_classification', {}) if isinstance(data, dict) else {}
+        options = set()
+        if isinstance(classification, dict):
+            for category_list in classification.values():
+                if isinstance(category_list, list):
+                    options.update(category_list)
+        return sorted(options)
+    return registry.derived('meal_type_options', (f'{CONSTRAINTS}/meal_types.json',), build)